@@ -1,6 +1,8 @@
 from src.bootstrap import init_nonebot
 
-app = init_nonebot()
+# 进程池子进程（forkserver / spawn）以 __mp_main__ 重新导入入口文件，不初始化 NoneBot
+if __name__ != "__mp_main__":
+    app = init_nonebot()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+# ruff: noqa: T201
+"""基准测试公共工具 — NoneBot 离线初始化与分阶段耗时/峰值内存统计。"""
+
+import inspect
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_REQUIRES_FILE = ROOT / "src" / "bootstrap" / "patches" / "plugin_requires.json"
+
+
+def init_nonebot(plugin: str, /, **config: Any) -> None:
+    """以无网络驱动初始化 NoneBot，并加载指定插件及其依赖。
+
+    本地存储目录指向临时目录，避免污染运行环境。
+    """
+    import nonebot
+
+    tmp = Path(tempfile.mkdtemp(prefix="bot7685-bench-"))
+    nonebot.init(
+        driver="~none",
+        localstore_cache_dir=str(tmp / "cache"),
+        localstore_data_dir=str(tmp / "data"),
+        localstore_config_dir=str(tmp / "config"),
+        **config,
+    )
+    nonebot.logger.remove()
+    nonebot.logger.add(sys.stderr, level="WARNING")
+
+    requires: dict[str, list[str]] = json.loads(_REQUIRES_FILE.read_text("utf-8"))
+    loaded: set[str] = set()
+
+    def require(name: str) -> None:
+        if name in loaded:
+            return
+        loaded.add(name)
+        for dep in requires.get(name.rsplit(".", 1)[-1], []):
+            if dep != name:
+                require(dep)
+        nonebot.require(name)
+
+    require(plugin)
+
+
+@dataclass(frozen=True, slots=True)
+class StageResult:
+    stage: str
+    size: int
+    seconds: float
+    peak_bytes: int | None
+
+
+class StageBench:
+    """按阶段记录中位耗时与峰值内存 (tracemalloc)。"""
+
+    def __init__(self, rounds: int = 3, *, trace_memory: bool = True) -> None:
+        self.rounds = rounds
+        self.trace_memory = trace_memory
+        self.results: list[StageResult] = []
+
+    @staticmethod
+    async def _call(func: Callable[[], Any]) -> Any:
+        result = func()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run[R](
+        self,
+        stage: str,
+        size: int,
+        func: Callable[[], Awaitable[R] | R],
+    ) -> R:
+        timings: list[float] = []
+        result: Any = None
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            result = await self._call(func)
+            timings.append(time.perf_counter() - start)
+
+        peak: int | None = None
+        if self.trace_memory:
+            tracemalloc.start()
+            try:
+                await self._call(func)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.results.append(StageResult(stage, size, statistics.median(timings), peak))
+        return result
+
+    def report(self) -> None:
+        print(f"{"阶段":<28}{"规模":>10}{"耗时 (ms)":>14}{"峰值内存 (MiB)":>18}")
+        for r in self.results:
+            peak = f"{r.peak_bytes / 1024 / 1024:.2f}" if r.peak_bytes else "-"
+            print(f"{r.stage:<28}{r.size:>10}{r.seconds * 1000:>14.2f}{peak:>18}")
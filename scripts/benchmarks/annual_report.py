@@ -0,0 +1,133 @@
+# ruff: noqa: T201
+"""年度报告分析基准 — 对比单进程与多进程分片分析的总耗时与各阶段耗时，并校验结果一致。
+
+两条路径的用户词都只加入各次分析自己的分词器，先后运行互不影响。
+
+用法: uv run scripts/benchmarks/annual_report.py [--messages 200000] [--workers 4]
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+import time
+from typing import Any
+
+from _common import init_nonebot
+
+PLUGIN = "src.plugins.annual_report"
+
+_PHRASES = [
+    "今天",
+    "吃饭",
+    "上班",
+    "摸鱼",
+    "代码",
+    "报错",
+    "部署",
+    "服务器",
+    "抽卡",
+    "出货",
+    "哈哈哈",
+    "笑死",
+    "确实",
+    "好耶",
+    "离谱",
+    "绷不住了",
+    "有一说一",
+    "属于是",
+    "蚌埠住了",
+    "Python",
+    "重构",
+    "性能",
+    "加班",
+    "放假",
+    "火锅",
+    "奶茶",
+    "，",
+    "！",
+    "？",
+    "😂",
+    "👍",
+]
+
+
+def generate_input(size: int, *, seed: int = 7685, speakers: int = 200) -> Any:
+    """生成覆盖全年的确定性合成聊天记录。"""
+    from src.plugins.annual_report.schema import (
+        AnalyzerInput,
+        ContentInfo,
+        Message,
+        ReplyInfo,
+        SenderInfo,
+    )
+
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(speakers)]
+    uins = [str(100000 + i) for i in range(speakers)]
+    year_start = dt.datetime(2025, 1, 1, tzinfo=dt.timezone(dt.timedelta(hours=8)))
+    offsets = sorted(rng.randrange(365 * 86400) for _ in range(size))
+
+    messages: list[Message] = []
+    for i, (offset, uin) in enumerate(
+        zip(offsets, rng.choices(uins, weights=weights, k=size), strict=True)
+    ):
+        text = "".join(rng.choices(_PHRASES, k=rng.randint(1, 10)))
+        if rng.random() < 0.1:
+            text += f"[图片:{i}.jpg]"
+        reply = None
+        if messages and rng.random() < 0.05:
+            reply = ReplyInfo(referencedMessageId=rng.choice(messages).messageId)
+        timestamp = year_start + dt.timedelta(seconds=offset)
+        messages.append(
+            Message(
+                messageId=str(i),
+                sender=SenderInfo(uin=uin, name=f"群友{uin}"),
+                content=ContentInfo(text=text, reply=reply),
+                timestamp=timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            )
+        )
+
+    return AnalyzerInput(messages=messages, chatName="基准测试群")
+
+
+def run(data: Any, workers: int) -> tuple[float, dict[str, float], dict[str, Any]]:
+    from src.plugins.annual_report.analyzer import ChatAnalyzer
+
+    random.seed(0)
+    analyzer = ChatAnalyzer(data)
+    start = time.perf_counter()
+    analyzer.analyze(workers=workers)
+    elapsed = time.perf_counter() - start
+    return elapsed, analyzer.stage_timings, analyzer.export_json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200000, help="消息数量")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="多进程路径进程数"
+    )
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        annual_report={"openai": {"api_key": "-", "base_url": "-", "model": "-"}},
+    )
+    data = generate_input(args.messages, seed=args.seed)
+
+    parallel_time, parallel_stages, parallel_result = run(data, args.workers)
+    single_time, single_stages, single_result = run(data, 1)
+
+    print(f"消息数: {args.messages}")
+    print(f"{"阶段":<16}{"单进程 (s)":>12}{f"{args.workers} 进程 (s)":>14}")
+    for stage, elapsed in single_stages.items():
+        print(f"{stage:<16}{elapsed:>12.2f}{parallel_stages.get(stage, 0):>14.2f}")
+    print(f"{"总计":<16}{single_time:>12.2f}{parallel_time:>14.2f}")
+    print(f"加速比: {single_time / parallel_time:.2f}x")
+    print(f"结果一致: {parallel_result == single_result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# ruff: noqa: T201
+"""年度报告新词发现校验 — 在固定语料上对比逐层剪枝引擎与原始全量枚举实现。
+
+逐个候选词比较词频、左右邻接熵与 PMI，任一不一致即以非零状态退出；
+同时输出两种实现的耗时与峰值内存 (tracemalloc)。
+
+用法: uv run scripts/benchmarks/annual_report_newword.py [--messages 50000]
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from collections.abc import Callable
+
+from _common import init_nonebot
+from annual_report import PLUGIN, generate_input
+
+type Scores = dict[str, tuple[int, float, float, float]]
+
+
+def reference_scores(texts: list[str], min_freq: int) -> Scores:
+    """原始实现：枚举全部 2-5 元组，并为每个 n-gram 维护左右邻字计数器。"""
+    from src.workers.annual_report.counting import calculate_entropy
+
+    ngram_freq: Counter[str] = Counter()
+    left_neighbors: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    right_neighbors: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    total_chars = 0
+
+    for text in texts:
+        for raw in re.split('[，。！？、；：""（）\\s\\n\\r,.!?()\\[\\]]', text):
+            sentence = raw.strip()
+            if len(sentence) < 2:
+                continue
+
+            total_chars += len(sentence)
+
+            for n in range(2, min(6, len(sentence) + 1)):
+                for i in range(len(sentence) - n + 1):
+                    ngram = sentence[i : i + n]
+                    if re.match(r"^[\d\s\W]+$", ngram) or re.match(
+                        r"^[a-zA-Z]+$", ngram
+                    ):
+                        continue
+
+                    ngram_freq[ngram] += 1
+                    left = sentence[i - 1] if i > 0 else "<BOS>"
+                    right = sentence[i + n] if i + n < len(sentence) else "<EOS>"
+                    left_neighbors[ngram][left] += 1
+                    right_neighbors[ngram][right] += 1
+
+    scores: Scores = {}
+    for word, freq in ngram_freq.items():
+        if freq < min_freq:
+            continue
+        min_pmi = float("inf")
+        for i in range(1, len(word)):
+            left_freq = ngram_freq.get(word[:i], 0)
+            right_freq = ngram_freq.get(word[i:], 0)
+            if left_freq > 0 and right_freq > 0:
+                pmi = math.log2((freq * total_chars) / (left_freq * right_freq + 1e-10))
+                min_pmi = min(min_pmi, pmi)
+        scores[word] = (
+            freq,
+            calculate_entropy(left_neighbors[word]),
+            calculate_entropy(right_neighbors[word]),
+            0 if min_pmi == float("inf") else min_pmi,
+        )
+    return scores
+
+
+def engine_scores(texts: list[str], min_freq: int) -> Scores:
+    from src.workers.annual_report.newword import NewWordDiscovery, count_level
+
+    engine = NewWordDiscovery(min_freq=min_freq, entropy_threshold=0, pmi_threshold=0)
+    return {
+        word: (s.freq, s.left_entropy, s.right_entropy, s.pmi)
+        for word, s in engine.score(
+            lambda n, frequent, candidates: count_level(texts, n, frequent, candidates)
+        ).items()
+    }
+
+
+def measure(func: Callable[[], Scores]) -> tuple[Scores, float, int]:
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000, help="消息数量")
+    parser.add_argument("--min-freq", type=int, default=20, help="新词最小频率")
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        annual_report={"openai": {"api_key": "-", "base_url": "-", "model": "-"}},
+    )
+    from src.service.text import clean_text
+
+    data = generate_input(args.messages, seed=args.seed)
+    texts = [t for m in data.messages if (t := clean_text(m.content.text))]
+
+    expected, ref_time, ref_peak = measure(
+        lambda: reference_scores(texts, args.min_freq)
+    )
+    actual, engine_time, engine_peak = measure(
+        lambda: engine_scores(texts, args.min_freq)
+    )
+
+    print(f"文本数: {len(texts)}, 候选词: {len(expected)}")
+    print(f"{"实现":<12}{"耗时 (s)":>12}{"峰值内存 (MiB)":>18}")
+    print(f"{"全量枚举":<12}{ref_time:>12.2f}{ref_peak / 1024 / 1024:>18.2f}")
+    print(f"{"逐层剪枝":<12}{engine_time:>12.2f}{engine_peak / 1024 / 1024:>18.2f}")
+
+    mismatched = [
+        word
+        for word in expected.keys() | actual.keys()
+        if word not in expected
+        or word not in actual
+        or not all(
+            math.isclose(a, b, abs_tol=1e-9)
+            for a, b in zip(expected[word], actual[word], strict=True)
+        )
+    ]
+    if mismatched:
+        print(f"不一致: {len(mismatched)} 个, 例如 {mismatched[:10]}")
+        sys.exit(1)
+    print("结果一致")
+
+
+if __name__ == "__main__":
+    main()
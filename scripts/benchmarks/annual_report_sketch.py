@@ -0,0 +1,96 @@
+# ruff: noqa: T201
+"""年度报告近似计数精度报告 — 在长尾词表的合成语料上对比精确计数与 sketch 计数。
+
+输出两种模式的耗时与峰值内存 (tracemalloc)，以及前 N 个高频词的召回率、
+词频相对误差和合并词组的差异。
+
+用法: uv run scripts/benchmarks/annual_report_sketch.py [--messages 100000]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any
+
+from _common import init_nonebot
+from annual_report import PLUGIN, generate_input
+
+
+def add_long_tail(data: Any, vocab_size: int, seed: int) -> None:
+    """在每条消息后追加按 Zipf 分布抽取的随机汉字词，制造长尾词表。"""
+    rng = random.Random(seed)
+    vocab = [
+        "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 4)))
+        for _ in range(vocab_size)
+    ]
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    for message, words in zip(
+        data.messages,
+        (rng.choices(vocab, weights=weights, k=3) for _ in data.messages),
+        strict=False,
+    ):
+        message.content.text += "，" + "，".join(words)
+
+
+def run(data: Any, *, sketch: bool, workers: int) -> tuple[Any, float, int]:
+    from src.plugins.annual_report.analyzer import ChatAnalyzer
+    from src.plugins.annual_report.config import config
+
+    config.sketch.enabled = sketch
+    random.seed(0)
+    analyzer = ChatAnalyzer(data)
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        analyzer.analyze(workers=workers)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return analyzer, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000, help="消息数量")
+    parser.add_argument("--vocab", type=int, default=200000, help="长尾词表大小")
+    parser.add_argument("--top", type=int, default=200, help="比较的高频词数量")
+    parser.add_argument("--capacity", type=int, default=5000, help="sketch 容量")
+    parser.add_argument("--epsilon", type=float, default=1e-4, help="相对误差")
+    parser.add_argument("--workers", type=int, default=1, help="分析进程数")
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        annual_report={
+            "openai": {"api_key": "-", "base_url": "-", "model": "-"},
+            "sketch": {"capacity": args.capacity, "epsilon": args.epsilon},
+        },
+    )
+    data = generate_input(args.messages, seed=args.seed)
+    add_long_tail(data, args.vocab, args.seed)
+
+    exact, exact_time, exact_peak = run(data, sketch=False, workers=args.workers)
+    approx, approx_time, approx_peak = run(data, sketch=True, workers=args.workers)
+
+    print(f"消息数: {args.messages}, 精确词表: {len(exact.word_freq)} 个词")
+    print(f"{"模式":<12}{"耗时 (s)":>12}{"峰值内存 (MiB)":>18}")
+    print(f"{"精确计数":<12}{exact_time:>12.2f}{exact_peak / 1024 / 1024:>18.2f}")
+    print(f"{"近似计数":<12}{approx_time:>12.2f}{approx_peak / 1024 / 1024:>18.2f}")
+
+    expected = dict(exact.get_top_words(args.top))
+    actual = dict(approx.get_top_words(args.top))
+    common = expected.keys() & actual.keys()
+    errors = [(actual[w] - expected[w]) / expected[w] for w in common]
+    print(f"前 {args.top} 召回率: {len(common) / max(len(expected), 1):.2%}")
+    if errors:
+        mean_error = sum(errors) / len(errors)
+        print(f"词频相对误差: 平均 {mean_error:.4%}, 最大 {max(errors):.4%}")
+    merged_diff = exact.merged_words.keys() ^ approx.merged_words.keys()
+    print(f"合并词组: {len(exact.merged_words)} 个, 不一致 {len(merged_diff)} 个")
+
+
+if __name__ == "__main__":
+    main()
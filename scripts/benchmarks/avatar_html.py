@@ -0,0 +1,147 @@
+# /// script
+# dependencies = []
+# ///
+# ruff: noqa: T201
+"""群分析报告头像 HTML 基准：内联 Data URI + 正则复用 vs 短引用地址。
+
+旧方案在模板中内联 base64 头像，再用正则扫描整份 HTML 替换为 CSS 复用引用；
+新方案在模板阶段直接输出 ``{AVATAR_ORIGIN}{ref}``，由页面路由统一解析。
+
+用法: uv run scripts/benchmarks/avatar_html.py [--speakers 200] [--repeat 20]
+"""
+
+import argparse
+import base64
+import hashlib
+import html
+import random
+import re
+import statistics
+import time
+from collections.abc import Callable
+
+AVATAR_ORIGIN = "http://avatar.group-daily-analysis.invalid/"
+TRANSPARENT_IMAGE_DATA_URI = (
+    "data:image/svg+xml;base64,"
+    "PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSIxIiBoZWlnaHQ9IjEiPjwvc3ZnPg=="
+)
+HEAD = "<html><head><style>body{margin:0}</style></head><body>"
+TAIL = "</body></html>"
+
+
+# ── 旧方案：内联 Data URI + 正则替换 ─────────────────────
+
+
+def _legacy_reuse(html_content: str, aliases: dict[str, str]) -> str:
+    img_src_pattern = re.compile(
+        r'(<img\b[^>]*?\bsrc\s*=\s*)(["\'])(data:image/[^"\']+)(\2)([^>]*>)',
+        re.IGNORECASE | re.DOTALL,
+    )
+
+    def replace(m: re.Match[str]) -> str:
+        prefix, quote_char, data_uri, _, suffix = m.groups()
+        if data_uri == TRANSPARENT_IMAGE_DATA_URI:
+            return m.group(0)
+        avatar_ref = aliases.get(data_uri)
+        if not avatar_ref:
+            return m.group(0)
+        return (
+            f"{prefix}{quote_char}{TRANSPARENT_IMAGE_DATA_URI}{quote_char}"
+            f' data-avatar-ref="{html.escape(avatar_ref, quote=True)}"{suffix}'
+        )
+
+    html_content = img_src_pattern.sub(replace, html_content)
+
+    rules = ['<style id="avatar-reuse-styles">']
+    for data_uri, ref in aliases.items():
+        escaped_uri = data_uri.replace("\\", "\\\\").replace('"', '\\"')
+        rules.append(
+            f'[data-avatar-ref="{ref}"]{{background-image:url("{escaped_uri}");}}'
+        )
+    rules.append("</style>")
+
+    head_close = re.search(r"</head\s*>", html_content, re.IGNORECASE)
+    assert head_close is not None
+    return (
+        html_content[: head_close.start()]
+        + "\n".join(rules)
+        + html_content[head_close.start() :]
+    )
+
+
+def build_legacy(avatars: dict[str, bytes], mentions: list[str]) -> str:
+    data_uris = {
+        uid: f"data:image/jpeg;base64,{base64.b64encode(data).decode()}"
+        for uid, data in avatars.items()
+    }
+    aliases = {
+        uri: f"avatar-{hashlib.sha256(uid.encode()).hexdigest()[:24]}"
+        for uid, uri in data_uris.items()
+    }
+    body = "".join(
+        f'<span class="user-capsule"><img src="{data_uris[uid]}"><span>{uid}</span>'
+        "</span>"
+        for uid in mentions
+    )
+    return _legacy_reuse(HEAD + body + TAIL, aliases)
+
+
+# ── 新方案：模板阶段输出短引用地址 ───────────────────────
+
+
+def build_refs(avatars: dict[str, bytes], mentions: list[str]) -> str:
+    refs = {
+        uid: f"{AVATAR_ORIGIN}{hashlib.sha256(data).hexdigest()}"
+        for uid, data in avatars.items()
+    }
+    body = "".join(
+        f'<span class="user-capsule"><img src="{refs[uid]}"><span>{uid}</span></span>'
+        for uid in mentions
+    )
+    return HEAD + body + TAIL
+
+
+def measure(func: Callable[[], str], rounds: int) -> tuple[float, int]:
+    timings: list[float] = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        size = len(func().encode())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--speakers", type=int, default=200, help="不同发言人数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每人被引用的次数")
+    parser.add_argument("--avatar-size", type=int, default=8192, help="头像字节数")
+    parser.add_argument("--rounds", type=int, default=5, help="测量轮数")
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    avatars = {
+        str(10000 + i): rng.randbytes(args.avatar_size) for i in range(args.speakers)
+    }
+    # 少数活跃发言人占据大部分引用
+    weights = [1 / (rank + 1) for rank in range(args.speakers)]
+    mentions = rng.choices(
+        list(avatars), weights=weights, k=args.speakers * args.repeat
+    )
+
+    print(
+        f"发言人: {args.speakers}, 引用次数: {len(mentions)}, "
+        f"头像大小: {args.avatar_size} B"
+    )
+    print(f"{"方案":<16}{"耗时 (ms)":>12}{"HTML 大小 (KiB)":>18}")
+    for name, func in (
+        ("内联 + 正则复用", lambda: build_legacy(avatars, mentions)),
+        ("短引用地址", lambda: build_refs(avatars, mentions)),
+    ):
+        elapsed, size = measure(func, args.rounds)
+        print(f"{name:<16}{elapsed * 1000:>12.2f}{size / 1024:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# ruff: noqa: SLF001
+"""群聊日常分析基准 — 合成聊天记录 + 本地假 LLM，完全离线运行。
+
+覆盖阶段: 基础统计、用户/小时/表情统计、各分析器 prompt 构建、
+经假 LLM 的完整分析调用、增量批次合并、文本与 HTML 报告渲染。
+
+用法: uv run scripts/benchmarks/group_daily_analysis.py [--sizes 10000,100000]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Any
+
+import httpx
+from _common import StageBench, init_nonebot
+
+PLUGIN = "src.plugins.group_daily_analysis"
+
+_WORDS = [
+    "今天",
+    "明天",
+    "吃饭",
+    "上班",
+    "摸鱼",
+    "代码",
+    "报错",
+    "部署",
+    "服务器",
+    "数据库",
+    "游戏",
+    "抽卡",
+    "出货",
+    "非酋",
+    "欧皇",
+    "哈哈哈",
+    "笑死",
+    "确实",
+    "草",
+    "好耶",
+    "离谱",
+    "绷不住了",
+    "有一说一",
+    "属于是",
+    "这波",
+    "啊这",
+    "蚌埠住了",
+    "Python",
+    "Rust",
+    "重构",
+    "性能",
+    "内存",
+    "并发",
+    "缓存",
+    "bug",
+    "需求",
+    "产品",
+    "老板",
+    "周报",
+    "加班",
+    "放假",
+    "火锅",
+    "奶茶",
+]
+
+
+def generate_chat(
+    size: int,
+    *,
+    seed: int = 7685,
+    speakers: int = 300,
+    zipf: float = 1.1,
+) -> tuple[list[Any], set[Any]]:
+    """生成确定性的合成群聊记录。
+
+    发言人数量服从 Zipf 分布，时间分布模拟日间活跃曲线，
+    消息内容混合文本、图片、表情、@、回复等多种类型。
+    """
+    from src.plugins.group_daily_analysis.domain.value_objects import (
+        MessageContent,
+        MessageContentType,
+        UnifiedMember,
+        UnifiedMessage,
+    )
+
+    rng = random.Random(seed)
+    members = [
+        UnifiedMember(
+            user_id=str(100000 + i),
+            nickname=f"群友{i}",
+            card=f"群友{i}号" if rng.random() < 0.5 else None,
+        )
+        for i in range(speakers)
+    ]
+    weights = [1 / (rank + 1) ** zipf for rank in range(speakers)]
+    hour_weights = [0.3] * 7 + [1, 2, 3, 3, 2, 3, 3, 2, 2, 3, 3, 4, 5, 5, 4, 3, 1]
+    day_start = 1_760_000_000 - 1_760_000_000 % 86400
+
+    senders = rng.choices(members, weights=weights, k=size)
+    hours = rng.choices(range(24), weights=hour_weights, k=size)
+    messages: list[UnifiedMessage] = []
+    for i, (sender, hour) in enumerate(zip(senders, hours, strict=True)):
+        text = "".join(rng.choices(_WORDS, k=rng.randint(1, 12)))
+        contents = [MessageContent(type=MessageContentType.TEXT, text=text)]
+        reply_to_id = None
+        roll = rng.random()
+        if roll < 0.10:
+            contents.append(
+                MessageContent(type=MessageContentType.IMAGE, url=f"https://img/{i}")
+            )
+        elif roll < 0.18:
+            contents.append(
+                MessageContent(
+                    type=MessageContentType.EMOJI, emoji_id=str(rng.randint(1, 300))
+                )
+            )
+        elif roll < 0.23:
+            contents.append(
+                MessageContent(
+                    type=MessageContentType.AT, at_user_id=rng.choice(members).user_id
+                )
+            )
+        elif roll < 0.28 and messages:
+            reply_to_id = rng.choice(messages).message_id
+            contents.append(MessageContent(type=MessageContentType.REPLY))
+        messages.append(
+            UnifiedMessage(
+                message_id=str(i),
+                sender=sender,
+                group_id="bench",
+                text_content=text,
+                contents=tuple(contents),
+                timestamp=day_start + hour * 3600 + rng.randrange(3600),
+                platform="bench",
+                reply_to_id=reply_to_id,
+            )
+        )
+
+    messages.sort(key=lambda m: m.timestamp)
+    return messages, set(members)
+
+
+def fake_llm_transport(user_ids: list[str]) -> httpx.MockTransport:
+    """按请求的 JSON Schema 返回固定结构化结果的假 LLM。"""
+    canned: dict[str, Any] = {
+        "SummaryTopic": [
+            {
+                "topic": f"话题{i}",
+                "contributors": user_ids[i : i + 3],
+                "detail": f"[{user_ids[i]}] 与 [{user_ids[i + 1]}] 讨论了重构与性能",
+            }
+            for i in range(5)
+        ],
+        "UserTitle": [
+            {
+                "name": f"群友{i}",
+                "user_id": uid,
+                "title": "龙王",
+                "mbti": "ENTP",
+                "reason": f"[{uid}] 发言最多",
+            }
+            for i, uid in enumerate(user_ids[:8])
+        ],
+        "GoldenQuote": [
+            {"content": "代码能跑就别动", "sender": f"[{uid}]", "reason": "真理"}
+            for uid in user_ids[:5]
+        ],
+        "QualityReview": {
+            "title": "摸鱼日报",
+            "subtitle": "今天也在努力",
+            "dimensions": [
+                {"name": "技术讨论", "percentage": 40, "comment": "卷"},
+                {"name": "水群", "percentage": 60, "comment": "快乐"},
+            ],
+            "summary": "一切正常",
+        },
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        schema = payload["response_format"]["json_schema"]["schema"]
+        ref: str = schema.get("items", {}).get("$ref") or schema.get("title", "")
+        content = canned[ref.rsplit("/", 1)[-1]]
+        return httpx.Response(
+            200,
+            json={
+                "choices": [{"message": {"content": json.dumps(content)}}],
+                "usage": {
+                    "prompt_tokens": len(payload["messages"][-1]["content"]) // 2,
+                    "completion_tokens": 256,
+                    "total_tokens": len(payload["messages"][-1]["content"]) // 2 + 256,
+                },
+            },
+        )
+
+    return httpx.MockTransport(handler)
+
+
+async def bench_size(bench: StageBench, size: int, seed: int) -> None:
+    from src.plugins.group_daily_analysis.analyzers.chat_quality import (
+        ChatQualityAnalyzer,
+    )
+    from src.plugins.group_daily_analysis.analyzers.golden_quote import (
+        GoldenQuoteAnalyzer,
+    )
+    from src.plugins.group_daily_analysis.analyzers.topic import TopicAnalyzer
+    from src.plugins.group_daily_analysis.analyzers.user_title import (
+        UserTitleAnalyzer,
+        UserTitleInput,
+    )
+    from src.plugins.group_daily_analysis.domain.incremental import IncrementalBatch
+    from src.plugins.group_daily_analysis.rendering import (
+        render_html,
+        render_markdown,
+        render_text,
+    )
+    from src.plugins.group_daily_analysis.services import analysis_service as svc
+    from src.plugins.group_daily_analysis.services.incremental_merge import (
+        IncrementalMergeService,
+    )
+    from src.service.llm import get_llm_client
+
+    messages, members = generate_chat(size, seed=seed)
+    top_ids = [
+        uid
+        for uid, _ in sorted(
+            svc._compute_user_stats(messages).items(),
+            key=lambda kv: kv[1].message_count,
+            reverse=True,
+        )
+    ][:10]
+    get_llm_client()._client = httpx.AsyncClient(transport=fake_llm_transport(top_ids))
+
+    statistics = await bench.run(
+        "基础统计", size, lambda: svc._calculate_statistics(messages)
+    )
+    user_stats = await bench.run(
+        "用户统计", size, lambda: svc._compute_user_stats(messages)
+    )
+    await bench.run("小时统计", size, lambda: svc._compute_hourly_counts(messages))
+    await bench.run("表情统计", size, lambda: svc._compute_emoji_stats(messages))
+
+    user_title_input = UserTitleInput.from_user_activities(user_stats, max_users=8)
+    await bench.run(
+        "prompt: 话题", size, lambda: TopicAnalyzer().build_prompt(messages)
+    )
+    await bench.run(
+        "prompt: 金句", size, lambda: GoldenQuoteAnalyzer().build_prompt(messages)
+    )
+    await bench.run(
+        "prompt: 聊天质量", size, lambda: ChatQualityAnalyzer().build_prompt(messages)
+    )
+    await bench.run(
+        "prompt: 用户称号",
+        size,
+        lambda: UserTitleAnalyzer().build_prompt(user_title_input),
+    )
+
+    async def analyze_all() -> Any:
+        return await asyncio.gather(
+            TopicAnalyzer().analyze(messages),
+            UserTitleAnalyzer().analyze(user_title_input),
+            GoldenQuoteAnalyzer().analyze(messages),
+            ChatQualityAnalyzer().analyze(messages),
+        )
+
+    (
+        (topics, _),
+        (user_titles, _),
+        (golden_quotes, _),
+        (chat_quality, _),
+    ) = await bench.run("LLM 分析 (假 LLM)", size, analyze_all)
+
+    def make_batch(part: list[Any]) -> IncrementalBatch:
+        hourly_msg_counts, hourly_char_counts = svc._compute_hourly_counts(part)
+        return IncrementalBatch(
+            group_id="bench",
+            messages_count=len(part),
+            hourly_msg_counts=hourly_msg_counts,
+            hourly_char_counts=hourly_char_counts,
+            members=members,
+            user_stats=svc._compute_user_stats(part),
+            emoji_stats=svc._compute_emoji_stats(part),
+            topics=topics,
+            golden_quotes=golden_quotes,
+        )
+
+    chunk = -(-size // 8)
+    batches = [make_batch(messages[i : i + chunk]) for i in range(0, size, chunk)]
+    merge_service = IncrementalMergeService()
+    await bench.run(
+        "增量批次合并",
+        size,
+        lambda: merge_service.merge_batches(batches, 0, 86400),
+    )
+
+    result = svc.AnalysisResult(
+        group_id="bench",
+        group_name="基准测试群",
+        messages=messages,
+        members=members,
+        statistics=statistics,
+        topics=topics,
+        user_titles=user_titles,
+        golden_quotes=golden_quotes,
+        chat_quality=chat_quality[0] if chat_quality else None,
+    )
+    await bench.run("渲染: 文本", size, lambda: render_text(result))
+    await bench.run("渲染: Markdown", size, lambda: render_markdown(result))
+    await bench.run("渲染: HTML 模板", size, lambda: render_html(result))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000",
+        help="逗号分隔的消息规模，例如 10000,100000,500000",
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="每阶段测量轮数")
+    parser.add_argument("--seed", type=int, default=7685)
+    parser.add_argument("--no-memory", action="store_true", help="不统计峰值内存")
+    args = parser.parse_args()
+
+    init_nonebot(PLUGIN, llm={"base_url": "http://fake-llm.invalid", "api_key": "-"})
+
+    bench = StageBench(args.rounds, trace_memory=not args.no_memory)
+    for size in map(int, args.sizes.split(",")):
+        await bench_size(bench, size, args.seed)
+    bench.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
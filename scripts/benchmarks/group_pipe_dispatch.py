@@ -0,0 +1,163 @@
+"""管道消息段分派微基准 — 对比逐条匹配谓词与查询分派表的开销。
+
+为每个适配器构造包含大量混合消息段的长消息，先单独测量查找处理函数的耗时，
+并校验分派表与逐条匹配的结果一致；再对每一对源/目标适配器完整转换一次消息。
+消息段只包含无需网络与数据库的类型（文本、提及、表情等）。
+
+用法: uv run scripts/benchmarks/group_pipe_dispatch.py [--segments 20000]
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from _common import StageBench, init_nonebot
+
+PLUGIN = "src.plugins.group_pipe"
+
+if TYPE_CHECKING:
+    from nonebot.adapters import Bot, Message, MessageSegment
+
+
+def make_bots() -> dict[str, Bot]:
+    """构造各适配器的离线 Bot
+
+    适配器实例不经过驱动器注册（Discord 适配器要求 ForwardDriver），
+    转换过程只用到适配器名称，不会调用平台接口。
+    """
+    from nonebot.adapters import discord, milky, telegram
+    from nonebot.adapters.discord.config import BotInfo
+    from nonebot.adapters.milky.config import ClientInfo
+    from nonebot.adapters.onebot import v11
+    from nonebot.adapters.telegram.config import BotConfig
+
+    def offline[T](adapter: type[T]) -> T:
+        return adapter.__new__(adapter)
+
+    bots: list[Bot] = [
+        v11.Bot(offline(v11.Adapter), "10000"),
+        telegram.Bot(
+            offline(telegram.Adapter),
+            "20000",
+            config=BotConfig(token="20000:bench"),  # noqa: S106
+        ),
+        discord.Bot(
+            offline(discord.Adapter),
+            "30000",
+            BotInfo(token="bench"),  # noqa: S106
+        ),
+        milky.Bot(offline(milky.Adapter), "40000", ClientInfo()),
+    ]
+    return {bot.type: bot for bot in bots}
+
+
+def segment_factories() -> dict[str, list[Callable[[random.Random], Any]]]:
+    from nonebot.adapters import discord, milky, telegram
+    from nonebot.adapters.onebot import v11
+
+    tg = telegram.message.Entity
+    dc = discord.MessageSegment
+    mk = milky.MessageSegment
+
+    def words(rng: random.Random) -> str:
+        return " ".join(rng.choices(["管道", "转发", "消息", "bench", "hello"], k=4))
+
+    return {
+        "OneBot V11": [
+            lambda rng: v11.MessageSegment.text(words(rng)),
+            lambda rng: v11.MessageSegment.at(rng.randrange(10000, 99999)),
+            lambda rng: v11.MessageSegment(
+                "face", {"id": str(rng.randrange(300)), "raw": {"faceText": "[表情]"}}
+            ),
+            lambda rng: v11.MessageSegment(
+                "dice", {"result": str(rng.randrange(1, 7))}
+            ),
+        ],
+        "Telegram": [
+            lambda rng: tg.text(words(rng)),
+            lambda rng: tg.mention(f"@user{rng.randrange(1000)}"),
+            lambda rng: tg.hashtag(f"#tag{rng.randrange(100)}"),
+            lambda rng: tg.bold(words(rng)),
+        ],
+        "Discord": [
+            lambda rng: dc.text(f"{words(rng)} [link](<https://example.com>)"),
+            lambda rng: dc.mention_user(rng.randrange(10**17, 10**18)),
+            lambda rng: dc.mention_role(rng.randrange(10**17, 10**18)),
+        ],
+        "Milky": [
+            lambda rng: mk.text(words(rng)),
+            lambda rng: mk.mention(rng.randrange(10000, 99999)),
+            lambda rng: mk.face(str(rng.randrange(300))),
+        ],
+    }
+
+
+def make_message(bot: Bot, size: int, seed: int) -> Message[MessageSegment]:
+    rng = random.Random(seed)
+    factories = segment_factories()[bot.type]
+    segments = [rng.choice(factories)(rng) for _ in range(size)]
+    return segments[0].get_message_class()(segments)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=20000, help="消息段数量")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        cos={
+            "secret_id": "-",
+            "secret_key": "-",
+            "region": "-",
+            "bucket": "-",
+            "is_internal": False,
+        },
+    )
+
+    from src.plugins.group_pipe.adapter import get_converter
+
+    bots = make_bots()
+    messages = {
+        name: make_message(bot, args.segments, args.seed) for name, bot in bots.items()
+    }
+
+    bench = StageBench(args.rounds, trace_memory=False)
+    for name, bot in bots.items():
+        converter = get_converter(bot)(bot)
+        message = messages[name]
+        for seg in message:
+            fn = converter._find_fn(seg)  # noqa: SLF001
+            found = getattr(fn, "func", None)
+            assert found is converter._match(seg), (name, seg.type)  # noqa: SLF001
+
+        def scan(converter: Any = converter, message: Any = message) -> None:
+            for seg in message:
+                converter._match(seg)  # noqa: SLF001
+
+        def dispatch(converter: Any = converter, message: Any = message) -> None:
+            for seg in message:
+                converter._find_fn(seg)  # noqa: SLF001
+
+        await bench.run(f"{name} 逐条匹配", args.segments, scan)
+        await bench.run(f"{name} 分派表", args.segments, dispatch)
+
+    for (src, src_bot), (dst, dst_bot) in itertools.product(bots.items(), repeat=2):
+        converter = get_converter(src_bot, dst_bot)
+        await bench.run(
+            f"{src} -> {dst} 转换",
+            args.segments,
+            lambda converter=converter, message=messages[src]: converter.convert(
+                message
+            ),
+        )
+    bench.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,446 @@
+# ruff: noqa: T201
+"""管道转发压测 — 离线测量消息转发的吞吐量与各阶段耗时分位数。
+
+源与目标均为 OneBot V11 Bot，API 调用由本地适配器直接应答，不建立连接；
+媒体文件与 COS 由本地 HTTP 服务替代，上传会真实读取并写入该服务。
+事件经 NoneBot 正常处理流程进入管道，按混合比例生成文本、提及、表情、图片、
+回复与合并转发消息段，统计以下阶段的耗时分位数：
+
+- dispatch: 事件处理（路由、转换、入队）
+- lookup: 路由表查询
+- convert: 消息转换（含嵌套的合并转发）
+- upload: 媒体下载并上传到本地 COS
+- send: 导出并调用目标 Bot 的发送 API
+- e2e: 事件开始处理到发送完成
+
+用法: uv run scripts/benchmarks/group_pipe_relay.py [--messages 2000]
+    [--mix text=6,at=1,face=1,image=1,reply=1,forward=1]
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import random
+import re
+import statistics
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+import anyio
+from _common import init_nonebot
+from anyio.streams.memory import MemoryObjectReceiveStream
+
+PLUGIN = "src.plugins.group_pipe"
+SRC_ID = "10000"
+DST_ID = "20000"
+MARKER = re.compile(r"\[bench:(\d+)\]")
+# 最小 PNG 文件头，用于文件类型识别
+PNG_HEAD = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01"
+    b"\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
+)
+
+if TYPE_CHECKING:
+    from nonebot.adapters.onebot.v11 import Bot
+
+
+class Recorder:
+    """按阶段记录耗时样本"""
+
+    def __init__(self, expected: int) -> None:
+        self.samples: defaultdict[str, list[float]] = defaultdict(list)
+        self.dispatched: dict[int, float] = {}
+        self.expected = expected
+        self.delivered = 0
+        self.last_delivery = 0.0
+        self.done = anyio.Event()
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def timed[**P, R](
+        self, stage: str, func: Callable[P, Awaitable[R]]
+    ) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    def deliver(self, text: str) -> None:
+        now = time.perf_counter()
+        for seq in map(int, MARKER.findall(text)):
+            if seq in self.dispatched:
+                self.delivered += 1
+                self.last_delivery = now
+                self.add("e2e", now - self.dispatched[seq])
+        if self.delivered >= self.expected:
+            self.done.set()
+
+    def report(self) -> None:
+        stages = ["dispatch", "lookup", "convert", "upload", "send", "e2e"]
+        print(
+            f"{"阶段":<12}{"次数":>8}{"p50 (ms)":>12}{"p90 (ms)":>12}"
+            f"{"p99 (ms)":>12}{"max (ms)":>12}"
+        )
+        for stage in stages:
+            if not (samples := self.samples.get(stage)):
+                continue
+            if len(samples) > 1:
+                q = statistics.quantiles(samples, n=100, method="inclusive")
+                p50, p90, p99 = q[49], q[89], q[98]
+            else:
+                p50 = p90 = p99 = samples[0]
+            print(
+                f"{stage:<12}{len(samples):>8}{p50 * 1000:>12.2f}"
+                f"{p90 * 1000:>12.2f}{p99 * 1000:>12.2f}"
+                f"{max(samples) * 1000:>12.2f}"
+            )
+
+
+class LocalServer:
+    """本地媒体与 COS 服务，支持 Range GET 与 PUT"""
+
+    def __init__(self, media_size: int, latency: float) -> None:
+        self.media = PNG_HEAD + b"\x00" * max(0, media_size - len(PNG_HEAD))
+        self.latency = latency
+        self.objects: dict[str, bytes] = {}
+        self.port = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> asyncio.Server:
+        server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while head := await reader.readuntil(b"\r\n\r\n"):
+                request_line, *lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = request_line.split(" ", 2)
+                headers = {
+                    k.strip().lower(): v.strip()
+                    for k, _, v in (line.partition(":") for line in lines if line)
+                }
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(self._respond(method, path, headers, body))
+                await writer.drain()
+        except asyncio.IncompleteReadError, ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _respond(
+        self, method: str, path: str, headers: dict[str, str], body: bytes
+    ) -> bytes:
+        if method == "PUT" and path.startswith("/cos/"):
+            self.objects[path] = body
+            return self._response(200, b"")
+
+        data = self.media if path.startswith("/media/") else self.objects.get(path)
+        if data is None:
+            return self._response(404, b"")
+
+        if match := re.fullmatch(r"bytes=(\d+)-(\d*)", headers.get("range", "")):
+            start = int(match[1])
+            end = min(int(match[2] or len(data) - 1), len(data) - 1)
+            content_range = f"bytes {start}-{end}/{len(data)}"
+            return self._response(206, data[start : end + 1], content_range)
+        return self._response(200, data)
+
+    @staticmethod
+    def _response(status: int, body: bytes, content_range: str | None = None) -> bytes:
+        lines = [
+            f"HTTP/1.1 {status} OK",
+            "Content-Type: application/octet-stream",
+            f"Content-Length: {len(body)}",
+        ]
+        if content_range:
+            lines.append(f"Content-Range: {content_range}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+def make_adapter(recorder: Recorder, send_latency: float) -> type:
+    from nonebot.adapters.onebot.v11 import Adapter, Message
+
+    message_ids = itertools.count(1)
+
+    class BenchAdapter(Adapter):
+        """本地应答 API 调用的 OneBot V11 适配器"""
+
+        async def _call_api(self, bot: Bot, api: str, **data: Any) -> Any:
+            match api:
+                case "send_group_msg" | "send_private_msg" | "send_msg":
+                    if send_latency:
+                        await anyio.sleep(send_latency)
+                    message = Message(data.get("message", ""))
+                    recorder.deliver(message.extract_plain_text())
+                    return {"message_id": next(message_ids)}
+                case "get_version_info":
+                    return {"app_name": "NapCat.Onebot", "app_version": "bench"}
+                case "get_login_info":
+                    return {"user_id": int(bot.self_id), "nickname": "bench"}
+                case "get_group_info":
+                    group_id = data["group_id"]
+                    return {
+                        "group_id": group_id,
+                        "group_name": f"群{group_id}",
+                        "member_count": 100,
+                        "max_member_count": 500,
+                    }
+                case "get_group_member_info" | "get_stranger_info":
+                    user_id = data["user_id"]
+                    return {
+                        "group_id": data.get("group_id", 0),
+                        "user_id": user_id,
+                        "nickname": f"用户{user_id}",
+                        "card": "",
+                        "sex": "unknown",
+                        "age": 0,
+                        "role": "member",
+                        "join_time": 0,
+                        "last_sent_time": 0,
+                        "level": "1",
+                        "title": "",
+                    }
+                case _:
+                    return {}
+
+    return BenchAdapter
+
+
+def segment_builders(
+    rng: random.Random, base_url: str, media_pool: int, forward_nodes: int
+) -> dict[str, Callable[[int], dict[str, Any]]]:
+    def text(_: int) -> dict[str, Any]:
+        words = rng.choices(["管道", "转发", "消息", "bench", "hello", "压测"], k=6)
+        return {"type": "text", "data": {"text": " ".join(words)}}
+
+    def image(_: int) -> dict[str, Any]:
+        n = rng.randrange(media_pool)
+        return {
+            "type": "image",
+            "data": {"file": f"{n:032x}.png", "url": f"{base_url}/media/{n}.png"},
+        }
+
+    def node(depth: int) -> dict[str, Any]:
+        message = [text(0)]
+        if depth > 0 and rng.random() < 0.3:
+            message.append(forward_seg(depth - 1))
+        user_id = rng.randrange(30000, 40000)
+        return {
+            "sender": {"user_id": user_id, "nickname": f"u{user_id}"},
+            "message": message,
+        }
+
+    def forward_seg(depth: int) -> dict[str, Any]:
+        return {
+            "type": "forward",
+            "data": {
+                "id": str(rng.randrange(10**12)),
+                "content": [node(depth) for _ in range(forward_nodes)],
+            },
+        }
+
+    return {
+        "text": text,
+        "at": lambda _: {"type": "at", "data": {"qq": str(rng.randrange(10**8))}},
+        "face": lambda _: {
+            "type": "face",
+            "data": {"id": str(rng.randrange(300)), "raw": {"faceText": "[表情]"}},
+        },
+        "image": image,
+        "reply": lambda seq: {
+            "type": "reply",
+            "data": {"id": str(rng.randrange(1, seq) if seq > 1 else 1)},
+        },
+        "forward": lambda _: forward_seg(1),
+    }
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000, help="消息数量")
+    parser.add_argument("--groups", type=int, default=20, help="源群组数量")
+    parser.add_argument("--fanout", type=int, default=1, help="每个源群组的管道数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发事件数")
+    parser.add_argument("--rate", type=float, default=0, help="事件速率，0 为不限")
+    parser.add_argument(
+        "--mix",
+        default="text=6,at=1,face=1,image=1,reply=1,forward=1",
+        help="消息段混合比例 name=weight，可选 text/at/face/image/reply/forward",
+    )
+    parser.add_argument("--segments", type=int, default=3, help="每条消息的消息段数")
+    parser.add_argument("--media-pool", type=int, default=50, help="不同图片数量")
+    parser.add_argument("--media-size", type=int, default=256 * 1024)
+    parser.add_argument("--forward-nodes", type=int, default=5)
+    parser.add_argument("--http-latency", type=float, default=0, help="本地服务延迟")
+    parser.add_argument("--send-latency", type=float, default=0, help="发送 API 延迟")
+    parser.add_argument("--send-rate", type=float, default=1e6, help="发送队列限速")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        alembic_startup_check=False,
+        cos={
+            "secret_id": "-",
+            "secret_key": "-",
+            "region": "-",
+            "bucket": "-",
+            "is_internal": False,
+        },
+        group_pipe={
+            "outbound": {
+                "rate": args.send_rate,
+                "burst": max(1, int(args.send_rate)),
+                "max_size": args.messages * args.fanout,
+                "coalesce_threshold": args.messages * args.fanout + 1,
+            }
+        },
+    )
+
+    import httpx
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Bot
+    from nonebot.message import handle_event
+    from nonebot_plugin_alconna import Target
+
+    from src.plugins.group_pipe import hooks
+    from src.plugins.group_pipe.adapters import onebot11
+    from src.plugins.group_pipe.database import create_pipe
+
+    recorder = Recorder(args.messages * args.fanout)
+    local = LocalServer(args.media_size, args.http_latency)
+    server = await local.start()
+
+    async def upload_local(source: Any, key: str, _ttl: int = 3600) -> str:
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            if isinstance(source, str):
+                data = (await client.get(source)).content
+            else:
+                data = bytes(source)
+            url = f"{local.base_url}/cos/{key}"
+            (await client.put(url, content=data)).raise_for_status()
+        recorder.add("upload", time.perf_counter() - start)
+        return url
+
+    onebot11.upload_cos = upload_local
+    hooks.route_pipes = recorder.timed("lookup", hooks.route_pipes)
+    onebot11.MessageConverter.convert = recorder.timed(
+        "convert", onebot11.MessageConverter.convert
+    )
+    onebot11.MessageSender.send = recorder.timed("send", onebot11.MessageSender.send)
+
+    driver = nonebot.get_driver()
+    await driver._lifespan.startup()  # noqa: SLF001
+    try:
+        adapter = make_adapter(recorder, args.send_latency)(driver)
+        src_bot, dst_bot = Bot(adapter, SRC_ID), Bot(adapter, DST_ID)
+        adapter.bot_connect(src_bot)
+        adapter.bot_connect(dst_bot)
+
+        rng = random.Random(args.seed)
+        groups = [100000 + i for i in range(args.groups)]
+        for group in groups:
+            listen = Target(str(group), self_id=SRC_ID, adapter=adapter.get_name())
+            for k in range(args.fanout):
+                target_id = str(200000 + group * args.fanout + k)
+                target = Target(target_id, self_id=DST_ID, adapter=adapter.get_name())
+                await create_pipe(listen, target)
+
+        mix = parse_mix(args.mix)
+        builders = segment_builders(
+            rng, local.base_url, args.media_pool, args.forward_nodes
+        )
+        names, weights = list(mix), list(mix.values())
+
+        def make_event(seq: int) -> Any:
+            segments = [{"type": "text", "data": {"text": f"[bench:{seq}] "}}]
+            segments.extend(
+                builders[name](seq)
+                for name in rng.choices(names, weights, k=args.segments)
+            )
+            user_id = rng.randrange(30000, 40000)
+            return adapter.json_to_event(
+                {
+                    "time": int(time.time()),
+                    "self_id": int(SRC_ID),
+                    "post_type": "message",
+                    "message_type": "group",
+                    "sub_type": "normal",
+                    "message_id": seq,
+                    "group_id": rng.choice(groups),
+                    "user_id": user_id,
+                    "message": segments,
+                    "raw_message": "",
+                    "font": 0,
+                    "sender": {"user_id": user_id, "nickname": f"u{user_id}"},
+                }
+            )
+
+        events = [(seq, make_event(seq)) for seq in range(1, args.messages + 1)]
+        send, receive = anyio.create_memory_object_stream[tuple[int, Any]](
+            args.concurrency
+        )
+
+        async def worker(stream: MemoryObjectReceiveStream[tuple[int, Any]]) -> None:
+            async with stream:
+                async for seq, event in stream:
+                    start = time.perf_counter()
+                    recorder.dispatched[seq] = start
+                    await handle_event(src_bot, event)
+                    recorder.add("dispatch", time.perf_counter() - start)
+
+        started = time.perf_counter()
+        async with anyio.create_task_group() as tg:
+            for _ in range(args.concurrency):
+                tg.start_soon(worker, receive.clone())
+            receive.close()
+            async with send:
+                for item in events:
+                    await send.send(item)
+                    if args.rate > 0:
+                        await anyio.sleep(1 / args.rate)
+
+        with anyio.move_on_after(args.timeout):
+            await recorder.done.wait()
+
+        if delivered := recorder.delivered:
+            elapsed = recorder.last_delivery - started
+            print(
+                f"送达 {delivered}/{recorder.expected} 条消息，用时 {elapsed:.2f} 秒，"
+                f"吞吐量 {delivered / elapsed:.1f} 条/秒"
+            )
+        recorder.report()
+    finally:
+        await driver._lifespan.shutdown()  # noqa: SLF001
+        server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
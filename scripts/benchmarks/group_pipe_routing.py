@@ -0,0 +1,103 @@
+# ruff: noqa: T201
+"""管道路由微基准 — 对比逐条消息查询数据库与查询内存路由表的开销。
+
+在 SQLite 中创建若干管道，模拟大量群组的消息依次查询监听当前群组的管道，
+输出每条消息的平均查询耗时，并校验两种方式结果一致。
+路由表未命中时预处理器直接返回，不再调用 get_session 获取会话信息。
+
+用法: uv run scripts/benchmarks/group_pipe_routing.py [--messages 20000]
+"""
+
+import argparse
+import asyncio
+import random
+from typing import TYPE_CHECKING
+
+from _common import StageBench, init_nonebot
+
+PLUGIN = "src.plugins.group_pipe"
+
+if TYPE_CHECKING:
+    from nonebot_plugin_alconna import Target
+
+
+def make_target(group: int) -> Target:
+    from nonebot_plugin_alconna import Target
+
+    return Target(str(group), self_id="10000", adapter="OneBot V11")
+
+
+async def setup(groups: int, pipes: int, seed: int) -> list[Target]:
+    from nonebot_plugin_orm import Model, get_session
+
+    from src.plugins.group_pipe.database import create_pipe
+
+    async with get_session() as session:
+        connection = await session.connection()
+        await connection.run_sync(Model.metadata.create_all)
+        await session.commit()
+
+    rng = random.Random(seed)
+    targets = [make_target(100000 + i) for i in range(groups)]
+    for listen, target in rng.sample(
+        [
+            (a, b)
+            for a in targets[: pipes + 1]
+            for b in targets[: pipes + 1]
+            if a is not b
+        ],
+        pipes,
+    ):
+        await create_pipe(listen, target)
+    return targets
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000, help="消息数量")
+    parser.add_argument("--groups", type=int, default=200, help="群组数量")
+    parser.add_argument("--pipes", type=int, default=10, help="管道数量")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    init_nonebot(
+        PLUGIN,
+        cos={
+            "secret_id": "-",
+            "secret_key": "-",
+            "region": "-",
+            "bucket": "-",
+            "is_internal": False,
+        },
+    )
+
+    from src.plugins.group_pipe.database import get_pipes, route_pipes
+
+    targets = await setup(args.groups, args.pipes, args.seed)
+    rng = random.Random(args.seed)
+    stream = [rng.choice(targets) for _ in range(args.messages)]
+
+    for target in targets:
+        expected = sorted(map(repr, await get_pipes(listen=target)))
+        assert sorted(map(repr, await route_pipes(target))) == expected
+
+    async def query_db() -> None:
+        for target in stream:
+            await get_pipes(listen=target)
+
+    async def query_routes() -> None:
+        for target in stream:
+            await route_pipes(target)
+
+    bench = StageBench(args.rounds, trace_memory=False)
+    await bench.run("数据库查询 (get_pipes)", args.messages, query_db)
+    await bench.run("路由表查询 (route_pipes)", args.messages, query_routes)
+    bench.report()
+
+    db, routes = (r.seconds / args.messages * 1e6 for r in bench.results)
+    print(f"每条消息: 数据库 {db:.1f} µs, 路由表 {routes:.2f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
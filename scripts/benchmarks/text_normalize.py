@@ -0,0 +1,127 @@
+# ruff: noqa: T201
+"""文本清理微基准 — 对比逐条编译的正则链与预编译、按触发字符跳过的实现。
+
+在合成的聊天消息上分别运行 clean_text / extract_emojis / 控制字符清理，
+输出耗时并校验两种实现结果一致。
+
+用法: uv run scripts/benchmarks/text_normalize.py [--messages 1000000]
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+
+from _common import StageBench
+
+# ── 旧实现 ───────────────────────────────────────────────
+
+
+def legacy_extract_emojis(text: str) -> list[str]:
+    emoji_pattern = re.compile(
+        "["
+        "\U0001f600-\U0001f64f"
+        "\U0001f300-\U0001f5ff"
+        "\U0001f680-\U0001f6ff"
+        "\U0001f1e0-\U0001f1ff"
+        "\U00002702-\U000027b0"
+        "\U0001f900-\U0001f9ff"
+        "\U0001fa00-\U0001fa6f"
+        "\U0001fa70-\U0001faff"
+        "\U00002600-\U000026ff"
+        "\U00002300-\U000023ff"
+        "]",
+        flags=re.UNICODE,
+    )
+    return emoji_pattern.findall(text)
+
+
+def legacy_clean_text(text: str) -> str:
+    if not text:
+        return ""
+    text = re.sub(r"\[回复\s+[^\]]*\]", "", text)
+    text = re.sub(r"@[^\n]*?(?=\s+[\u4e00-\u9fffa-zA-Z])", "", text)
+    text = re.sub(r"@[^\n]*$", "", text)
+    prev = None
+    while prev != text:
+        prev = text
+        text = re.sub(r"\[[^\[\]]*\]", "", text)
+    text = re.sub(r"https?://\S+", "", text)
+    text = re.sub(r"www\.\S+", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def legacy_strip_control_chars(text: str) -> str:
+    text = text.replace("\n", " ").replace("\r", " ")
+    return re.sub(r"[\x00-\x1f\x7f-\x9f]", "", text)
+
+
+# ── 合成消息 ─────────────────────────────────────────────
+
+_PLAIN = ["今天吃什么", "哈哈哈哈", "确实", "代码又报错了", "有一说一", "好耶", "ok"]
+_DECORATIONS = [
+    "[图片:abc.jpg]",
+    "[表情:微笑]",
+    "[回复 群友: 原消息]",
+    "@群友 ",
+    "https://example.com/a?b=c ",
+    "www.example.com ",
+    "😂",
+    "👍👍",
+    "\n",
+]
+
+
+def generate_messages(size: int, seed: int) -> list[str]:
+    """约七成为纯文本，其余混入图片、表情、回复、@、链接与换行。"""
+    rng = random.Random(seed)
+    messages: list[str] = []
+    for _ in range(size):
+        parts = rng.choices(_PLAIN, k=rng.randint(1, 4))
+        if rng.random() < 0.3:
+            parts.insert(
+                rng.randrange(len(parts) + 1),
+                "".join(rng.choices(_DECORATIONS, k=rng.randint(1, 3))),
+            )
+        messages.append(" ".join(parts))
+    return messages
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000, help="消息数量")
+    parser.add_argument("--rounds", type=int, default=3, help="测量轮数")
+    parser.add_argument("--seed", type=int, default=7685)
+    args = parser.parse_args()
+
+    from src.service.text import clean_text, extract_emojis, strip_control_chars
+
+    messages = generate_messages(args.messages, args.seed)
+    bench = StageBench(args.rounds, trace_memory=False)
+    size = len(messages)
+    mismatched: list[str] = []
+
+    for name, legacy, current in (
+        ("clean_text", legacy_clean_text, clean_text),
+        ("extract_emojis", legacy_extract_emojis, extract_emojis),
+        ("strip_control_chars", legacy_strip_control_chars, strip_control_chars),
+    ):
+        expected = await bench.run(
+            f"{name}: 旧", size, lambda f=legacy: list(map(f, messages))
+        )
+        actual = await bench.run(
+            f"{name}: 新", size, lambda f=current: list(map(f, messages))
+        )
+        if expected != actual:
+            mismatched.append(name)
+
+    bench.report()
+    if mismatched:
+        print(f"结果不一致: {", ".join(mismatched)}")
+        sys.exit(1)
+    print("结果一致")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
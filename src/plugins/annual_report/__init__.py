@@ -1,6 +1,7 @@
 from nonebot.plugin import PluginMetadata, inherit_supported_adapters
 
 from . import matcher as matcher
+from . import scheduler as scheduler
 from .config import Config
 
 __plugin_meta__ = PluginMetadata(
@@ -0,0 +1,419 @@
+"""月度预聚合 — 按群按月持久化可合并的分析中间结果。
+
+每个月保存一份过滤前的统计快照（消息数、小时分布、各项用户计数、
+高频词及其贡献者与样本、单字计数、emoji 频率），并记录已处理消息记录的
+最大 ID 作为水位线。生成年度报告时，未结束的月份只读取水位线之后的新记录，
+统计后合并进快照并保存；随后合并全年各月，再统一计算单字独立性、
+人均字数并过滤结果。缺失的月份在生成报告时补算，也可忽略已保存的结果整体重算。
+
+与一次性分析全年消息相比：
+- 新词发现与词组合并按月（增量更新时按批次）进行；
+- 回复与复读不跨月、不跨增量批次关联；
+- 每月只保留 max_words 个高频词，每个词保留前 max_contributors 个贡献者。
+
+KV 键设计：
+- 已知会话: annual_sessions
+  值: {scene_id: Session}
+- 月度聚合: annual_month_{scene_id}_{YYYY-MM}
+  值: MonthlyAggregate
+"""
+
+import contextlib
+import datetime as dt
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Self
+
+import anyio.to_thread
+import nonebot
+from nonebot import logger
+from nonebot.adapters import Bot
+from nonebot_plugin_uninfo import Session
+
+from src.service.kv import get_kv_store
+from src.workers.annual_report.shards import SingleCharCounts
+
+from .analyzer import ChatAnalyzer
+from .config import config
+from .db_converter import UTC8, fetch_range_input, month_range
+from .parallel import ShardRunner, reduce_partials
+from .schema import AnalyzerInput
+
+# ChatAnalyzer 中按用户计数的统计项
+USER_COUNTERS = (
+    "user_msg_count",
+    "user_char_count",
+    "user_image_count",
+    "user_forward_count",
+    "user_reply_count",
+    "user_replied_count",
+    "user_at_count",
+    "user_ated_count",
+    "user_emoji_count",
+    "user_link_count",
+    "user_night_count",
+    "user_morning_count",
+    "user_repeat_count",
+)
+
+
+def _add_counts[K](target: dict[K, int], other: dict[K, int]) -> None:
+    for key, count in other.items():
+        target[key] = target.get(key, 0) + count
+
+
+@dataclass(slots=True)
+class MonthlyAggregate:
+    """单个群单个月份的可合并统计
+
+    用户 UIN 统一保存为字符串；single_chars 的值为 (总次数, 单字消息次数, 边界次数)。
+    watermark 为已统计的消息记录的最大 ID。
+    """
+
+    month: str
+    computed_at: float = field(default_factory=time.time)
+    watermark: int = 0
+    message_count: int = 0
+    names: dict[str, str] = field(default_factory=dict)
+    hour_distribution: dict[int, int] = field(default_factory=dict)
+    user_counts: dict[str, dict[str, int]] = field(default_factory=dict)
+    word_freq: dict[str, int] = field(default_factory=dict)
+    word_contributors: dict[str, dict[str, int]] = field(default_factory=dict)
+    word_samples: dict[str, list[str]] = field(default_factory=dict)
+    single_chars: dict[str, tuple[int, int, int]] = field(default_factory=dict)
+    emoji_freq: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_analyzer(
+        cls, analyzer: ChatAnalyzer, month: str, watermark: int = 0
+    ) -> Self:
+        """从执行过 collect() 的分析器生成快照"""
+        top_words = analyzer.word_freq.most_common(config.aggregate.max_words)
+        sample_count = config.analysis.sample_count
+        counts = analyzer.single_char_counts
+
+        def sample(samples: list[str]) -> list[str]:
+            if len(samples) > sample_count:
+                return random.sample(samples, sample_count)
+            return list(samples)
+
+        return cls(
+            month=month,
+            watermark=watermark,
+            message_count=analyzer.message_count,
+            names={str(uin): name for uin, name in analyzer.uin_to_name.items()},
+            hour_distribution=dict(analyzer.hour_distribution),
+            user_counts={
+                name: {str(uin): c for uin, c in getattr(analyzer, name).items()}
+                for name in USER_COUNTERS
+            },
+            word_freq=dict(top_words),
+            word_contributors={
+                word: {
+                    str(uin): c
+                    for uin, c in analyzer.word_contributors[word].most_common(
+                        config.aggregate.max_contributors
+                    )
+                }
+                for word, _ in top_words
+            },
+            word_samples={
+                word: sample(analyzer.word_samples[word])
+                for word, _ in top_words
+                if word in analyzer.word_samples
+            },
+            single_chars={
+                char: (total, counts.solo[char], counts.boundary[char])
+                for char, total in counts.total.items()
+            },
+            emoji_freq=dict(analyzer.emoji_freq),
+        )
+
+    def merge(self, other: Self) -> None:
+        """合并另一份聚合，应按时间顺序调用以保留最新的昵称"""
+        self.watermark = max(self.watermark, other.watermark)
+        self.message_count += other.message_count
+        self.names.update(other.names)
+        _add_counts(self.hour_distribution, other.hour_distribution)
+        for name, counts in other.user_counts.items():
+            _add_counts(self.user_counts.setdefault(name, {}), counts)
+        _add_counts(self.word_freq, other.word_freq)
+        for word, contributors in other.word_contributors.items():
+            _add_counts(self.word_contributors.setdefault(word, {}), contributors)
+        for word, samples in other.word_samples.items():
+            self.word_samples.setdefault(word, []).extend(samples)
+        for char, (total, solo, boundary) in other.single_chars.items():
+            t, s, b = self.single_chars.get(char, (0, 0, 0))
+            self.single_chars[char] = (t + total, s + solo, b + boundary)
+        _add_counts(self.emoji_freq, other.emoji_freq)
+
+    def trim(self) -> None:
+        """按配置截断高频词、贡献者与样本，避免多次增量合并后无限增长"""
+        max_words = config.aggregate.max_words
+        max_contributors = config.aggregate.max_contributors
+        sample_count = config.analysis.sample_count
+
+        if len(self.word_freq) > max_words:
+            self.word_freq = dict(Counter(self.word_freq).most_common(max_words))
+            self.word_contributors = {
+                word: contributors
+                for word, contributors in self.word_contributors.items()
+                if word in self.word_freq
+            }
+            self.word_samples = {
+                word: samples
+                for word, samples in self.word_samples.items()
+                if word in self.word_freq
+            }
+        for word, contributors in self.word_contributors.items():
+            if len(contributors) > max_contributors:
+                self.word_contributors[word] = dict(
+                    Counter(contributors).most_common(max_contributors)
+                )
+        for word, samples in self.word_samples.items():
+            if len(samples) > sample_count:
+                self.word_samples[word] = random.sample(samples, sample_count)
+
+    def to_analyzer(self, chat_name: str) -> ChatAnalyzer:
+        """还原为分析器，调用 finalize() 后即可导出报告"""
+        analyzer = ChatAnalyzer(AnalyzerInput(messages=[], chatName=chat_name))
+        analyzer.message_count = self.message_count
+        analyzer.uin_to_name = dict(self.names)
+        analyzer.hour_distribution = Counter(self.hour_distribution)
+        for name in USER_COUNTERS:
+            setattr(analyzer, name, Counter(self.user_counts.get(name, {})))
+        analyzer.word_freq = Counter(self.word_freq)
+        analyzer.word_contributors = defaultdict(
+            Counter,
+            {
+                word: Counter[str | int](contributors)
+                for word, contributors in self.word_contributors.items()
+            },
+        )
+        analyzer.word_samples = defaultdict(
+            list, {word: list(samples) for word, samples in self.word_samples.items()}
+        )
+        analyzer.single_char_counts = SingleCharCounts(
+            Counter({char: c[0] for char, c in self.single_chars.items()}),
+            Counter({char: c[1] for char, c in self.single_chars.items() if c[1]}),
+            Counter({char: c[2] for char, c in self.single_chars.items() if c[2]}),
+        )
+        analyzer.emoji_freq = Counter(self.emoji_freq)
+        return analyzer
+
+
+class AggregateStore:
+    """月度聚合持久化仓储"""
+
+    SESSIONS_KEY = "annual_sessions"
+    MONTH_PREFIX = "annual_month"
+
+    def __init__(self) -> None:
+        self._raw = get_kv_store()
+        self._month_store = self._raw.with_type(MonthlyAggregate)
+        self._session_store = self._raw.with_type(dict[str, Session])
+
+    @staticmethod
+    def _month_key(scene_id: str, month: str) -> str:
+        return f"{AggregateStore.MONTH_PREFIX}_{scene_id}_{month}"
+
+    async def sessions(self) -> dict[str, Session]:
+        """需要定时聚合的会话"""
+        try:
+            return await self._session_store.read(self.SESSIONS_KEY)
+        except KeyError:
+            return {}
+        except Exception as e:
+            logger.error(f"读取会话列表失败 (Key: {self.SESSIONS_KEY}): {e}")
+            return {}
+
+    async def remember(self, session: Session) -> None:
+        """记录生成过年度报告的会话，之后由定时任务按月聚合"""
+        sessions = await self.sessions()
+        if session.scene.id in sessions:
+            return
+        sessions[session.scene.id] = session
+        try:
+            await self._session_store.write(self.SESSIONS_KEY, sessions)
+        except Exception as e:
+            logger.error(f"保存会话列表失败 (Key: {self.SESSIONS_KEY}): {e}")
+
+    async def load(self, scene_id: str, month: str) -> MonthlyAggregate | None:
+        key = self._month_key(scene_id, month)
+        try:
+            return await self._month_store.read(key)
+        except KeyError:
+            return None
+        except Exception as e:
+            logger.error(f"读取月度聚合失败 (Key: {key}): {e}")
+            return None
+
+    async def save(self, scene_id: str, aggregate: MonthlyAggregate) -> None:
+        key = self._month_key(scene_id, aggregate.month)
+        try:
+            await self._month_store.write(key, aggregate)
+        except Exception as e:
+            logger.error(f"保存月度聚合失败 (Key: {key}): {e}")
+
+
+aggregate_store = AggregateStore()
+
+
+def _collect(
+    data: AnalyzerInput,
+    month: str,
+    watermark: int,
+    runner: ShardRunner | None,
+) -> MonthlyAggregate:
+    analyzer = ChatAnalyzer(data)
+    if analyzer.messages:
+        analyzer.collect(runner=runner)
+    return MonthlyAggregate.from_analyzer(analyzer, month, watermark)
+
+
+@contextlib.asynccontextmanager
+async def _open_runner(workers: int, sessions: int) -> AsyncIterator[ShardRunner]:
+    """在后台线程中创建与关闭分片执行器"""
+    runner = ShardRunner(workers, sessions=sessions)
+    await anyio.to_thread.run_sync(runner.__enter__)
+    try:
+        yield runner
+    finally:
+        await anyio.to_thread.run_sync(runner.__exit__, None, None, None)
+
+
+async def compute_month(
+    session: Session,
+    year: int,
+    month: int,
+    bot: Bot | None = None,
+    after_id: int = 0,
+    runner: ShardRunner | None = None,
+) -> MonthlyAggregate:
+    """从消息记录计算指定月份的聚合，after_id 不为 0 时只统计之后的记录"""
+    time_start, time_end = month_range(year, month)
+    data, watermark = await fetch_range_input(
+        session, time_start, time_end, bot, after_id
+    )
+    return await anyio.to_thread.run_sync(
+        _collect, data, f"{year}-{month:02d}", watermark, runner
+    )
+
+
+async def update_month(
+    session: Session,
+    year: int,
+    month: int,
+    bot: Bot | None = None,
+    *,
+    rebuild: bool = False,
+    runner: ShardRunner | None = None,
+) -> MonthlyAggregate:
+    """返回指定月份的最新聚合并保存
+
+    在月末之后计算的聚合视为完整，直接返回；否则只统计水位线之后的新记录并合并。
+
+    Args:
+        session: 群聊会话
+        year: 年份
+        month: 月份
+        bot: 用于反序列化消息的 Bot，默认使用当前事件的 Bot
+        rebuild: 忽略已保存的聚合，从消息记录重新计算
+        runner: 共用的分片执行器，默认为本月单独创建
+    """
+    scene_id = session.scene.id
+    key = f"{year}-{month:02d}"
+    _, time_end = month_range(year, month)
+    complete_at = time_end.timestamp()
+
+    aggregate = None if rebuild else await aggregate_store.load(scene_id, key)
+    if aggregate is not None and aggregate.computed_at >= complete_at:
+        return aggregate
+
+    after_id = aggregate.watermark if aggregate is not None else 0
+    delta = await compute_month(session, year, month, bot, after_id, runner)
+    if aggregate is None:
+        aggregate = delta
+        logger.info(f"📦 已聚合 {key}: {aggregate.message_count} 条消息")
+    elif delta.message_count or delta.computed_at >= complete_at:
+        aggregate.merge(delta)
+        aggregate.trim()
+        aggregate.computed_at = delta.computed_at
+        logger.info(
+            f"📦 已增量更新 {key}: 新增 {delta.message_count} 条消息, "
+            f"水位线 {aggregate.watermark}"
+        )
+    else:
+        return aggregate
+
+    await aggregate_store.save(scene_id, aggregate)
+    return aggregate
+
+
+async def build_report_analyzer(
+    session: Session,
+    year: int | None = None,
+    *,
+    rebuild: bool = False,
+) -> ChatAnalyzer:
+    """增量更新并合并各月聚合，返回已完成过滤的分析器
+
+    Args:
+        session: 群聊会话
+        year: 年份，默认为当前年份
+        rebuild: 忽略已保存的月度聚合，全部从消息记录重算
+    """
+    now = dt.datetime.now(UTC8)
+    year = year or now.year
+    await aggregate_store.remember(session)
+
+    months = [m for m in range(1, 13) if (year, m) <= (now.year, now.month)]
+    aggregates: dict[int, MonthlyAggregate] = {}
+
+    # 各月份共用同一组子进程并同时计算，同时读入内存的月份数不超过进程数；
+    # 消息较少、在当前进程计算的月份另受 LOCAL_MAX_SESSIONS 限制
+    configured = config.analysis.workers
+    workers = min(configured if configured > 0 else os.cpu_count() or 1, len(months))
+    limiter = anyio.CapacityLimiter(max(1, workers))
+
+    async def update(month: int) -> None:
+        async with limiter:
+            aggregates[month] = await update_month(
+                session, year, month, rebuild=rebuild, runner=runner
+            )
+
+    async with (
+        _open_runner(workers, sessions=workers) as runner,
+        anyio.create_task_group() as tg,
+    ):
+        for month in months:
+            tg.start_soon(update, month)
+
+    merged = reduce_partials(
+        MonthlyAggregate(month=str(year)), (aggregates[m] for m in months)
+    )
+    analyzer = merged.to_analyzer(session.scene.name or session.id)
+    await anyio.to_thread.run_sync(analyzer.finalize)
+    return analyzer
+
+
+async def aggregate_previous_month() -> None:
+    """定时任务 — 为已知会话聚合上一个自然月"""
+    now = dt.datetime.now(UTC8)
+    year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+
+    for scene_id, session in (await aggregate_store.sessions()).items():
+        try:
+            bot = nonebot.get_bot(session.self_id)
+            aggregate = await update_month(session, year, month, bot)
+        except Exception as e:
+            logger.opt(colors=True).error(f"月度聚合失败 ({scene_id}): {e}")
+        else:
+            logger.opt(colors=True).info(
+                f"月度聚合完成: <g>{session.scene.name or scene_id}</> "
+                f"{aggregate.month} ({aggregate.message_count} 条)"
+            )
@@ -7,26 +7,35 @@ QQ 群年度热词分析器
 原项目版权：Copyright (c) 2025 ZiHuixi
 """
 
-import math
 import random
 import re
 import string
+import time
 from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
 from typing import Any
 
-import jieba
 from nonebot import logger
 
+from src.service.text import clean_text, extract_emojis, is_emoji
+from src.workers.annual_report.newword import LevelCounts, NewWordDiscovery
+from src.workers.annual_report.shards import (
+    BigramCounts,
+    Shard,
+    SingleCharCounts,
+    TokenCounts,
+    count_level_stats,
+    count_single_char_stats,
+    count_tokens,
+    segment,
+)
+from src.workers.annual_report.sketch import SketchSpec
+
 from .config import config
+from .parallel import ShardRunner, ShardSession, build_shards, resolve_workers
 from .schema import AnalyzerInput, Message
-from .utils import (
-    analyze_single_chars,
-    calculate_entropy,
-    clean_text,
-    extract_emojis,
-    is_emoji,
-    parse_timestamp,
-)
+from .utils import parse_timestamp, summarize_single_chars
 
 PUNCTUATION = string.punctuation + "，。！？；：、''（）【】"
 
@@ -42,6 +51,7 @@ class ChatAnalyzer:
         """
         self.data = data
         self.messages = data.messages
+        self.message_count: int = len(self.messages)
         self.chat_name: str = (
             data.chatName
             or (data.chatInfo.name if data.chatInfo else None)
@@ -78,14 +88,36 @@ class ChatAnalyzer:
         # 时间分布
         self.hour_distribution: Counter[int] = Counter()
 
+        # emoji 字符频率
+        self.emoji_freq: Counter[str] = Counter()
+
         # 新词发现和合并
         self.discovered_words: set[str] = set()
         self.merged_words: dict[str, tuple[str, str, int, float]] = {}
 
         # 单字统计
+        self.single_char_counts = SingleCharCounts()
         self.single_char_stats: dict[str, tuple[int, float, float]] = {}
         self.cleaned_texts: list[str] = []
 
+        # 逐条消息的清理结果（机器人消息为 None），与 messages 一一对应
+        self.cleaned: list[str | None] = []
+        # 各阶段耗时（秒）
+        self.stage_timings: dict[str, float] = {}
+
+        # 并行分析：按月分片，分析期间新增的 jieba 用户词按顺序同步到各进程
+        self.shards: list[Shard] = []
+        self.user_words: list[tuple[str, int]] = []
+        self._merges: dict[tuple[str, str], str] = {}
+        # 启用近似计数时词频与词对频率的内存上限
+        self._sketch = (
+            SketchSpec.from_error(
+                config.sketch.capacity, config.sketch.epsilon, config.sketch.delta
+            )
+            if config.sketch.enabled
+            else None
+        )
+
         self._build_mappings()
 
     def _is_bot_message(self, msg: Message) -> bool:
@@ -160,52 +192,111 @@ class ChatAnalyzer:
         """
         return self.uin_to_name.get(uin, f"未知用户({uin})")
 
-    def analyze(self) -> None:
-        """执行完整分析流程"""
+    def analyze(self, workers: int | None = None) -> None:
+        """执行完整分析流程
+
+        Args:
+            workers: 并行分析进程数，默认使用配置值
+        """
+        start = time.perf_counter()
+        self.collect(workers)
+        self.finalize()
+        logger.info(f"✅ 完成! 耗时 {time.perf_counter() - start:.2f}s")
+
+    def collect(
+        self,
+        workers: int | None = None,
+        runner: ShardRunner | None = None,
+    ) -> None:
+        """执行过滤前的全部统计，结果可按月快照后合并（见 aggregate 模块）
+
+        Args:
+            workers: 并行分析进程数，默认使用配置值
+            runner: 共用的分片执行器，按月分析时由调用方创建并在各月份间复用
+        """
         logger.info(f"📊 开始分析: {self.chat_name}")
         logger.info(f"📝 消息数: {len(self.messages)}")
 
-        logger.info("\n🧹 预处理文本...")
-        self._preprocess_texts()
+        with self._stage("🧹", "预处理文本"):
+            self._preprocess_texts()
+
+        # 共用执行器时分片数可能少于进程数，其余进程留给同时进行的其他分析
+        workers = resolve_workers(
+            config.analysis.workers if workers is None else workers,
+            len(self.cleaned_texts),
+            len(self.shards) if runner is None else runner.workers,
+        )
+        logger.info(
+            f"⚙️ 分片: {len(self.shards)} 个, "
+            f"进程数: {max(1, min(workers, len(self.shards)))}"
+        )
+
+        with ExitStack() as stack:
+            if runner is None:
+                runner = stack.enter_context(ShardRunner(workers))
+            session = stack.enter_context(runner.session(local=workers <= 1))
 
-        logger.info("🔤 分析单字独立性...")
-        self.single_char_stats = analyze_single_chars(self.cleaned_texts)
+            with self._stage("🔤", "分析单字独立性"):
+                self._analyze_single_chars(session)
 
-        logger.info("🔍 新词发现...")
-        self._discover_new_words()
+            with self._stage("🔍", "新词发现"):
+                self._discover_new_words(session)
 
-        logger.info("🔗 词组合并...")
-        self._merge_word_pairs()
+            with self._stage("🔗", "分词与词组合并"):
+                self._segment_and_merge(session)
 
-        logger.info("📈 分词统计...")
-        self._tokenize_and_count()
+            with self._stage("📈", "词频统计"):
+                self._tokenize_and_count(session)
 
-        logger.info("🎮 趣味统计...")
-        self._fun_statistics()
+        with self._stage("🎮", "趣味统计"):
+            self._fun_statistics()
 
-        logger.info("🧹 过滤整理...")
-        self._filter_results()
+    def finalize(self) -> None:
+        """根据单字计数计算独立性与人均字数，并过滤整理结果"""
+        self.single_char_stats = summarize_single_chars(
+            self.single_char_counts.total,
+            self.single_char_counts.solo,
+            self.single_char_counts.boundary,
+        )
+        self._compute_char_per_msg()
+
+        with self._stage("🧹", "过滤整理"):
+            self._filter_results()
 
-        logger.info("✅ 完成!")
+    @contextmanager
+    def _stage(self, icon: str, name: str) -> Iterator[None]:
+        """记录并输出分析阶段耗时"""
+        logger.info(f"{icon} {name}...")
+        start = time.perf_counter()
+        yield
+        self.stage_timings[name] = elapsed = time.perf_counter() - start
+        logger.info(f"   {name}耗时 {elapsed:.2f}s")
 
     def _preprocess_texts(self) -> None:
         """预处理所有文本"""
         skipped: int = 0
         bot_filtered: int = 0
+        cleaned_messages: list[tuple[str, str | int, str]] = []
 
         for msg in self.messages:
             if self._is_bot_message(msg):
+                self.cleaned.append(None)
                 bot_filtered += 1
                 continue
 
             text: str = msg.content.text
             cleaned: str = clean_text(text)
+            self.cleaned.append(cleaned)
 
             if cleaned and len(cleaned) >= 1:
                 self.cleaned_texts.append(cleaned)
+                # 时间戳以 YYYY-MM 开头，前 7 位即月份
+                cleaned_messages.append((msg.timestamp[:7], msg.sender.uin, cleaned))
             elif text:
                 skipped += 1
 
+        self.shards = build_shards(cleaned_messages)
+
         if config.filter.filter_bot_messages and bot_filtered > 0:
             logger.info(
                 f"   有效文本: {len(self.cleaned_texts)} 条, "
@@ -216,106 +307,51 @@ class ChatAnalyzer:
                 f"   有效文本: {len(self.cleaned_texts)} 条, 跳过: {skipped} 条"
             )
 
-    def _discover_new_words(self) -> None:
+    def _analyze_single_chars(self, session: ShardSession) -> None:
+        """单字独立性"""
+        self.single_char_counts = session.reduce(
+            count_single_char_stats, self.shards, SingleCharCounts()
+        )
+
+    def _discover_new_words(self, session: ShardSession) -> None:
         """新词发现"""
-        ngram_freq: Counter[str] = Counter()
-        left_neighbors: defaultdict[str, Counter[str]] = defaultdict(Counter)
-        right_neighbors: defaultdict[str, Counter[str]] = defaultdict(Counter)
-        total_chars: int = 0
-
-        for text in self.cleaned_texts:
-            sentences: list[str] = re.split(
-                '[，。！？、；：""（）\\s\\n\\r,.!?()\\[\\]]', text
+        engine = NewWordDiscovery(
+            min_freq=config.new_word_discovery.new_word_min_freq,
+            entropy_threshold=config.new_word_discovery.entropy_threshold,
+            pmi_threshold=config.new_word_discovery.pmi_threshold,
+        )
+        self.discovered_words = engine.discover(
+            lambda n, frequent, candidates: session.reduce(
+                count_level_stats,
+                self.shards,
+                LevelCounts(),
+                n=n,
+                frequent=frequent,
+                candidates=candidates,
             )
-
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) < 2:
-                    continue
-
-                total_chars += len(sentence)
-
-                for n in range(2, min(6, len(sentence) + 1)):
-                    for i in range(len(sentence) - n + 1):
-                        ngram: str = sentence[i : i + n]
-
-                        # 跳过纯数字/符号/纯英文
-                        if re.match(r"^[\d\s\W]+$", ngram) or re.match(
-                            r"^[a-zA-Z]+$", ngram
-                        ):
-                            continue
-
-                        ngram_freq[ngram] += 1
-
-                        if i > 0:
-                            left_neighbors[ngram][sentence[i - 1]] += 1
-                        else:
-                            left_neighbors[ngram]["<BOS>"] += 1
-
-                        if i + n < len(sentence):
-                            right_neighbors[ngram][sentence[i + n]] += 1
-                        else:
-                            right_neighbors[ngram]["<EOS>"] += 1
-
-        # 筛选新词
-        for word, freq in ngram_freq.items():
-            if freq < config.new_word_discovery.new_word_min_freq:
-                continue
-
-            # 邻接熵
-            left_ent: float = calculate_entropy(left_neighbors[word])
-            right_ent: float = calculate_entropy(right_neighbors[word])
-            min_ent: float = min(left_ent, right_ent)
-
-            if min_ent < config.new_word_discovery.entropy_threshold:
-                continue
-
-            # PMI（内部凝聚度）
-            min_pmi: float = float("inf")
-            for i in range(1, len(word)):
-                left_freq: int = ngram_freq.get(word[:i], 0)
-                right_freq: int = ngram_freq.get(word[i:], 0)
-
-                if left_freq > 0 and right_freq > 0:
-                    pmi: float = math.log2(
-                        (freq * total_chars) / (left_freq * right_freq + 1e-10)
-                    )
-                    min_pmi = min(min_pmi, pmi)
-
-            if min_pmi == float("inf"):
-                min_pmi = 0
-
-            if min_pmi < config.new_word_discovery.pmi_threshold:
-                continue
-
-            self.discovered_words.add(word)
+        )
 
         # 添加到 jieba 词典
-        for word in self.discovered_words:
-            jieba.add_word(word, freq=1000)
+        self.user_words.extend((word, 1000) for word in self.discovered_words)
 
         logger.info(f"   发现 {len(self.discovered_words)} 个新词")
 
-    def _merge_word_pairs(self) -> None:
-        """词组合并"""
-        bigram_counter: Counter[tuple[str, str]] = Counter()
-        word_right_counter: Counter[str] = Counter()
-
-        for text in self.cleaned_texts:
-            words: list[str] = [w for w in jieba.cut(text) if w.strip()]
-
-            for i in range(len(words) - 1):
-                w1: str = words[i].strip()
-                w2: str = words[i + 1].strip()
-
-                if not w1 or not w2:
-                    continue
+    def _segment_and_merge(self, session: ShardSession) -> None:
+        """分词与词组合并
 
-                if re.match(r"^[\d\W]+$", w1) or re.match(r"^[\d\W]+$", w2):
-                    continue
-
-                bigram_counter[(w1, w2)] += 1
-                word_right_counter[w1] += 1
+        每条消息只分词一次，结果缓存在执行分词的进程中供词频统计使用；
+        合并词组直接作用于缓存的分词结果，无需再次分词。
+        """
+        bigrams = session.reduce(
+            segment,
+            self.shards,
+            BigramCounts(sketch=self._sketch.create() if self._sketch else None),
+            session=session.id,
+            user_words=tuple(self.user_words),
+            sketch=self._sketch,
+        )
+        bigram_counter = bigrams.pairs
+        word_right_counter = bigrams.right
 
         # 找出应该合并的词对
         for (w1, w2), count in bigram_counter.items():
@@ -331,7 +367,7 @@ class ChatAnalyzer:
                 prob: float = count / word_right_counter[w1]
                 if prob >= config.word_merge.merge_min_prob:
                     self.merged_words[merged] = (w1, w2, count, prob)
-                    jieba.add_word(merged, freq=count * 1000)
+                    self._merges[(w1, w2)] = merged
 
         logger.info(f"   合并 {len(self.merged_words)} 个词组")
 
@@ -343,46 +379,32 @@ class ChatAnalyzer:
             for merged, (w1, w2, cnt, prob) in sorted_merges:
                 logger.info(f"      {merged}: {w1}+{w2} ({cnt}次, {prob:.0%})")
 
-    def _tokenize_and_count(self) -> None:
+    def _tokenize_and_count(self, session: ShardSession) -> None:
         """分词统计"""
-        for msg in self.messages:
-            if self._is_bot_message(msg):
-                continue
-
-            sender_uin: str | int = msg.sender.uin
-            text: str = msg.content.text
-            cleaned: str = clean_text(text)
-
-            if not cleaned:
-                continue
-
-            words: list[str] = list(jieba.cut(cleaned))
-            emojis: list[str] = extract_emojis(cleaned)
-            words = [w for w in words if not is_emoji(w)]
-            all_tokens: list[str] = words + emojis
-
-            for word in all_tokens:
-                word = word.strip()
-                if not word:
-                    continue
-
-                # 跳过纯数字/符号
-                if re.match(r"^[\d\W]+$", word) and not is_emoji(word):
-                    continue
-
-                self.word_freq[word] += 1
-                self.word_contributors[word][sender_uin] += 1
-
-                if len(self.word_samples[word]) < config.analysis.sample_count * 3:
-                    self.word_samples[word].append(cleaned)
+        tokens = session.reduce(
+            count_tokens,
+            self.shards,
+            TokenCounts(
+                config.analysis.sample_count * 3,
+                sketch=self._sketch.create() if self._sketch else None,
+            ),
+            session=session.id,
+            user_words=tuple(self.user_words),
+            merges=self._merges,
+            sample_limit=config.analysis.sample_count * 3,
+            sketch=self._sketch,
+        )
+        self.word_freq = tokens.freq
+        self.word_contributors = tokens.contributors
+        self.word_samples = tokens.samples
 
     def _fun_statistics(self) -> None:
         """趣味统计"""
         prev_clean: str | None = None
         prev_sender: str | int | None = None
 
-        for msg in self.messages:
-            if self._is_bot_message(msg):
+        for msg, clean in zip(self.messages, self.cleaned, strict=True):
+            if clean is None:
                 continue
 
             sender_uin: str | int = msg.sender.uin
@@ -390,7 +412,6 @@ class ChatAnalyzer:
             timestamp: str = msg.timestamp
 
             self.user_msg_count[sender_uin] += 1
-            clean: str = clean_text(text)
             self.user_char_count[sender_uin] += len(clean)
 
             # 图片检测（排除 GIF）
@@ -426,6 +447,7 @@ class ChatAnalyzer:
 
             if emoji_count > 0:
                 self.user_emoji_count[sender_uin] += emoji_count
+            self.emoji_freq.update(emojis)
 
             # 链接统计
             if "[链接:" in text or re.search(r"https?://", text):
@@ -452,7 +474,9 @@ class ChatAnalyzer:
             prev_clean = clean or prev_clean
             prev_sender = sender_uin
 
-        # 计算人均字数
+    def _compute_char_per_msg(self) -> None:
+        """计算人均字数"""
+        self.user_char_per_msg = {}
         for uin in self.user_msg_count:
             msg_count: int = self.user_msg_count[uin]
             char_count: int = self.user_char_count[uin]
@@ -604,7 +628,7 @@ class ChatAnalyzer:
         """
         result: dict[str, Any] = {
             "chatName": self.chat_name,
-            "messageCount": len(self.messages),
+            "messageCount": self.message_count,
             "topWords": [
                 {
                     "word": word,
@@ -14,6 +14,7 @@ class AnalysisConfig(BaseModel):
     min_freq_threshold: int = Field(default=1, description="词频过滤阈值")
     contributor_top_n: int = Field(default=10, description="显示贡献者数量")
     sample_count: int = Field(default=10, description="每个词的样本数")
+    workers: int = Field(default=0, description="并行分析进程数，0 为自动，1 为单进程")
 
 
 class NewWordDiscoveryConfig(BaseModel):
@@ -61,12 +62,38 @@ class TimeConfig(BaseModel):
     )
 
 
+class SketchConfig(BaseModel):
+    """近似计数配置"""
+
+    enabled: bool = Field(default=False, description="是否使用近似计数统计词频与词对")
+    capacity: int = Field(default=50000, description="保留的高频词/词对数量")
+    epsilon: float = Field(default=1e-4, description="Count-Min Sketch 相对误差")
+    delta: float = Field(default=0.01, description="误差超出 epsilon 的概率")
+
+
+class AggregateConfig(BaseModel):
+    """月度预聚合配置"""
+
+    enabled: bool = Field(default=True, description="是否使用月度预聚合生成报告")
+    max_words: int = Field(default=5000, description="每月保留的高频词数量")
+    max_contributors: int = Field(default=30, description="每个词保留的贡献者数量")
+    schedule_day: int = Field(default=1, description="每月聚合上月数据的日期")
+    schedule_hour: int = Field(default=4, description="每月聚合上月数据的小时")
+
+
 class OpenAIConfig(BaseModel):
     """OpenAI API 配置"""
 
     api_key: str = Field(description="API Key")
     base_url: str = Field(description="API 基础 URL")
     model: str = Field(description="模型名称")
+    batch_token_budget: int = Field(
+        default=1500, description="每次锐评请求中热词信息的 token 预算"
+    )
+    batch_concurrency: int = Field(default=2, description="锐评请求最大并发数")
+    comment_cache_ttl: int = Field(
+        default=30 * 24 * 3600, description="锐评缓存时间（秒）"
+    )
 
 
 class PluginConfig(BaseModel):
@@ -86,6 +113,10 @@ class PluginConfig(BaseModel):
     filter: FilterConfig = Field(default_factory=FilterConfig)
     # 时间配置
     time: TimeConfig = Field(default_factory=TimeConfig)
+    # 近似计数配置
+    sketch: SketchConfig = Field(default_factory=SketchConfig)
+    # 月度预聚合配置
+    aggregate: AggregateConfig = Field(default_factory=AggregateConfig)
     # OpenAI 配置
     openai: OpenAIConfig = Field()
 
@@ -1,13 +1,16 @@
 import datetime as dt
+from collections.abc import AsyncIterator
+from typing import Any, NamedTuple
 
+from nonebot.adapters import Bot
 from nonebot.matcher import current_bot
 from nonebot_plugin_alconna import At, Image, Reply, UniMessage
-from nonebot_plugin_chatrecorder import MessageRecord, get_message_records
+from nonebot_plugin_chatrecorder import MessageRecord, filter_statement
 from nonebot_plugin_chatrecorder.message import deserialize_message
 from nonebot_plugin_orm import get_session
 from nonebot_plugin_uninfo import Session
-from nonebot_plugin_uninfo.orm import SessionModel, UserModel
-from sqlalchemy import select
+from nonebot_plugin_uninfo.orm import BotModel, SceneModel, SessionModel, UserModel
+from sqlalchemy import and_, or_, select
 
 from .schema import (
     AnalyzerInput,
@@ -22,49 +25,159 @@ from .schema import (
 )
 
 UTC8 = dt.timezone(dt.timedelta(hours=8))
+# 每页读取的消息记录数
+PAGE_SIZE = 5000
 
 
-def convert_messagerecord_to_analyzer_input(
-    name: str,
-    records: list[MessageRecord],
-    user_id_map: dict[int, str],
-    user_name_map: dict[int, str],
-) -> AnalyzerInput:
-    messages: list[Message] = []
+class RecordRow(NamedTuple):
+    """只包含分析所需列的消息记录"""
+
+    id: int
+    time: dt.datetime
+    user_persist_id: int
+    message_id: str
+    plain_text: str
+    message: list[dict[str, Any]]
 
-    for record in records:
-        if record.type == "message_sent":
-            continue
-        spid = record.session_persist_id
-        sender_uin = user_id_map.get(spid, spid)
-        sender_name = user_name_map.get(spid, str(sender_uin))
-        sender = SenderInfo(uin=sender_uin, name=sender_name)
-        content = ContentInfo(text=record.plain_text or "", reply=None)
-        raw = RawMessage(subMsgType=0, sendMemberName=sender_name, elements=[])
-
-        unimsg = UniMessage.of(deserialize_message(current_bot.get(), record.message))
-        for seg in unimsg[At]:
-            element = MessageElement(
-                elementType=1,
-                textElement=TextElement(atType=1, atUid=str(seg.target)),
+
+async def iter_records(
+    session: Session,
+    time_start: dt.datetime,
+    time_end: dt.datetime,
+    page_size: int = PAGE_SIZE,
+    after_id: int = 0,
+) -> AsyncIterator[list[RecordRow]]:
+    """按 (time, id) 键集分页读取接收到的消息，逐页返回
+
+    每页使用独立的数据库会话，不创建 ORM 对象，内存占用只与页大小相关。
+    after_id 不为 0 时只读取 ID 大于 after_id 的记录。
+    """
+    whereclause = filter_statement(
+        session=session,
+        filter_user=False,
+        time_start=time_start,
+        time_stop=time_end,
+    )
+    statement = (
+        select(
+            MessageRecord.id,
+            MessageRecord.time,
+            SessionModel.user_persist_id,
+            MessageRecord.message_id,
+            MessageRecord.plain_text,
+            MessageRecord.message,
+        )
+        .join(SessionModel, SessionModel.id == MessageRecord.session_persist_id)
+        .join(BotModel, BotModel.id == SessionModel.bot_persist_id)
+        .join(SceneModel, SceneModel.id == SessionModel.scene_persist_id)
+        .join(UserModel, UserModel.id == SessionModel.user_persist_id)
+        .where(
+            *whereclause,
+            MessageRecord.type == "message",
+            MessageRecord.id > after_id,
+        )
+        .order_by(MessageRecord.time, MessageRecord.id)
+        .limit(page_size)
+    )
+
+    cursor: RecordRow | None = None
+    while True:
+        page_statement = statement
+        if cursor is not None:
+            page_statement = statement.where(
+                or_(
+                    MessageRecord.time > cursor.time,
+                    and_(
+                        MessageRecord.time == cursor.time, MessageRecord.id > cursor.id
+                    ),
+                )
             )
-            raw.elements.append(element)
-        for seg in unimsg[Image]:
-            content.text += f"[图片:{seg.id}]"
-        for seg in unimsg[Reply]:
-            content.reply = content.reply or ReplyInfo(referencedMessageId=seg.id)
-
-        message = Message(
-            messageId=record.message_id,
-            sender=sender,
-            content=content,
-            timestamp=record.time.strftime("%Y-%m-%d %H:%M:%S"),
-            rawMessage=raw,
+
+        async with get_session() as db_session:
+            rows = [
+                RecordRow._make(row) for row in await db_session.execute(page_statement)
+            ]
+
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = rows[-1]
+
+
+async def _resolve_users(
+    user_persist_ids: set[int],
+    users: dict[int, tuple[str, str]],
+) -> None:
+    """查询尚未缓存的用户，写入 {user_persist_id: (user_id, 昵称)}"""
+    if not (missing := user_persist_ids - users.keys()):
+        return
+
+    async with get_session() as db_session:
+        statement = select(UserModel).where(UserModel.id.in_(missing))
+        models = list(await db_session.scalars(statement))
+
+    for model in models:
+        user = await model.to_user()
+        users[model.id] = (model.user_id, user.nick or user.name or user.id)
+
+
+def convert_record(
+    bot: Bot,
+    row: RecordRow,
+    sender_uin: str | int,
+    sender_name: str,
+) -> Message:
+    sender = SenderInfo(uin=sender_uin, name=sender_name)
+    content = ContentInfo(text=row.plain_text or "", reply=None)
+    raw = RawMessage(subMsgType=0, sendMemberName=sender_name, elements=[])
+
+    unimsg = UniMessage.of(deserialize_message(bot, row.message))
+    for seg in unimsg[At]:
+        element = MessageElement(
+            elementType=1,
+            textElement=TextElement(atType=1, atUid=str(seg.target)),
         )
+        raw.elements.append(element)
+    for seg in unimsg[Image]:
+        content.text += f"[图片:{seg.id}]"
+    for seg in unimsg[Reply]:
+        content.reply = content.reply or ReplyInfo(referencedMessageId=seg.id)
+
+    return Message(
+        messageId=row.message_id,
+        sender=sender,
+        content=content,
+        timestamp=row.time.strftime("%Y-%m-%d %H:%M:%S"),
+        rawMessage=raw,
+    )
 
-        messages.append(message)
 
-    return AnalyzerInput(messages=messages, chatName=name, chatInfo=ChatInfo(name=name))
+async def iter_messages(
+    session: Session,
+    time_start: dt.datetime,
+    time_end: dt.datetime,
+    bot: Bot | None = None,
+    after_id: int = 0,
+) -> AsyncIterator[tuple[int, Message]]:
+    """逐条返回记录 ID 与转换后的消息，发送者信息按页批量查询并缓存"""
+    bot = bot or current_bot.get()
+    users: dict[int, tuple[str, str]] = {}
+
+    async for rows in iter_records(session, time_start, time_end, after_id=after_id):
+        await _resolve_users({row.user_persist_id for row in rows}, users)
+        for row in rows:
+            upid = row.user_persist_id
+            sender_uin, sender_name = users.get(upid, (upid, str(upid)))
+            yield row.id, convert_record(bot, row, sender_uin, sender_name)
+
+
+def month_range(year: int, month: int) -> tuple[dt.datetime, dt.datetime]:
+    """返回指定月份的起止时间 (UTC+8)"""
+    time_start = dt.datetime(year, month, 1, tzinfo=UTC8)
+    if month == 12:
+        return time_start, time_start.replace(year=year + 1, month=1)
+    return time_start, time_start.replace(month=month + 1)
 
 
 async def fetch_analyzer_input(
@@ -73,31 +186,39 @@ async def fetch_analyzer_input(
 ) -> AnalyzerInput:
     time_start = dt.datetime(year or dt.datetime.now(UTC8).year, 1, 1, tzinfo=UTC8)
     time_end = time_start.replace(year=time_start.year + 1)
+    return (await fetch_range_input(session, time_start, time_end)).data
 
-    records = await get_message_records(
-        session=session,
-        filter_user=False,
-        time_start=time_start,
-        time_stop=time_end,
-    )
-    spids = {record.session_persist_id for record in records}
 
-    async with get_session() as db_session:
-        statement = (
-            select(SessionModel.id, UserModel)
-            .where(SessionModel.id.in_(spids))
-            .join(SessionModel, UserModel.id == SessionModel.user_persist_id)
-        )
-        users = [row.tuple() for row in await db_session.execute(statement)]
-
-    user_id_map = {sid: user.user_id for sid, user in users}
-    user_name_map = {
-        sid: (u := await user.to_user()).nick or u.name or u.id for sid, user in users
-    }
-
-    return convert_messagerecord_to_analyzer_input(
-        name=session.scene.name or session.id,
-        records=records,
-        user_id_map=user_id_map,
-        user_name_map=user_name_map,
-    )
+class RangeInput(NamedTuple):
+    """时间范围内的消息及已读取记录的最大 ID"""
+
+    data: AnalyzerInput
+    watermark: int
+
+
+async def fetch_range_input(
+    session: Session,
+    time_start: dt.datetime,
+    time_end: dt.datetime,
+    bot: Bot | None = None,
+    after_id: int = 0,
+) -> RangeInput:
+    """读取指定时间范围内的消息
+
+    Args:
+        session: 群聊会话
+        time_start: 起始时间（含）
+        time_end: 结束时间（不含）
+        bot: 用于反序列化消息的 Bot，默认使用当前事件的 Bot
+        after_id: 只读取 ID 大于该值的记录，用于增量更新
+    """
+    name = session.scene.name or session.id
+    messages: list[Message] = []
+    watermark = after_id
+    async for record_id, message in iter_messages(
+        session, time_start, time_end, bot, after_id
+    ):
+        messages.append(message)
+        watermark = max(watermark, record_id)
+    data = AnalyzerInput(messages=messages, chatName=name, chatInfo=ChatInfo(name=name))
+    return RangeInput(data, watermark)
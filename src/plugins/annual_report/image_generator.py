@@ -7,14 +7,24 @@ QQ 群年度热词报告图片生成器
 原项目版权：Copyright (c) 2025 ZiHuixi
 """
 
+import asyncio
 import contextlib
+import functools
+import hashlib
 import math
 import random
+from collections.abc import Sequence
 from typing import Any
 
-import httpx
 from nonebot import logger
 from nonebot_plugin_htmlrender import get_new_page, template_to_html
+from pydantic import BaseModel
+
+from src.service.cache import get_cache
+from src.service.llm import LLMClient, Message, SystemMessage, UserMessage
+from src.service.llm.batch import estimate_tokens
+from src.service.llm.config import LLMConfig
+from src.service.llm.exceptions import LLMServiceError
 
 from .analyzer import ChatAnalyzer
 from .config import TEMPLATE_FILE, config
@@ -76,66 +86,16 @@ def get_avatar_url(uin: str | int) -> str:
     return f"https://q1.qlogo.cn/g?b=qq&nk={uin}&s=640"
 
 
-async def chat_completion(
-    messages: list[dict[str, str]],
-    max_tokens: int = 100,
-    temperature: float = 0.7,
-) -> str | None:
-    """调用聊天完成 API
-
-    Args:
-        messages: 消息列表 [{"role": "user/system", "content": "..."}]
-        max_tokens: 最大生成 token 数
-        temperature: 温度参数
-
-    Returns:
-        API 返回的内容，或 None 表示失败
-    """
-    headers = {
-        "Authorization": f"Bearer {config.openai.api_key}",
-        "Content-Type": "application/json",
-    }
-    payload: dict[str, Any] = {
-        "model": config.openai.model,
-        "messages": messages,
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{config.openai.base_url}/chat/completions",
-                json=payload,
-                headers=headers,
-            )
-
-            if response.status_code != 200:
-                logger.error(
-                    f"❌ API 错误 ({response.status_code}): {response.text[:200]}"
-                )
-                return None
-
-            data: dict[str, Any] = response.json()
-            content: str | None = (
-                data.get("choices", [{}])[0].get("message", {}).get("content")
-            )
-
-            if content is None:
-                logger.error("❌ API 未返回任何内容")
-                return None
-
-            return content.strip()
-
-    except httpx.TimeoutException:
-        logger.error("❌ 请求超时，请检查网络或代理设置")
-        return None
-    except httpx.ConnectError:
-        logger.error("❌ 连接失败，请检查代理配置")
-        return None
-    except Exception as e:
-        logger.error(f"❌ 请求失败: {e}")
-        return None
+@functools.cache
+def get_client() -> LLMClient:
+    """年度报告使用的 LLM 客户端"""
+    return LLMClient(
+        LLMConfig(
+            base_url=config.openai.base_url,
+            api_key=config.openai.api_key,
+            model=config.openai.model,
+        )
+    )
 
 
 class AIWordSelector:
@@ -201,18 +161,13 @@ class AIWordSelector:
         user_prompt: str = self.USER_PROMPT.format(len(candidates), words_text)
 
         try:
-            result: str | None = await chat_completion(
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
+            result = await get_client().chat_completion(
+                SystemMessage(self.SYSTEM_PROMPT),
+                UserMessage(user_prompt),
                 max_tokens=100,
                 temperature=0.7,
             )
 
-            if result is None:
-                return None
-
             # 解析序号
             indices: list[int] = []
             for part in result.replace("，", ",").split(","):
@@ -235,6 +190,9 @@ class AIWordSelector:
             for i, word_data in enumerate(selected, 1):
                 logger.success(f"   {i}. {word_data["word"]} ({word_data["freq"]}次)")
 
+        except LLMServiceError as e:
+            logger.error(f"❌ AI 选词失败: {e}")
+            return None
         except Exception:
             logger.exception("❌ AI 选词失败")
             return None
@@ -255,18 +213,39 @@ def _fallback_comment() -> str:
     return random.choice(fallbacks)
 
 
+class WordComment(BaseModel):
+    word: str
+    comment: str
+
+
+class CommentBatch(BaseModel):
+    comments: list[WordComment]
+
+
+# 锐评缓存: 模型 + 群聊 ID + 词及其次数与样本 -> 锐评
+_comment_cache = get_cache("annual_report:comment", str)
+
+
 class AICommentGenerator:
-    """AI 锐评生成器"""
+    """AI 锐评生成器
+
+    多个词按 token 预算打包为一次结构化请求；每个词的结果单独缓存，
+    同一群重新生成报告时，次数与样本未变的词直接复用。
+
+    Args:
+        scene_id: 群聊 ID，用于区分各群的锐评缓存
+    """
 
     SYSTEM_PROMPT = """\
 你是一个幽默风趣的群聊分析师，擅长用犀利又不失温度的语言点评网络热词。
 
-你的任务是为 QQ 群年度热词报告生成一句精辟的锐评。要求：
+你的任务是为 QQ 群年度热词报告中的每个词生成一句精辟的锐评。要求：
 1. 简短有力，15-30 字为宜
 2. 可以调侃、可以感慨、可以哲理，但要有趣
 3. 结合词语本身的含义和使用场景
 4. 语气可以是：毒舌吐槽/温情感慨/哲学思考/冷幽默/谐音梗 等
 5. 不要太正经，要有网感
+6. 每个词的锐评各不相同
 
 风格参考：
 - "哈哈哈" → "快乐是假的，但敷衍是真的"
@@ -275,46 +254,42 @@ class AICommentGenerator:
 - "?" → "一个符号，十万种质疑"
 - "6" → "当代网友最高效的赞美"""
 
-    USER_PROMPT = """请为这个群聊热词生成一句锐评：
+    USER_PROMPT = """请为以下 {} 个群聊热词各生成一句锐评：
 
-词语：{}
-出现次数：{}次
-使用样本：
 {}
 
-直接输出锐评内容，不要加引号或其他格式。"""
+以 JSON 输出：{{"comments": [{{"word": "词语", "comment": "锐评"}}]}}
+word 与给出的词语完全一致，comment 中不要加引号或其他格式。"""
 
-    async def generate_comment(
-        self, word: str, freq: int, samples: list[str] | None = None
-    ) -> str:
-        """为单个词生成锐评
+    ITEM_TEMPLATE = """词语：{}
+出现次数：{}次
+使用样本：
+{}"""
 
-        Args:
-            word: 词语
-            freq: 出现次数
-            samples: 使用样本
+    def __init__(self, scene_id: str) -> None:
+        self.scene_id = scene_id
 
-        Returns:
-            锐评内容
-        """
-        # 构建用户提示
+    def _cache_key(self, word_info: dict[str, Any]) -> str:
+        # 请求中的词条包含词、次数与样本，锐评随之变化
+        raw = f"{config.openai.model}\0{self.scene_id}\0{self._format_item(word_info)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _format_item(self, word_info: dict[str, Any]) -> str:
+        samples: list[str] = word_info.get("samples", [])
         samples_text: str = (
             "\n".join(f"- {s[:50]}" for s in samples[:5]) if samples else "无"
         )
+        return self.ITEM_TEMPLATE.format(
+            word_info["word"], word_info["freq"], samples_text
+        )
 
-        user_prompt = self.USER_PROMPT.format(word, freq, samples_text)
-        messages = [
-            {"role": "system", "content": self.SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
+    def _render(self, batch: Sequence[dict[str, Any]]) -> list[Message]:
+        items = "\n\n".join(self._format_item(w) for w in batch)
+        return [
+            SystemMessage(self.SYSTEM_PROMPT),
+            UserMessage(self.USER_PROMPT.format(len(batch), items)),
         ]
 
-        try:
-            result = await chat_completion(messages, 100, 0.9)
-            return result or _fallback_comment()
-        except Exception:
-            logger.exception(f"   ⚠️  AI 生成失败({word})")
-            return _fallback_comment()
-
     async def generate_batch(self, words_data: list[dict[str, Any]]) -> dict[str, str]:
         """批量生成锐评
 
@@ -324,22 +299,54 @@ class AICommentGenerator:
         Returns:
             {词: 锐评} 的字典
         """
-        comments: dict[str, str] = {}
-        for word_info in words_data:
-            comment = await self.generate_comment(
-                word=word_info["word"],
-                freq=word_info["freq"],
-                samples=word_info.get("samples", []),
+        words = [w["word"] for w in words_data]
+        keys = {w["word"]: self._cache_key(w) for w in words_data}
+        cached = await asyncio.gather(*(_comment_cache.get(keys[w]) for w in words))
+        comments: dict[str, str] = {
+            word: comment
+            for word, comment in zip(words, cached, strict=True)
+            if comment
+        }
+        if comments:
+            logger.info(f"   复用 {len(comments)} 条已缓存的锐评")
+
+        pending = [w for w in words_data if w["word"] not in comments]
+        if pending:
+            results = await get_client().chat_completion_json_batch(
+                pending,
+                render=self._render,
+                response_model=CommentBatch,
+                cost=lambda w: estimate_tokens(self._format_item(w)),
+                token_budget=config.openai.batch_token_budget,
+                concurrency=config.openai.batch_concurrency,
+                temperature=0.9,
             )
-            comments[word_info["word"]] = comment
-        return comments
+            generated = {
+                item.word: comment
+                for _, result in results
+                if result is not None
+                for item in result.comments
+                if item.word in keys and (comment := item.comment.strip())
+            }
+            await asyncio.gather(
+                *(
+                    _comment_cache.set(
+                        keys[word], comment, config.openai.comment_cache_ttl
+                    )
+                    for word, comment in generated.items()
+                )
+            )
+            comments.update(generated)
+
+        return {word: comments.get(word) or _fallback_comment() for word in words}
 
 
 class ImageGenerator:
     """图片报告生成器"""
 
-    def __init__(self, analyzer: ChatAnalyzer) -> None:
+    def __init__(self, analyzer: ChatAnalyzer, scene_id: str) -> None:
         self.analyzer: ChatAnalyzer | None = analyzer
+        self.scene_id = scene_id
         self.json_data: dict[str, Any] | None = None
         self.selected_words: list[dict[str, Any]] = []
         self.ai_comments: dict[str, str] = {}
@@ -497,7 +504,7 @@ class ImageGenerator:
 
     async def _generate_ai_comments(self) -> None:
         """生成 AI 锐评（可静默）"""
-        self.ai_comments = await AICommentGenerator().generate_batch(
+        self.ai_comments = await AICommentGenerator(self.scene_id).generate_batch(
             self.selected_words
         )
 
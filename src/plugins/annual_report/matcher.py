@@ -1,9 +1,21 @@
 import anyio.to_thread
 from nonebot import logger
-from nonebot_plugin_alconna import Alconna, Args, CommandMeta, UniMessage, on_alconna
+from nonebot.adapters import Bot, Event
+from nonebot.permission import SUPERUSER
+from nonebot_plugin_alconna import (
+    Alconna,
+    Args,
+    CommandMeta,
+    Option,
+    Query,
+    UniMessage,
+    on_alconna,
+)
 from nonebot_plugin_uninfo import Uninfo
 
+from .aggregate import build_report_analyzer
 from .analyzer import ChatAnalyzer
+from .config import config
 from .db_converter import fetch_analyzer_input
 from .image_generator import ImageGenerator
 
@@ -11,9 +23,10 @@ matcher = on_alconna(
     Alconna(
         "annual_report",
         Args["year?#年份", int],
+        Option("--rebuild", help_text="重新计算已保存的月度聚合（仅超级用户）"),
         meta=CommandMeta(
             description="生成年度报告",
-            usage="annual_report [年份]",
+            usage="annual_report [年份] [--rebuild]",
             author="wyf7685",
         ),
     ),
@@ -22,13 +35,25 @@ matcher = on_alconna(
 
 
 @matcher.handle()
-async def _(session: Uninfo, year: int | None = None) -> None:
-    analyzer_input = await fetch_analyzer_input(session, year)
+async def _(
+    bot: Bot,
+    event: Event,
+    session: Uninfo,
+    year: int | None = None,
+    rebuild: Query[bool] = Query("rebuild.value", default=False),
+) -> None:
+    if rebuild.result and not await SUPERUSER(bot, event):
+        await matcher.finish("仅超级用户可重新计算月度聚合")
 
     try:
-        analyzer = ChatAnalyzer(analyzer_input)
-        await anyio.to_thread.run_sync(analyzer.analyze)
-        image_bytes = await ImageGenerator(analyzer).generate()
+        if config.aggregate.enabled:
+            analyzer = await build_report_analyzer(
+                session, year, rebuild=rebuild.result
+            )
+        else:
+            analyzer = ChatAnalyzer(await fetch_analyzer_input(session, year))
+            await anyio.to_thread.run_sync(analyzer.analyze)
+        image_bytes = await ImageGenerator(analyzer, session.scene.id).generate()
     except Exception as e:
         logger.exception("生成年度报告失败")
         await matcher.finish(f"生成年度报告失败: {e}")
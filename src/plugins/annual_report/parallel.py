@@ -0,0 +1,186 @@
+"""年度报告并行分析 — 按月分片，在进程池中执行 CPU 密集阶段，结果在主进程归并。
+
+各阶段的分片结果均为可相加的计数器，按分片顺序归并后与单进程结果完全一致。
+
+插件模块依赖已初始化的 NoneBot，不能在子进程中导入，分片任务因此位于
+src.workers.annual_report.shards。进程池以 forkserver 启动，不继承主进程的线程与
+事件循环，子进程启动时由 init_worker 加载主进程写入的 jieba 词典缓存。
+"""
+
+import contextlib
+import functools
+import itertools
+import multiprocessing
+import os
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Protocol, Self
+
+from src.workers.annual_report.shards import (
+    Shard,
+    Uin,
+    drop_session,
+    init_worker,
+    use_dictionary,
+)
+
+from .tokenizer import get_tokenizer, worker_initargs
+
+# 自动模式下，少于该数量的有效消息直接在当前进程分析，避免进程池开销
+AUTO_PARALLEL_MIN_MESSAGES = 20000
+# 同时在当前进程执行的分析数上限，与 CPU 核数无关：每次分析各持有一份词典副本
+LOCAL_MAX_SESSIONS = 2
+
+_local_slots = threading.BoundedSemaphore(LOCAL_MAX_SESSIONS)
+
+
+def build_shards(messages: Iterable[tuple[str, Uin, str]]) -> list[Shard]:
+    """将 (月份, 发送者, 清理后文本) 序列按连续月份切分。
+
+    只合并相邻的同月消息，保证分片顺序与原消息顺序一致。
+    """
+    shards: list[Shard] = []
+    for month, uin, text in messages:
+        if not shards or shards[-1].key != month:
+            shards.append(Shard(len(shards), month, []))
+        shards[-1].messages.append((uin, text))
+    return shards
+
+
+class Partial(Protocol):
+    def merge(self, other: Self, /) -> None: ...
+
+
+def reduce_partials[P: Partial](initial: P, parts: Iterable[P]) -> P:
+    """按顺序将分片结果归并到 initial。"""
+    for part in parts:
+        initial.merge(part)
+    return initial
+
+
+# ── 执行器 ───────────────────────────────────────────────
+
+
+def resolve_workers(configured: int, message_count: int, shard_count: int) -> int:
+    """确定实际使用的进程数。
+
+    Args:
+        configured: 配置的进程数，0 表示自动
+        message_count: 有效消息数
+        shard_count: 分片数
+    """
+    if configured <= 0:
+        if message_count < AUTO_PARALLEL_MIN_MESSAGES:
+            return 1
+        configured = os.cpu_count() or 1
+    return max(1, min(configured, shard_count))
+
+
+@dataclass(frozen=True, slots=True)
+class ShardSession:
+    """单次分析的分片任务执行器，结果按分片顺序返回
+
+    id 用于区分各次分析的 jieba 用户词与分词缓存（见 shards 模块）。
+    同一分片的各阶段任务总在同一进程执行，分词结果因此无需传回主进程；
+    共用 ShardRunner 的各次分析按 offset 错开，分散到不同进程。
+    """
+
+    id: str
+    executors: Sequence[Executor]
+    offset: int
+
+    def map[R](
+        self,
+        func: Callable[..., R],
+        shards: Sequence[Shard],
+        **kwargs: object,
+    ) -> list[R]:
+        task = functools.partial(func, **kwargs) if kwargs else func
+        if not self.executors:
+            return [task(shard) for shard in shards]
+        executors = self.executors
+        futures = [
+            executors[(self.offset + shard.index) % len(executors)].submit(task, shard)
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+
+    def reduce[P: Partial](
+        self,
+        func: Callable[..., P],
+        shards: Sequence[Shard],
+        initial: P,
+        **kwargs: object,
+    ) -> P:
+        return reduce_partials(initial, self.map(func, shards, **kwargs))
+
+
+class ShardRunner:
+    """管理执行分片任务的子进程，可供多次分析（如各月份）共用。
+
+    每个子进程是独立的单进程执行器，只在首次提交任务时启动；
+    分析通过 session() 提交任务，分片按会话偏移加序号固定分配给其中之一。
+
+    Args:
+        workers: 进程数
+        sessions: 同时共用执行器的分析数，子进程按此保留各分析的会话状态
+    """
+
+    def __init__(self, workers: int, *, sessions: int = 1) -> None:
+        self.workers = workers
+        self.sessions = sessions
+        self._executors: list[Executor] = []
+        self._offsets = itertools.count()
+
+    def __enter__(self) -> Self:
+        use_dictionary(get_tokenizer())
+        if self.workers > 1:
+            context = multiprocessing.get_context("forkserver")
+            initargs = (*worker_initargs(), self.sessions)
+            self._executors = [
+                ProcessPoolExecutor(
+                    1,
+                    mp_context=context,
+                    initializer=init_worker,
+                    initargs=initargs,
+                )
+                for _ in range(self.workers)
+            ]
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        executors, self._executors = self._executors, []
+        for executor in executors:
+            executor.shutdown(cancel_futures=exc_type is not None)
+
+    @contextlib.contextmanager
+    def session(self, *, local: bool = False) -> Iterator[ShardSession]:
+        """开始一次分析
+
+        退出时释放各进程中的会话状态。在当前进程执行的分析同时不超过
+        LOCAL_MAX_SESSIONS 个，超出时等待。
+
+        Args:
+            local: 在当前进程执行全部任务，用于消息较少的分析
+        """
+        executors = () if local else tuple(self._executors)
+        slots = contextlib.nullcontext() if executors else _local_slots
+        with slots:
+            session = ShardSession(uuid.uuid4().hex, executors, next(self._offsets))
+            try:
+                yield session
+            finally:
+                drop_session(session.id)
+                for executor in executors:
+                    # 执行器已损坏时其子进程已退出，无需释放
+                    with contextlib.suppress(RuntimeError):
+                        executor.submit(drop_session, session.id)
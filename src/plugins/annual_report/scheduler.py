@@ -0,0 +1,27 @@
+"""月度聚合调度 — 每月初为已知会话聚合上一个自然月。"""
+
+from apscheduler.triggers.cron import CronTrigger
+from nonebot import get_driver, logger
+from nonebot_plugin_apscheduler import scheduler
+
+from .aggregate import aggregate_previous_month
+from .config import config
+
+
+@get_driver().on_startup
+async def _setup_scheduled_jobs() -> None:
+    """注册月度聚合定时任务。"""
+    if not config.aggregate.enabled:
+        return
+
+    day, hour = config.aggregate.schedule_day, config.aggregate.schedule_hour
+    scheduler.add_job(
+        aggregate_previous_month,
+        trigger=CronTrigger(day=day, hour=hour),
+        id="annual_report_monthly_aggregate",
+        misfire_grace_time=3600,
+        replace_existing=True,
+    )
+    logger.opt(colors=True).info(
+        f"已注册月度聚合: 每月 <y>{day}</> 日 <y>{hour:02d}:00</>"
+    )
@@ -0,0 +1,89 @@
+"""jieba 词典缓存 — 将加入白名单词后的词典序列化到本地缓存，启动时在后台加载。
+
+词典加载到本插件独立的分词器，不修改 jieba 全局的默认分词器，其他插件的分词不受影响。
+
+缓存文件名包含 jieba 版本与白名单的哈希，配置变化时自动重建。
+黑名单词不从词典删除：删除后会被切成单字计入词频，仍由过滤阶段排除。
+"""
+
+import hashlib
+import marshal
+import threading
+import time
+from pathlib import Path
+
+import jieba
+from nonebot import get_driver, logger
+from nonebot_plugin_localstore import get_plugin_cache_dir
+
+from src.service.task import call_soon
+from src.workers.annual_report.shards import build_dictionary, load_dictionary
+
+from .config import config
+
+# 缓存格式变化时递增
+_CACHE_VERSION = 1
+CACHE_DIR = get_plugin_cache_dir() / "jieba"
+
+_lock = threading.Lock()
+_tokenizer: jieba.Tokenizer | None = None
+
+
+def _cache_key(words: list[str]) -> str:
+    digest = hashlib.sha256(f"{_CACHE_VERSION}:{jieba.__version__}".encode())
+    for word in words:
+        digest.update(b"\n" + word.encode())
+    return digest.hexdigest()[:16]
+
+
+def worker_initargs() -> tuple[Path, list[str]]:
+    """进程池子进程加载同一份词典所需的参数，见 init_worker"""
+    whitelist = sorted(config.filter.whitelist)
+    return CACHE_DIR / f"{_cache_key(whitelist)}.cache", whitelist
+
+
+def _load() -> jieba.Tokenizer:
+    cache_file, whitelist = worker_initargs()
+    start = time.perf_counter()
+
+    try:
+        tokenizer = load_dictionary(cache_file)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"jieba 词典缓存读取失败，重新构建: {e}")
+    else:
+        logger.info(f"已从缓存加载 jieba 词典, 耗时 {time.perf_counter() - start:.2f}s")
+        return tokenizer
+
+    tokenizer = build_dictionary(whitelist)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in CACHE_DIR.glob("*.cache"):
+        stale.unlink(missing_ok=True)
+    temp_file = cache_file.with_suffix(".tmp")
+    temp_file.write_bytes(marshal.dumps((tokenizer.FREQ, tokenizer.total)))
+    temp_file.replace(cache_file)
+
+    logger.info(f"已构建 jieba 词典缓存, 耗时 {time.perf_counter() - start:.2f}s")
+    return tokenizer
+
+
+def get_tokenizer() -> jieba.Tokenizer:
+    """获取加载了自定义词典的分词器，可在任意线程重复调用
+
+    分词器归本模块所有，jieba 全局的默认分词器不受影响。
+    """
+    global _tokenizer
+
+    if _tokenizer is None:
+        with _lock:
+            if _tokenizer is None:
+                _tokenizer = _load()
+    return _tokenizer
+
+
+@get_driver().on_startup
+async def _preload() -> None:
+    """启动后在后台线程加载词典，首次生成报告时无需等待"""
+    call_soon(get_tokenizer)
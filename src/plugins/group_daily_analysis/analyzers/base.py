@@ -75,6 +75,9 @@ class BaseAnalyzer[
         if not prompt or not prompt.strip():
             logger.warning(f"{self.data_type} 分析: prompt 为空，跳过")
             return [], TokenUsage()
+        logger.opt(colors=True).debug(
+            f"{self.data_type} 分析: prompt 长度 <c>{len(prompt)}</> 字符"
+        )
 
         response, token_usage = await call_llm(
             self.response_model, prompt, system_prompt
@@ -1,12 +1,11 @@
 """聊天质量分析器。"""
 
-from string import Template
 from typing import override
 
-from ..config import PROMPT_DIR
 from ..domain.models import QualityReview
 from ..domain.value_objects import UnifiedMessage
 from .base import BaseAnalyzer
+from .prompts import prompt_registry
 
 _COLORS = [
     "#607d8b",
@@ -52,16 +51,8 @@ class ChatQualityAnalyzer(
         if not messages_text:
             return ""
 
-        template_str = self._prompt_template
-        if not template_str:
-            prompt_file = PROMPT_DIR / "chat_quality_analysis.txt"
-            if prompt_file.exists():
-                template_str = prompt_file.read_text(encoding="utf-8")
-            else:
-                template_str = _DEFAULT_PROMPT
-
-        tpl = Template(template_str)
-        return tpl.safe_substitute(messages_text=messages_text)
+        compiled = prompt_registry.get("chat_quality", self._prompt_template)
+        return compiled.render(messages_text)
 
     @override
     def process_response(self, response: QualityReview) -> list[QualityReview]:
@@ -98,3 +89,11 @@ ${messages_text}
 
 示例格式：
 {"title": "今日主题", "subtitle": "副标题", "dimensions": [{"name": "维度名", "percentage": 40, "comment": "点评"}], "summary": "总结"}"""  # noqa: E501
+
+
+prompt_registry.register(
+    "chat_quality",
+    file="chat_quality_analysis.txt",
+    default=_DEFAULT_PROMPT,
+    dynamic="messages_text",
+)
@@ -1,15 +1,14 @@
 """金句分析器。"""
 
-from string import Template
 from typing import override
 
 from nonebot import logger
 from nonebot.utils import escape_tag
 
-from ..config import PROMPT_DIR
 from ..domain.models import GoldenQuote
 from ..domain.value_objects import UnifiedMessage
 from .base import BaseAnalyzer
+from .prompts import prompt_registry
 
 
 class GoldenQuoteAnalyzer(BaseAnalyzer[GoldenQuote]):
@@ -40,19 +39,10 @@ class GoldenQuoteAnalyzer(BaseAnalyzer[GoldenQuote]):
             return ""
         self._build_nickname_mapping(messages)
 
-        template_str = self._prompt_template
-        if not template_str:
-            prompt_file = PROMPT_DIR / "golden_quote_analysis.txt"
-            if prompt_file.exists():
-                template_str = prompt_file.read_text(encoding="utf-8")
-            else:
-                template_str = _DEFAULT_PROMPT
-
-        tpl = Template(template_str)
-        return tpl.safe_substitute(
-            max_golden_quotes=self._max_quotes,
-            messages_text=messages_text,
+        compiled = prompt_registry.get(
+            "golden_quote", self._prompt_template, max_golden_quotes=self._max_quotes
         )
+        return compiled.render(messages_text)
 
     @override
     def process_response(self, response: list[GoldenQuote]) -> list[GoldenQuote]:
@@ -89,3 +79,12 @@ ${messages_text}
 
 示例格式：
 [{"content": "金句原文", "sender": "[123456]", "reason": "选择理由"}]"""
+
+
+prompt_registry.register(
+    "golden_quote",
+    file="golden_quote_analysis.txt",
+    default=_DEFAULT_PROMPT,
+    dynamic="messages_text",
+    static=("max_golden_quotes",),
+)
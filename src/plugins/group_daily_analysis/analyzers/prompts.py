@@ -0,0 +1,166 @@
+"""提示词模板注册表 — 启动时预加载并校验，按 mtime 热重载。
+
+每个模板恰好包含一个动态占位符（聊天记录或用户数据），其余占位符为静态参数，
+未知的 $ 占位符（如模板中的 $USD）按原样保留。
+静态参数在编译阶段代入，模板被拆分为固定的前缀与后缀，
+构建提示词时只需拼接动态文本，且相同配置下前缀保持稳定，便于服务端 prompt 缓存。
+"""
+
+import functools
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Template
+
+from nonebot.log import logger
+from nonebot.utils import escape_tag
+
+from ..config import PROMPT_DIR
+
+_SENTINEL = "\x00dynamic\x00"
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPrompt:
+    """已代入静态参数的提示词模板"""
+
+    prefix: str
+    suffix: str
+
+    @property
+    def static_size(self) -> int:
+        return len(self.prefix) + len(self.suffix)
+
+    def render(self, dynamic_text: str) -> str:
+        return f"{self.prefix}{dynamic_text}{self.suffix}"
+
+
+@functools.lru_cache(maxsize=64)
+def compile_prompt(
+    template_str: str, dynamic: str, /, **static: object
+) -> CompiledPrompt:
+    """编译模板：代入静态参数，并在动态占位符处拆分为前缀与后缀。"""
+    text = Template(template_str).safe_substitute(static, **{dynamic: _SENTINEL})
+    prefix, _, suffix = text.partition(_SENTINEL)
+    # 动态文本只应出现一次，多余的占位符保留原样
+    return CompiledPrompt(prefix, suffix.replace(_SENTINEL, f"${{{dynamic}}}"))
+
+
+@dataclass(slots=True)
+class PromptSpec:
+    """提示词模板声明"""
+
+    file: str
+    default: str
+    dynamic: str
+    static: frozenset[str] = frozenset()
+    source: str = field(default="", init=False)
+    mtime: float | None = field(default=None, init=False)
+
+    @property
+    def path(self) -> Path:
+        return PROMPT_DIR / self.file
+
+    def validate(self, template_str: str) -> list[str]:
+        """校验模板包含动态占位符，返回问题列表。
+
+        其他未知占位符不视为错误，编译时按原样保留。
+        """
+        identifiers = set(Template(template_str).get_identifiers())
+        problems: list[str] = []
+        if self.dynamic not in identifiers:
+            problems.append(f"缺少占位符 ${{{self.dynamic}}}")
+        return problems
+
+    def unknown_identifiers(self, template_str: str) -> set[str]:
+        """模板中既非动态占位符也非静态参数的占位符"""
+        identifiers = set(Template(template_str).get_identifiers())
+        return identifiers - self.static - {self.dynamic}
+
+
+class PromptRegistry:
+    """分析器提示词模板注册表。"""
+
+    def __init__(self) -> None:
+        self._specs: dict[str, PromptSpec] = {}
+
+    def register(
+        self,
+        name: str,
+        /,
+        *,
+        file: str,
+        default: str,
+        dynamic: str,
+        static: tuple[str, ...] = (),
+    ) -> None:
+        self._specs[name] = PromptSpec(
+            file=file,
+            default=default,
+            dynamic=dynamic,
+            static=frozenset(static),
+        )
+
+    def _refresh(self, spec: PromptSpec) -> None:
+        """模板文件的 mtime 变化时重新加载，校验失败时回退到内置模板。"""
+        try:
+            mtime = spec.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if spec.source and mtime == spec.mtime:
+            return
+
+        spec.mtime = mtime
+        if mtime is None:
+            spec.source = spec.default
+            return
+
+        source = spec.path.read_text(encoding="utf-8")
+        if problems := spec.validate(source):
+            logger.opt(colors=True).warning(
+                f"提示词模板 <y>{escape_tag(spec.file)}</> 校验失败，使用内置模板: "
+                f"{escape_tag("; ".join(problems))}"
+            )
+            source = spec.default
+        else:
+            if unknown := spec.unknown_identifiers(source):
+                logger.opt(colors=True).debug(
+                    f"提示词模板 <y>{escape_tag(spec.file)}</> 保留未知占位符: "
+                    f"{escape_tag(", ".join(sorted(unknown)))}"
+                )
+            if spec.source:
+                logger.opt(colors=True).info(
+                    f"提示词模板已重新加载: <y>{escape_tag(spec.file)}</>"
+                )
+        spec.source = source
+
+    def load_all(self) -> None:
+        """预加载并校验全部模板，输出各分析器的模板大小。"""
+        for name, spec in self._specs.items():
+            self._refresh(spec)
+            logger.opt(colors=True).debug(
+                f"提示词模板 <y>{name}</>: <c>{len(spec.source)}</> 字符"
+            )
+
+    def get(
+        self,
+        name: str,
+        /,
+        override: str | None = None,
+        **static: object,
+    ) -> CompiledPrompt:
+        """获取代入静态参数后的编译模板。
+
+        Args:
+            name: 模板名称
+            override: 调用方自定义的模板字符串，优先于注册的模板
+            **static: 静态参数
+        """
+        spec = self._specs[name]
+        if override:
+            return compile_prompt(override, spec.dynamic, **static)
+        self._refresh(spec)
+        return compile_prompt(spec.source, spec.dynamic, **static)
+
+
+prompt_registry = PromptRegistry()
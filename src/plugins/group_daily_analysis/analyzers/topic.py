@@ -1,14 +1,14 @@
 """话题分析器。"""
 
-import re
 from collections.abc import Iterable
-from string import Template
 from typing import override
 
-from ..config import PROMPT_DIR
+from src.service.text import strip_control_chars
+
 from ..domain.models import SummaryTopic
 from ..domain.value_objects import UnifiedMessage
 from .base import BaseAnalyzer
+from .prompts import prompt_registry
 
 
 class TopicAnalyzer(BaseAnalyzer[SummaryTopic]):
@@ -38,19 +38,10 @@ class TopicAnalyzer(BaseAnalyzer[SummaryTopic]):
             return ""
         self._build_nickname_mapping(messages)
 
-        template_str = self._prompt_template
-        if not template_str:
-            prompt_file = PROMPT_DIR / "topic_analysis.txt"
-            if prompt_file.exists():
-                template_str = prompt_file.read_text(encoding="utf-8")
-            else:
-                template_str = _DEFAULT_TOPIC_PROMPT
-
-        tpl = Template(template_str)
-        return tpl.safe_substitute(
-            max_topics=self._max_topics,
-            messages_text=messages_text,
+        compiled = prompt_registry.get(
+            "topic", self._prompt_template, max_topics=self._max_topics
         )
+        return compiled.render(messages_text)
 
     @override
     def process_response(self, response: list[SummaryTopic]) -> list[SummaryTopic]:
@@ -77,11 +68,8 @@ class TopicAnalyzer(BaseAnalyzer[SummaryTopic]):
         self, messages: list[UnifiedMessage]
     ) -> Iterable[UnifiedMessage]:
         for msg in messages:
-            if text := msg.text_content:
-                cleaned_text = text.replace("\n", " ").replace("\r", " ")
-                cleaned_text = re.sub(r"[\x00-\x1f\x7f-\x9f]", "", cleaned_text)
-                if 2 <= len(text) <= 500:
-                    yield msg.shallow_copy_with(text_content=cleaned_text)
+            if (text := msg.text_content) and 2 <= len(text) <= 500:
+                yield msg.shallow_copy_with(text_content=strip_control_chars(text))
 
 
 _DEFAULT_TOPIC_PROMPT = """\
@@ -101,3 +89,12 @@ ${messages_text}
 
 示例格式：
 [{"topic": "话题名称", "contributors": ["123456"], "detail": "详细描述"}]"""
+
+
+prompt_registry.register(
+    "topic",
+    file="topic_analysis.txt",
+    default=_DEFAULT_TOPIC_PROMPT,
+    dynamic="messages_text",
+    static=("max_topics",),
+)
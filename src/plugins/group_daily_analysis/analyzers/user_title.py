@@ -2,14 +2,13 @@
 
 import json
 from dataclasses import dataclass
-from string import Template
 from typing import override
 
-from ..config import PROMPT_DIR
 from ..domain.incremental import UserActivity
 from ..domain.models import UserTitle
 from ..domain.value_objects import ModelMixin
 from .base import BaseAnalyzer
+from .prompts import prompt_registry
 
 
 @dataclass(frozen=True, slots=True)
@@ -110,19 +109,10 @@ class UserTitleAnalyzer(BaseAnalyzer[UserTitle, UserTitleInput]):
         if not users_text:
             return ""
 
-        template_str = self._prompt_template
-        if not template_str:
-            prompt_file = PROMPT_DIR / "user_title_prompt.txt"
-            if prompt_file.exists():
-                template_str = prompt_file.read_text(encoding="utf-8")
-            else:
-                template_str = _DEFAULT_PROMPT
-
-        tpl = Template(template_str)
-        return tpl.safe_substitute(
-            max_user_titles=self._max_titles,
-            users_text=users_text,
+        compiled = prompt_registry.get(
+            "user_title", self._prompt_template, max_user_titles=self._max_titles
         )
+        return compiled.render(users_text)
 
 
 _DEFAULT_PROMPT = """\
@@ -166,3 +156,12 @@ ${users_text}
 ```
 
 **注意**：请以纯 JSON 格式返回，不要包含 markdown 代码块标记。"""
+
+
+prompt_registry.register(
+    "user_title",
+    file="user_title_prompt.txt",
+    default=_DEFAULT_PROMPT,
+    dynamic="users_text",
+    static=("max_user_titles",),
+)
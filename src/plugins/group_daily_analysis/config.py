@@ -1,8 +1,8 @@
 from pathlib import Path
 from typing import Literal
 
-from nonebot import get_plugin_config
-from pydantic import BaseModel, Field
+from nonebot import get_plugin_config, logger
+from pydantic import BaseModel, Field, field_validator
 
 
 class LLMSettings(BaseModel):
@@ -39,6 +39,9 @@ class RenderSettings(BaseModel):
     )
     device_scale_factor: float = Field(default=1.8, description="渲染分辨率倍率")
     render_timeout: int = Field(default=50000, description="渲染超时时间（毫秒）")
+    max_concurrent_renders: int = Field(
+        default=2, description="最大并发图片渲染数，超出时降级为文本报告"
+    )
 
 
 class AutoAnalysisSettings(BaseModel):
@@ -72,8 +75,8 @@ class PluginConfig(BaseModel):
 
     analysis_days: int = Field(default=1, description="默认分析天数")
     min_messages: int = Field(default=20, description="最小消息数阈值")
-    output_format: str = Field(
-        default="image", description="输出格式 (image/text/html)"
+    output_format: Literal["image", "text", "markdown"] = Field(
+        default="image", description="输出格式 (image/text/markdown)"
     )
     llm: LLMSettings = Field(default_factory=LLMSettings)
     features: FeatureToggles = Field(default_factory=FeatureToggles)
@@ -81,6 +84,15 @@ class PluginConfig(BaseModel):
     auto_analysis: AutoAnalysisSettings = Field(default_factory=AutoAnalysisSettings)
     incremental: IncrementalSettings = Field(default_factory=IncrementalSettings)
 
+    @field_validator("output_format", mode="before")
+    @classmethod
+    def _migrate_output_format(cls, value: object) -> object:
+        # 旧版本中 image 以外的取值均输出文本报告
+        if value == "html":
+            logger.warning("output_format=html 已弃用，按 text 处理")
+            return "text"
+        return value
+
 
 class Config(BaseModel):
     """插件主配置（顶层嵌套）"""
@@ -2,6 +2,10 @@
 
 from nonebot import get_driver
 
+from src.service.task import call_soon
+
+from ..analyzers.prompts import prompt_registry
+from ..services.avatar_store import avatar_store
 from .analysis import matcher as analysis  # noqa: F401
 from .scheduler_hook import setup_scheduled_jobs
 
@@ -10,5 +14,7 @@ driver = get_driver()
 
 @driver.on_startup
 async def _on_startup() -> None:
-    """启动时注册定时任务。"""
+    """启动时注册定时任务，预加载提示词模板，清理过期头像文件。"""
     setup_scheduled_jobs()
+    prompt_registry.load_all()
+    call_soon(avatar_store.prune)
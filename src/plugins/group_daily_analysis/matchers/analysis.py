@@ -17,7 +17,6 @@ from nonebot_plugin_uninfo import Uninfo
 
 from src.plugins.trusted import TrustedUser
 
-from ..config import config
 from ..persistence.subscription import (
     AnalysisSubscription,
     add_subscription,
@@ -25,8 +24,8 @@ from ..persistence.subscription import (
     remove_subscription,
     subscriptions,
 )
-from ..rendering import render_image
-from ..services.analysis_service import AnalysisResult, run_daily_analysis
+from ..rendering import render_report
+from ..services.analysis_service import run_daily_analysis
 
 alc = Alconna(
     "group_analysis",
@@ -161,61 +160,4 @@ async def handle_analysis(
     if result is None:
         await UniMessage.text("未找到足够的群聊记录").finish(reply_to=True)
 
-    await _send_report(result)
-
-
-# ── 报告发送调度 ─────────────────────────────────────────
-
-
-async def _send_report(result: AnalysisResult) -> None:
-    """根据配置选择输出格式发送报告。图片失败时自动降级为文本。"""
-    if config.output_format == "image":
-        image_bytes = await render_image(result)
-        if image_bytes:
-            await UniMessage.image(raw=image_bytes).finish()
-        # 图片渲染失败，降级文本
-    await UniMessage.text(_format_text_report(result)).finish()
-
-
-# ── 文本报告格式化 ───────────────────────────────────────
-
-
-def _format_text_report(result: AnalysisResult) -> str:
-    """生成纯文本格式的分析报告。"""
-    lines = [
-        f"📊 {result.group_name} 群聊分析报告",
-        f"消息数: {result.statistics.message_count} | "
-        f"参与者: {result.statistics.participant_count} | "
-        f"活跃时段: {result.statistics.most_active_period}",
-        "",
-    ]
-
-    if result.topics:
-        lines.append("📌 话题总结:")
-        for i, t in enumerate(result.topics, 1):
-            lines.append(f"  {i}. {t.topic}")
-            lines.append(f"     {t.detail}")
-        lines.append("")
-
-    if result.user_titles:
-        lines.append("👤 用户画像:")
-        lines.extend(
-            f"  [{u.title}] {u.name} ({u.mbti}): {u.reason}" for u in result.user_titles
-        )
-        lines.append("")
-
-    if result.golden_quotes:
-        lines.append("💬 金句:")
-        lines.extend(f"  「{q.content}」—— {q.sender}" for q in result.golden_quotes)
-        lines.append("")
-
-    if result.chat_quality:
-        qr = result.chat_quality
-        lines.append(f"📈 {qr.title}")
-        lines.extend(
-            f"  • {d.name} ({d.percentage:.0f}%): {d.comment}" for d in qr.dimensions
-        )
-        if qr.summary:
-            lines.append(f"  总结: {qr.summary}")
-
-    return "\n".join(lines)
+    await (await render_report(result)).finish()
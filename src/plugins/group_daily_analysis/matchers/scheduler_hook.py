@@ -4,13 +4,13 @@ import time as time_mod
 
 from apscheduler.triggers.cron import CronTrigger
 from nonebot.log import logger
-from nonebot_plugin_alconna import Target, UniMessage
+from nonebot_plugin_alconna import Target
 from nonebot_plugin_apscheduler import scheduler
 
 from ..config import config
 from ..persistence.incremental_store import IncrementalStore
 from ..persistence.subscription import subscriptions
-from ..rendering import render_image
+from ..rendering import render_report
 from ..services.analysis_service import (
     AnalysisResult,
     run_daily_analysis,
@@ -172,31 +172,5 @@ async def _incremental_analysis_job() -> None:
 
 
 async def _send_report(result: AnalysisResult, target: Target) -> None:
-    """根据配置发送报告，图片失败时降级为文本。"""
-    if config.output_format == "image":
-        image_bytes = await render_image(result)
-        if image_bytes:
-            await UniMessage.image(raw=image_bytes).send(target)
-            return
-
-    await UniMessage.text(_format_text_report(result)).send(target)
-
-
-def _format_text_report(result: AnalysisResult) -> str:
-    """生成纯文本报告。"""
-    lines = [
-        f"📊 {result.group_name} 群聊日报",
-        f"消息: {result.statistics.message_count} | "
-        f"参与者: {result.statistics.participant_count}",
-    ]
-
-    if result.topics:
-        lines.append("\n📌 话题:")
-        for i, t in enumerate(result.topics[:5], 1):
-            lines.append(f"  {i}. {t.topic} - {t.detail[:50]}")
-
-    if result.golden_quotes:
-        lines.append("\n💬 金句:")
-        lines.extend(f"  「{q.content[:30]}」" for q in result.golden_quotes[:3])
-
-    return "\n".join(lines)
+    """根据配置发送报告，图片渲染失败、繁忙或超时时降级为文本。"""
+    await (await render_report(result)).send(target)
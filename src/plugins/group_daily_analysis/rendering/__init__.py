@@ -1,3 +1,11 @@
-from .generator import render_image
+from .generator import render_html, render_image
+from .output import render_report
+from .text import render_markdown, render_text
 
-__all__ = ["render_image"]
+__all__ = [
+    "render_html",
+    "render_image",
+    "render_markdown",
+    "render_report",
+    "render_text",
+]
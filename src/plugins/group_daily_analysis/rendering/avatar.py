@@ -1,55 +1,32 @@
-"""头像获取、下载、校验与缓存。"""
+"""头像获取与交付 — 磁盘存储 + Playwright 路由拦截。
 
-import asyncio
-import base64
-import functools
+模板中只输出形如 ``{AVATAR_ORIGIN}{ref}`` 的短引用地址，
+同一头像在 HTML 中无论出现多少次都只对应一次路由解析，
+HTML 本身不包含任何头像数据。
+"""
 
-import httpx
 from nonebot.log import logger
-from nonebot.utils import escape_tag
-from nonebot_plugin_alconna.uniseg.utils import fleep
-
-from src.service.cache import get_cache
+from playwright.async_api import Page, Route
 
 from ..domain.value_objects import UnifiedMember
-from .avatar_reuse import ReusableAvatarManager
-
-MAX_CONCURRENT_DOWNLOADS = 10
-
-# url -> base64 data uri
-_avatar_cache = get_cache("group_daily_avatar", str)
-
-_download_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
-
-
-@functools.cache
-def get_default_avatar_base64() -> str:
-    svg = (
-        '<svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
-        '<circle cx="50" cy="50" r="50" fill="#ddd"/></svg>'
-    )
-    b64 = base64.b64encode(svg.encode()).decode()
-    return f"data:image/svg+xml;base64,{b64}"
+from ..services.avatar_store import AvatarEntry, avatar_store
 
+# 渲染页面中的头像地址前缀，由 Playwright 路由拦截后从磁盘返回
+AVATAR_ORIGIN = "http://avatar.group-daily-analysis.invalid/"
+DEFAULT_AVATAR_REF = "default"
+DEFAULT_AVATAR_SRC = f"{AVATAR_ORIGIN}{DEFAULT_AVATAR_REF}"
 
-def _detect_mime(data: bytes | bytearray) -> str:
-    info = fleep.get(bytes(data[:128]))
-    if info.mimes:
-        return info.mimes[0]
-    return "image/jpeg"
-
-
-def _is_valid_image(data: bytes | bytearray) -> bool:
-    return data.startswith((b"\xff\xd8", b"\x89PNG\r\n\x1a\n", b"GIF8")) or (
-        data.startswith(b"RIFF") and b"WEBP" in data[:16]
-    )
+_DEFAULT_AVATAR_SVG = (
+    '<svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
+    '<circle cx="50" cy="50" r="50" fill="#ddd"/></svg>'
+)
 
 
 class AvatarManager:
     def __init__(self, members: set[UnifiedMember]) -> None:
         self._members = {member.user_id: member for member in members}
-        self._client = None
-        self._reuse = ReusableAvatarManager()
+        # 头像引用 (内容摘要) -> 磁盘文件
+        self._refs: dict[str, AvatarEntry] = {}
 
     def _get_avatar_url(self, uid: str) -> str | None:
         user = self._members.get(uid)
@@ -59,15 +36,10 @@ class AvatarManager:
         user = self._members.get(uid)
         return user.display_name if user else None
 
-    def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None:
-            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
-        return self._client
-
-    async def _get_avatar_data_uri(self, uid: str) -> str:
-        """获取头像 URL，下载、校验并转为 base64 Data URI。
+    async def get_avatar(self, uid: str) -> str:
+        """获取头像在渲染页面中的引用地址。
 
-        失败时返回默认灰色头像兜底，但不写入缓存以便后续重试。
+        下载失败时返回默认灰色头像的引用，用户无头像时返回空字符串。
         """
         if not uid or uid == "0":
             return ""
@@ -76,48 +48,26 @@ class AvatarManager:
         if not url:
             return ""
 
-        if cached := await _avatar_cache.get(url):
-            return cached
-
-        async with _download_semaphore:
-            try:
-                async with self._get_client().stream("GET", url) as resp:
-                    resp.raise_for_status()
-                    ait = aiter(resp.aiter_bytes())
-                    first_chunk = await anext(ait, None)
-                    if first_chunk is None or not _is_valid_image(first_chunk):
-                        logger.debug(f"头像数据无效 ({uid})")
-                        return get_default_avatar_base64()
-
-                    content = bytearray()
-                    content.extend(first_chunk)
-                    async for chunk in ait:
-                        content.extend(chunk)
-
-            except Exception as e:
-                logger.debug(f"头像下载失败 ({uid}): {escape_tag(str(e))}")
-                return get_default_avatar_base64()
-
-        mime = _detect_mime(content)
-        b64 = base64.b64encode(content).decode()
-        uri = f"data:{mime};base64,{b64}"
-        await _avatar_cache.set(url, value=uri, ttl=3 * 24 * 3600)
-        return uri
-
-    async def get_avatar(self, uid: str) -> str:
-        """获取头像 Data URI，失败时返回 None 以便使用默认头像。"""
-        uri = await self._get_avatar_data_uri(uid)
-        self.register_reuse(uri, uid)
-        return uri
-
-    def register_reuse(
-        self,
-        avatar_url: str | None,
-        avatar_key: str | None = None,
-    ) -> str | None:
-        """将头像 URL 注册为可复用资源，返回缩短的引用 ID。"""
-        return self._reuse.register(avatar_url, avatar_key)
-
-    def apply_reuse(self, html: str) -> str:
-        """将 HTML 中的头像 Data URI 替换为可复用引用。"""
-        return self._reuse.apply(html)
+        entry = await avatar_store.get(url)
+        if entry is None:
+            return DEFAULT_AVATAR_SRC
+
+        self._refs[entry.digest] = entry
+        return f"{AVATAR_ORIGIN}{entry.digest}"
+
+    async def attach(self, page: Page) -> None:
+        """在页面上注册头像路由，仅交付本次渲染登记过的头像文件。"""
+
+        async def handle(route: Route) -> None:
+            ref = route.request.url.removeprefix(AVATAR_ORIGIN)
+            entry = self._refs.get(ref)
+            if entry is None or not entry.path.exists():
+                if ref != DEFAULT_AVATAR_REF:
+                    logger.debug(f"头像文件缺失: {ref}")
+                await route.fulfill(
+                    body=_DEFAULT_AVATAR_SVG, content_type="image/svg+xml"
+                )
+                return
+            await route.fulfill(path=entry.path, content_type=entry.mime)
+
+        await page.route(f"{AVATAR_ORIGIN}**", handle)
@@ -23,6 +23,19 @@ from .sub_templates import (
 async def render_image(result: AnalysisResult) -> bytes | None:
     """将分析结果渲染为图片 bytes。
 
+    Args:
+        result: 分析结果
+    """
+    rendered = await render_html(result)
+    if rendered is None:
+        return None
+    full_html, avatar_manager = rendered
+    return await _render_to_image(full_html, avatar_manager)
+
+
+async def render_html(result: AnalysisResult) -> tuple[str, AvatarManager] | None:
+    """将分析结果渲染为完整 HTML，同时返回需挂载到页面上的头像管理器。
+
     Args:
         result: 分析结果
     """
@@ -72,17 +85,17 @@ async def render_image(result: AnalysisResult) -> bytes | None:
         "completion_tokens": result.token_usage.completion_tokens,
     }
 
-    # ── 3. 渲染主模板 + 截图 ───────────────────────────────
+    # ── 3. 渲染主模板 ─────────────────────────────────────
     full_html = await template.render("image_template.html.jinja2", **render_data)
-    full_html = avatar_manager.apply_reuse(full_html)
-    return await _render_to_image(full_html)
+    return full_html, avatar_manager
 
 
-async def _render_to_image(html: str) -> bytes | None:
+async def _render_to_image(html: str, avatar_manager: AvatarManager) -> bytes | None:
     try:
         async with get_new_page(
             device_scale_factor=config.render.device_scale_factor
         ) as page:
+            await avatar_manager.attach(page)
             await page.set_content(html, wait_until="networkidle")
             return await page.screenshot(full_page=True, type="png")
     except Exception:
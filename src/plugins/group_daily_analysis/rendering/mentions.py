@@ -4,7 +4,7 @@ import asyncio
 import html
 import re
 
-from .avatar import AvatarManager, get_default_avatar_base64
+from .avatar import DEFAULT_AVATAR_SRC, AvatarManager
 
 
 def _escape_text(text: str) -> str:
@@ -41,32 +41,17 @@ async def render_mentions(text: str, avatar_manager: AvatarManager) -> str:
     )
     img_style = (
         "width:18px;height:18px;border-radius:50%;margin-right:4px;display:block;"
+        "object-fit:cover;flex-shrink:0;"
     )
     name_style = "font-size:0.85em;color:inherit;font-weight:500;line-height:1;"
 
     def _replace(m: re.Match[str]) -> str:
         uid = m.group(1)
-        avatar = avatar_map.get(uid, "")
-        if not avatar:
-            avatar = get_default_avatar_base64()
+        avatar = avatar_map.get(uid) or DEFAULT_AVATAR_SRC
         name = nickname_map.get(uid) or uid
-
-        ref = avatar_manager.register_reuse(avatar, uid)
-        if ref:
-            avatar_html = (
-                '<span class="user-capsule-avatar" '
-                f'data-avatar-ref="{html.escape(ref, quote=True)}" '
-                f'style="{img_style}background-size:cover;background-position:center;'
-                'background-repeat:no-repeat;flex-shrink:0;"></span>'
-            )
-        else:
-            avatar_html = (
-                f'<img src="{html.escape(avatar, quote=True)}" style="{img_style}">'
-            )
-
         return (
             f'<span class="user-capsule" style="{capsule_style}">'
-            f"{avatar_html}"
+            f'<img src="{html.escape(avatar, quote=True)}" style="{img_style}">'
             f'<span style="{name_style}">{html.escape(name)}</span>'
             "</span>"
         )
@@ -0,0 +1,43 @@
+"""报告输出 — 按配置选择输出格式，图片渲染繁忙或超时时降级为文本。"""
+
+import asyncio
+
+from nonebot.log import logger
+from nonebot_plugin_alconna import UniMessage
+
+from ..config import config
+from ..services.analysis_service import AnalysisResult
+from .generator import render_image
+from .text import render_markdown, render_text
+
+_render_semaphore = asyncio.Semaphore(config.render.max_concurrent_renders)
+
+
+async def _try_render_image(result: AnalysisResult) -> bytes | None:
+    """尝试渲染图片，浏览器繁忙或渲染超时时返回 None。"""
+    if _render_semaphore.locked():
+        logger.warning("图片渲染繁忙，降级为文本报告")
+        return None
+
+    async with _render_semaphore:
+        try:
+            async with asyncio.timeout(config.render.render_timeout / 1000):
+                return await render_image(result)
+        except TimeoutError:
+            logger.warning(
+                f"图片渲染超时 ({config.render.render_timeout}ms)，降级为文本报告"
+            )
+            return None
+
+
+async def render_report(result: AnalysisResult) -> UniMessage:
+    """根据配置生成报告消息。"""
+    match config.output_format:
+        case "image":
+            if image := await _try_render_image(result):
+                return UniMessage.image(raw=image)
+            return UniMessage.text(render_text(result))
+        case "markdown":
+            return UniMessage.text(render_markdown(result))
+        case _:
+            return UniMessage.text(render_text(result))
@@ -0,0 +1,134 @@
+"""纯文本 / Markdown 报告渲染 — 无需浏览器，毫秒级生成。"""
+
+import re
+
+from ..services.analysis_service import AnalysisResult
+
+_MENTION_PATTERN = re.compile(r"\[(\d+)\]")
+
+
+def _resolve_mentions(text: str, result: AnalysisResult) -> str:
+    """将 [uid] 格式的用户引用替换为 @昵称。"""
+    if "[" not in text:
+        return text
+
+    nicknames = {m.user_id: m.display_name for m in result.members}
+
+    def replace(m: re.Match[str]) -> str:
+        uid = m.group(1)
+        return f"@{nicknames.get(uid, uid)}"
+
+    return _MENTION_PATTERN.sub(replace, text)
+
+
+def render_text(result: AnalysisResult) -> str:
+    """生成纯文本格式的分析报告。"""
+    lines = [
+        f"📊 {result.group_name} 群聊分析报告",
+        (
+            f"消息数: {result.statistics.message_count} | "
+            f"参与者: {result.statistics.participant_count} | "
+            f"活跃时段: {result.statistics.most_active_period}"
+        ),
+        "",
+    ]
+
+    if result.topics:
+        lines.append("📌 话题总结:")
+        for i, t in enumerate(result.topics, 1):
+            lines.append(f"  {i}. {t.topic}")
+            lines.append(f"     {_resolve_mentions(t.detail, result)}")
+        lines.append("")
+
+    if result.user_titles:
+        lines.append("👤 用户画像:")
+        lines.extend(
+            f"  [{u.title}] {u.name} ({u.mbti}): {u.reason}" for u in result.user_titles
+        )
+        lines.append("")
+
+    if result.golden_quotes:
+        lines.append("💬 金句:")
+        lines.extend(f"  「{q.content}」—— {q.sender}" for q in result.golden_quotes)
+        lines.append("")
+
+    if result.chat_quality:
+        qr = result.chat_quality
+        lines.append(f"📈 {qr.title}")
+        lines.extend(
+            f"  • {d.name} ({d.percentage:.0f}%): {d.comment}" for d in qr.dimensions
+        )
+        if qr.summary:
+            lines.append(f"  总结: {qr.summary}")
+
+    return "\n".join(lines).rstrip()
+
+
+def _render_hourly_bars(hourly_activity: dict[int, int], width: int = 12) -> str:
+    peak = max(hourly_activity.values(), default=0)
+    if peak <= 0:
+        return ""
+    return "\n".join(
+        f"{hour:02d} {"█" * round(count / peak * width)} {count}"
+        for hour in range(24)
+        if (count := hourly_activity.get(hour, 0))
+    )
+
+
+def render_markdown(result: AnalysisResult) -> str:
+    """生成 Markdown 格式的分析报告。"""
+    stats = result.statistics
+    lines = [
+        f"# 📊 {result.group_name} 群聊分析报告",
+        "",
+        f"- 消息数: **{stats.message_count}**",
+        f"- 参与者: **{stats.participant_count}**",
+        f"- 总字数: **{stats.total_characters}**",
+        f"- 活跃时段: **{stats.most_active_period}**",
+        "",
+    ]
+
+    if bars := _render_hourly_bars(stats.activity.hourly_activity):
+        lines.extend(["## ⏰ 活跃分布", "", "```", bars, "```", ""])
+
+    if result.topics:
+        lines.extend(["## 📌 话题总结", ""])
+        for i, t in enumerate(result.topics, 1):
+            lines.append(f"{i}. **{t.topic}**")
+            if t.contributors:
+                lines.append(f"   - 参与者: {"、".join(t.contributors)}")
+            lines.append(f"   - {_resolve_mentions(t.detail, result)}")
+        lines.append("")
+
+    if result.user_titles:
+        lines.extend(["## 👤 用户画像", ""])
+        lines.extend(
+            f"- **{u.title}** · {u.name} (`{u.mbti}`): {u.reason}"
+            for u in result.user_titles
+        )
+        lines.append("")
+
+    if result.golden_quotes:
+        lines.extend(["## 💬 金句", ""])
+        for q in result.golden_quotes:
+            lines.append(f"> {q.content}")
+            lines.append(f"> —— {q.sender}")
+            lines.append("")
+
+    if result.chat_quality:
+        qr = result.chat_quality
+        lines.extend([f"## 📈 {qr.title}", ""])
+        if qr.subtitle:
+            lines.extend([f"*{qr.subtitle}*", ""])
+        lines.extend(
+            f"- **{d.name}** ({d.percentage:.0f}%): {d.comment}" for d in qr.dimensions
+        )
+        if qr.summary:
+            lines.extend(["", f"**总结**: {qr.summary}"])
+        lines.append("")
+
+    usage = result.token_usage
+    if usage.total_tokens:
+        lines.append(f"Token 消耗: {usage.total_tokens}")
+
+    return "\n".join(lines).rstrip()
@@ -11,6 +11,7 @@ from nonebot.log import logger
 from nonebot_plugin_uninfo import Session
 
 from src.service.llm import TokenUsage
+from src.service.task import call_soon
 
 from ..analyzers.chat_quality import ChatQualityAnalyzer
 from ..analyzers.golden_quote import GoldenQuoteAnalyzer
@@ -29,6 +30,7 @@ from ..domain.models import (
 )
 from ..domain.value_objects import UnifiedMember, UnifiedMessage
 from ..persistence.incremental_store import IncrementalStore
+from ..services.avatar_store import avatar_store
 from ..services.incremental_merge import IncrementalMergeService
 from ..services.message_service import fetch_group_messages
 
@@ -78,6 +80,9 @@ async def run_daily_analysis(
         )
         return None
 
+    # 1.5. 后台预取头像，与 LLM 分析并行
+    call_soon(avatar_store.prefetch, [m.avatar_url for m in members if m.avatar_url])
+
     # 2. 基础统计
     statistics = _calculate_statistics(messages)
 
@@ -0,0 +1,193 @@
+"""头像磁盘存储 — 内容寻址的持久化头像缓存，支持条件请求重新验证。
+
+头像文件以内容 SHA-256 命名保存在插件缓存目录，URL → 文件的元数据
+记录在缓存服务中。过期的元数据通过 ETag / Last-Modified 条件请求重新验证，
+未变化时仅刷新检查时间而不重新下载。
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import time
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import anyio
+import httpx
+from nonebot import get_driver
+from nonebot.log import logger
+from nonebot.utils import escape_tag
+from nonebot_plugin_alconna.uniseg.utils import fleep
+from nonebot_plugin_localstore import get_plugin_cache_dir
+
+from src.service.cache import get_cache
+from src.utils import SingleFlight
+
+AVATAR_DIR = get_plugin_cache_dir() / "avatars"
+MAX_CONCURRENT_DOWNLOADS = 10
+# 元数据超过此时长后需要重新验证
+REVALIDATE_AFTER = 24 * 3600
+# 元数据与磁盘文件的最长保留时间
+ENTRY_TTL = 30 * 24 * 3600
+
+
+def _detect_mime(data: bytes | bytearray) -> str:
+    info = fleep.get(bytes(data[:128]))
+    if info.mimes:
+        return info.mimes[0]
+    return "image/jpeg"
+
+
+def _is_valid_image(data: bytes | bytearray) -> bool:
+    return data.startswith((b"\xff\xd8", b"\x89PNG\r\n\x1a\n", b"GIF8")) or (
+        data.startswith(b"RIFF") and b"WEBP" in data[:16]
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class AvatarEntry:
+    """头像 URL 对应的磁盘文件元数据"""
+
+    digest: str
+    mime: str
+    etag: str | None = None
+    last_modified: str | None = None
+    checked_at: float = 0.0
+
+    @property
+    def path(self) -> Path:
+        return AVATAR_DIR / self.digest
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.checked_at < REVALIDATE_AFTER
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# url -> AvatarEntry
+_entry_cache = get_cache("group_daily_avatar_entry", AvatarEntry)
+
+
+class AvatarStore:
+    """内容寻址的头像存储，同一 URL 的并发请求只下载一次。"""
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        self._inflight = SingleFlight[str, AvatarEntry | None]()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def get(self, url: str) -> AvatarEntry | None:
+        """获取头像文件元数据，必要时下载或重新验证。失败时返回 None。"""
+        return await self._inflight.run(url, lambda: self._resolve(url))
+
+    async def prefetch(self, urls: Iterable[str]) -> None:
+        """批量预取头像，可在 LLM 分析进行时后台调用。"""
+        urls = set(urls)
+        if not urls:
+            return
+
+        start = time.perf_counter()
+        entries = await asyncio.gather(*(self.get(url) for url in urls))
+        logger.opt(colors=True).debug(
+            f"头像预取完成: <g>{sum(e is not None for e in entries)}</>/{len(urls)}"
+            f" (<y>{time.perf_counter() - start:.2f}s</>)"
+        )
+
+    async def _resolve(self, url: str) -> AvatarEntry | None:
+        entry = await _entry_cache.get(url)
+        if entry is not None and not entry.path.exists():
+            entry = None
+        if entry is not None and entry.is_fresh:
+            return entry
+
+        async with self._semaphore:
+            try:
+                return await self._fetch(url, entry)
+            except Exception as e:
+                logger.debug(f"头像下载失败 ({url}): {escape_tag(str(e))}")
+                # 重新验证失败时继续使用旧文件
+                return entry
+
+    async def _fetch(self, url: str, entry: AvatarEntry | None) -> AvatarEntry | None:
+        headers = entry.conditional_headers() if entry is not None else {}
+        async with self._get_client().stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 304 and entry is not None:
+                entry = dataclasses.replace(entry, checked_at=time.time())
+                await anyio.Path(entry.path).touch()
+                await _entry_cache.set(url, entry, ttl=ENTRY_TTL)
+                return entry
+
+            resp.raise_for_status()
+            ait = aiter(resp.aiter_bytes())
+            first_chunk = await anext(ait, None)
+            if first_chunk is None or not _is_valid_image(first_chunk):
+                logger.debug(f"头像数据无效 ({url})")
+                return None
+
+            content = bytearray(first_chunk)
+            async for chunk in ait:
+                content.extend(chunk)
+
+        digest = hashlib.sha256(content).hexdigest()
+        path = anyio.Path(AVATAR_DIR / digest)
+        if not await path.exists():
+            await path.parent.mkdir(parents=True, exist_ok=True)
+            # 内容相同的头像可能同时下载，各自写入不同的临时文件，残留的由 prune 清理
+            tmp = path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")
+            await tmp.write_bytes(content)
+            await tmp.replace(path)
+        else:
+            await path.touch()
+
+        entry = AvatarEntry(
+            digest=digest,
+            mime=_detect_mime(content),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            checked_at=time.time(),
+        )
+        await _entry_cache.set(url, entry, ttl=ENTRY_TTL)
+        return entry
+
+    @staticmethod
+    def prune(max_age: float = ENTRY_TTL) -> int:
+        """删除长时间未被使用的头像文件，返回删除数量。"""
+        if not AVATAR_DIR.exists():
+            return 0
+
+        deadline = time.time() - max_age
+        removed = 0
+        for path in AVATAR_DIR.iterdir():
+            if path.is_file() and path.stat().st_mtime < deadline:
+                path.unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            logger.info(f"已清理 {removed} 个过期头像文件")
+        return removed
+
+
+avatar_store = AvatarStore()
+
+
+@get_driver().on_shutdown
+async def _close_avatar_store() -> None:
+    await avatar_store.close()
@@ -12,8 +12,6 @@ from nonebot_plugin_alconna.uniseg import (
     get_message_id,
 )
 
-from .utils import with_client_ctx
-
 type _Message = Message[MessageSegment[_Message]]
 type ConverterPred = Callable[[MessageSegment[_Message]], bool]
 type ConverterCall[TC: MessageConverter, TMS: MessageSegment] = Callable[
@@ -26,15 +24,23 @@ type _ConverterPreds[TC: MessageConverter] = dict[
     ConverterCall[TC, MessageSegment[_Message]],
     tuple[ConverterPred, ...],
 ]
+type _ConverterTable[K, TC: MessageConverter] = dict[
+    K, ConverterCall[TC, MessageSegment[_Message]] | None
+]
 
 CONVERTERS: dict[str | None, type[MessageConverter[Bot, _Message]]] = {}
 SENDERS: dict[str | None, type[MessageSender[Bot]]] = {}
 
 _PREDS_ATTR = "__predicates__"
+_TARGETS_ATTR = "__targets__"
 
 
 class MessageConverter[TB: Bot, TM: Message](abc.ABC):
     _converter_: ClassVar[_ConverterPreds[MessageConverter[TB, TM]]] = {}
+    # 仅按类型字符串匹配时的分派表 seg.type -> call，含类谓词时为 None
+    _dispatch_: ClassVar[_ConverterTable[str, MessageConverter] | None] = {}
+    # 含类谓词时的分派缓存 (type(seg), seg.type) -> call，首次遇到时逐条匹配填充
+    _dispatch_cache_: ClassVar[_ConverterTable[tuple[type, str], MessageConverter]] = {}
 
     src_bot: TB
     dst_bot: Bot | None
@@ -67,17 +73,47 @@ class MessageConverter[TB: Bot, TM: Message](abc.ABC):
             and callable(call)
             and (preds := getattr(call, _PREDS_ATTR, None)) is not None
         }
+        cls._build_dispatch()
 
-        cls.convert = with_client_ctx(cls.convert)  # ty:ignore[invalid-assignment]
+    @classmethod
+    def _build_dispatch(cls) -> None:
+        """按注册顺序构建分派表，同一类型取第一个匹配的处理函数
+
+        谓词只依赖消息段的类型字符串与类，匹配结果对同一 (类, 类型) 恒定，
+        因此含类谓词时按 (类, 类型) 缓存逐条匹配的结果即可
+        """
+        cls._dispatch_cache_ = {}
+        dispatch: _ConverterTable[str, MessageConverter] = {}
+        for call in cls._converter_:
+            for target in getattr(call, _TARGETS_ATTR, ()):
+                if not isinstance(target, str):
+                    cls._dispatch_ = None
+                    return
+                dispatch.setdefault(target, call)
+        cls._dispatch_ = dispatch
+
+    def _match(
+        self, seg: MessageSegment
+    ) -> ConverterCall[MessageConverter, MessageSegment[_Message]] | None:
+        for call, preds in self._converter_.items():
+            if any(pred(seg) for pred in preds):
+                return call
+        return None
 
     async def __default(self, seg: MessageSegment) -> Segment | list[Segment] | None:
         return (fn := get_builder(self.src_bot)) and fn.convert(seg)
 
     def _find_fn[TMS: MessageSegment](self, seg: TMS) -> BoundConverterCall[TMS]:
-        for call, preds in self._converter_.items():
-            if any(pred(seg) for pred in preds):
-                return functools.partial(call, self)
-        return self.__default
+        if self._dispatch_ is not None:
+            call = self._dispatch_.get(seg.type)
+        else:
+            key = (type(seg), seg.type)
+            if key in self._dispatch_cache_:
+                call = self._dispatch_cache_[key]
+            else:
+                call = self._dispatch_cache_[key] = self._match(seg)
+
+        return functools.partial(call, self) if call is not None else self.__default
 
 
 class MessageSender[TB: Bot](abc.ABC):
@@ -109,6 +145,7 @@ def converts[C: ConverterCall](*target: str | type[MessageSegment]) -> Callable[
     def decorator(call: C) -> C:
         preds = tuple(_make_pred(t) for t in target)
         setattr(call, _PREDS_ATTR, preds)
+        setattr(call, _TARGETS_ATTR, target)
         return call
 
     return decorator
@@ -1,10 +1,13 @@
 import contextlib
 import json
+import re
+import time
 from collections.abc import Iterable
 from copy import deepcopy
 from typing import Any, override
 from weakref import WeakKeyDictionary
 
+import anyio
 import nonebot
 import yarl
 from nonebot.adapters import Event as BaseEvent
@@ -22,14 +25,94 @@ from nonebot_plugin_alconna import uniseg as u
 
 from src.plugins.upload_cos import upload_cos
 from src.service.task import call_soon
+from src.utils import SingleFlight
 
 from ..adapter import converts
-from ..database import set_cache_value
-from ..utils import async_client, check_url_ok, guess_url_type, solve_url_302
+from ..client_pool import async_client
+from ..database import set_cache_values
+from ..media import MEDIA_TTL, HostedMedia, host_media
+from ..utils import check_url_ok, guess_url_type, solve_url_302
 from .common import MessageConverter as BaseMessageConverter
 from .common import MessageSender as BaseMessageSender
 
 bot_platform_cache: WeakKeyDictionary[Bot, str] = WeakKeyDictionary()
+# rkey 的缓存时长
+RKEY_TTL = 30 * 60
+# 各实现在媒体消息段中提供的内容标识字段
+MEDIA_ID_KEYS = ("file_unique", "md5", "file_id")
+# 以文件摘要命名的文件名，如 go-cqhttp 与 NapCat 的 "<md5>.jpg"
+DIGEST_FILE_NAME = re.compile(r"[0-9a-fA-F]{32,}(\.\w+)?")
+# 缓存的 rkey 不可用时，两次刷新的最短间隔
+RKEY_MIN_REFRESH = 60
+# bot self_id -> (获取时间, rkey)
+rkey_cache: dict[str, tuple[float, tuple[str, ...]]] = {}
+rkey_refresh = SingleFlight[str, tuple[str, ...]]()
+# 解析合并转发消息时同时转换的节点数
+FORWARD_CONCURRENCY = 8
+
+
+class ForwardBatch:
+    """一次性解析整棵合并转发消息树
+
+    节点中嵌套的合并转发在转换该节点前解析，相同 ID 只解析一次，
+    各层节点并发转换（总数受 FORWARD_CONCURRENCY 限制），
+    全部完成后在同一事务中写入缓存。
+    """
+
+    def __init__(self, processor: MessageConverter) -> None:
+        self.processor = processor
+        self.limiter = anyio.CapacityLimiter(FORWARD_CONCURRENCY)
+        self.entries: dict[str, list[dict[str, object]]] = {}
+        self._resolving: dict[str, anyio.Event] = {}
+
+    def is_cached(self, forward_id: str) -> bool:
+        """合并转发消息是否有节点需要写入缓存，须在其解析完成后调用"""
+        return forward_id in self.entries
+
+    async def resolve(self, forward_id: str, content: list[dict[str, Any]]) -> None:
+        """解析合并转发消息，相同 ID 等待已开始的解析完成"""
+        if (done := self._resolving.get(forward_id)) is not None:
+            await done.wait()
+            return
+
+        done = self._resolving[forward_id] = anyio.Event()
+        try:
+            await self._resolve(forward_id, content)
+        finally:
+            done.set()
+
+    async def _resolve(self, forward_id: str, content: list[dict[str, Any]]) -> None:
+        nodes: list[dict[str, object] | None] = [None] * len(content)
+
+        async def convert(index: int, item: dict[str, Any]) -> None:
+            sender: dict[str, str] = item.get("sender", {})
+            msg = item.get("message")
+            if not msg:
+                return
+            nick = (
+                sender.get("card")
+                or sender.get("nickname")
+                or sender.get("user_id")
+                or ""
+            )
+
+            msg = Message([MessageSegment(**seg) for seg in msg])
+            # 先解析嵌套的合并转发，转换本节点时即可确定其是否写入缓存；
+            # 等待期间不占用并发名额，避免外层节点占满名额后互相等待
+            async with anyio.create_task_group() as tg:
+                for seg in msg["forward"]:
+                    if nested := seg.data.get("content"):
+                        tg.start_soon(self.resolve, seg.data["id"], nested)
+            async with self.limiter:
+                unimsg = await self.processor.convert(msg)
+            nodes[index] = {"nick": nick, "msg": unimsg.dump(media_save_dir=False)}
+
+        async with anyio.create_task_group() as tg:
+            for index, item in enumerate(content):
+                tg.start_soon(convert, index, item)
+
+        if cache_data := [node for node in nodes if node is not None]:
+            self.entries[forward_id] = cache_data
 
 
 class MessageConverter(
@@ -37,6 +120,7 @@ class MessageConverter(
     adapter=Adapter.get_name(),
 ):
     do_resolve_url: bool = True
+    forward_batch: ForwardBatch | None = None
 
     @override
     @classmethod
@@ -93,13 +177,41 @@ class MessageConverter(
         self.logger.debug(f"从 Lagrange 获取 rkey: {rkeys}")
         return rkeys
 
-    async def get_rkey(self) -> Iterable[str]:
+    async def _fetch_rkey(self) -> tuple[str, ...]:
         platform = await self.get_platform()
         if "lagrange" in platform:
-            return await self._get_rkey_lagrange()
+            return tuple(await self._get_rkey_lagrange())
         if "napcat" in platform:
-            return await self._get_rkey_napcat()
-        return await self._get_rkey_api()
+            return tuple(await self._get_rkey_napcat())
+        return tuple(await self._get_rkey_api())
+
+    async def _refresh_rkey(self) -> tuple[str, ...]:
+        rkeys = await self._fetch_rkey()
+        rkey_cache[self.src_bot.self_id] = (time.monotonic(), rkeys)
+        return rkeys
+
+    async def get_rkey(self, *, failed: bool = False) -> tuple[str, ...]:
+        """获取缓存的 rkey，过期或 failed 时刷新，同一 Bot 的并发刷新只请求一次
+
+        Args:
+            failed: 缓存的 rkey 已不可用，距上次刷新超过 RKEY_MIN_REFRESH 秒时重新获取
+        """
+        key = self.src_bot.self_id
+        if cached := rkey_cache.get(key):
+            fetched_at, rkeys = cached
+            age = time.monotonic() - fetched_at
+            if age < (RKEY_MIN_REFRESH if failed else RKEY_TTL):
+                return rkeys
+
+        return await rkey_refresh.run(key, self._refresh_rkey)
+
+    async def _try_rkeys(self, url: yarl.URL, rkeys: Iterable[str]) -> str | None:
+        for rkey in rkeys:
+            updated = url.update_query(rkey=rkey).human_repr()
+            if await check_url_ok(updated):
+                self.logger.debug(f"更新 rkey: {url} -> {updated}")
+                return updated
+        return None
 
     async def check_rkey(self, url: str) -> str | None:
         if await check_url_ok(url):
@@ -108,29 +220,58 @@ class MessageConverter(
         if "rkey" not in (parsed := yarl.URL(url)).query:
             return None
 
-        for rkey in await self.get_rkey():
-            updated = parsed.update_query(rkey=rkey).human_repr()
-            if await check_url_ok(updated):
-                self.logger.debug(f"更新 rkey: {url} -> {updated}")
-                return updated
+        rkeys = await self.get_rkey()
+        if updated := await self._try_rkeys(parsed, rkeys):
+            return updated
 
+        # 缓存的 rkey 可能已失效
+        refreshed = await self.get_rkey(failed=True)
+        if refreshed != rkeys:
+            return await self._try_rkeys(parsed, refreshed)
         return None
 
-    async def url_to_image(self, url: str) -> u.Image | None:
-        info = await guess_url_type(url)
-        if info is None:
+    def media_identity(self, segment: MessageSegment, url: str) -> str | None:
+        """媒体文件标识，无法确定时返回 None
+
+        优先使用实现提供的内容标识，其次是摘要形式的文件名，最后是去掉 rkey 的
+        下载链接。部分实现对不同文件使用相同的通用文件名（如 image.png），
+        其他形式的文件名不作为标识。
+        """
+        prefix = f"{self.src_bot.type}:{segment.type}"
+        for key in MEDIA_ID_KEYS:
+            if isinstance(value := segment.data.get(key), str) and value:
+                return f"{prefix}:{key}:{value}"
+
+        file = segment.data.get("file")
+        if isinstance(file, str) and DIGEST_FILE_NAME.fullmatch(file):
+            return f"{prefix}:file:{file.lower()}"
+
+        parsed = yarl.URL(url)
+        if parsed.scheme not in ("http", "https") or not parsed.host:
             return None
+        query = {k: v for k, v in parsed.query.items() if k != "rkey"}
+        return f"{prefix}:url:{parsed.with_query(query)}"
 
-        name = f"{hash(url)}.{info.extension}"
-        key = self.get_cos_key(name)
+    async def url_to_image(self, url: str, identity: str | None) -> u.Image | None:
+        async def upload(digest: str) -> HostedMedia | None:
+            if (checked := await self.check_rkey(url)) is None:
+                return None
+            if (info := await guess_url_type(checked)) is None:
+                return None
 
-        try:
-            url = await upload_cos(url, key)
-        except Exception as err:
-            self.logger.opt(exception=err).debug("上传图片失败，使用原始链接")
+            name = f"{digest}.{info.extension}"
+            try:
+                hosted = await upload_cos(checked, self.get_cos_key(name), MEDIA_TTL)
+            except Exception as err:
+                self.logger.opt(exception=err).debug("上传图片失败，使用原始链接")
+                return HostedMedia(checked, name, info.mime, uploaded=False)
+            return HostedMedia(hosted, name, info.mime)
+
+        if (media := await host_media(identity, upload)) is None:
+            return None
 
-        self.logger.debug(f"上传图片: {escape_tag(url)}")
-        return u.Image(url=url, mimetype=info.mime, name=name)
+        self.logger.debug(f"上传图片: {escape_tag(media.url)}")
+        return u.Image(url=media.url, mimetype=media.mime, name=media.name)
 
     async def cache_forward(
         self,
@@ -140,36 +281,23 @@ class MessageConverter(
         if not content:
             return False
 
-        cache_data: list[dict[str, object]] = []
         processor = MessageConverter(self.src_bot)
         processor.do_resolve_url = False
 
-        for item in content:
-            sender: dict[str, str] = item.get("sender", {})
-            msg = item.get("message")
-            if not msg:
-                continue
-            nick = (
-                sender.get("card")
-                or sender.get("nickname")
-                or sender.get("user_id")
-                or ""
-            )
-
-            msg = Message([MessageSegment(**seg) for seg in msg])
-            unimsg = await processor.convert(msg)
-            cache_data.append({"nick": nick, "msg": unimsg.dump(media_save_dir=False)})
-
-        if cache_data:
-            await set_cache_value(
-                adapter=self.src_bot.type,
-                key=f"forward_{forward_id}",
-                value=json.dumps(cache_data),
-            )
-            self.logger.debug(f"缓存合并转发消息: {forward_id}")
-            return True
-
-        return False
+        processor.forward_batch = ForwardBatch(processor)
+        await processor.forward_batch.resolve(forward_id, content)
+        entries = processor.forward_batch.entries
+
+        await set_cache_values(
+            adapter=self.src_bot.type,
+            values={
+                f"forward_{fwd_id}": json.dumps(cache_data)
+                for fwd_id, cache_data in entries.items()
+            },
+        )
+        if entries:
+            self.logger.debug(f"缓存合并转发消息: {", ".join(entries)}")
+        return forward_id in entries
 
     async def handle_json_msg(self, data: dict[str, Any]) -> list[u.Segment]:
         meta = data.get("meta", {})
@@ -188,16 +316,24 @@ class MessageConverter(
 
         return [u.Text(f"[json消息:{json.dumps(data)}]")]
 
-    async def url_to_video(self, url: str) -> u.Video | None:
-        key = self.get_cos_key(f"{hash(url)}.mp4")
+    async def url_to_video(self, url: str, identity: str | None) -> u.Video | None:
+        async def upload(digest: str) -> HostedMedia | None:
+            if (checked := await self.check_rkey(url)) is None:
+                return None
 
-        try:
-            url = await upload_cos(url, key)
-        except Exception as err:
-            self.logger.opt(exception=err).debug("上传视频失败，使用原始链接")
+            name = f"{digest}.mp4"
+            try:
+                hosted = await upload_cos(checked, self.get_cos_key(name), MEDIA_TTL)
+            except Exception as err:
+                self.logger.opt(exception=err).debug("上传视频失败，使用原始链接")
+                return HostedMedia(checked, name, uploaded=False)
+            return HostedMedia(hosted, name)
 
-        self.logger.debug(f"上传视频: {escape_tag(url)}")
-        return u.Video(url=url)
+        if (media := await host_media(identity, upload)) is None:
+            return None
+
+        self.logger.debug(f"上传视频: {escape_tag(media.url)}")
+        return u.Video(url=media.url)
 
     @converts("at")
     async def at(self, segment: MessageSegment) -> u.Segment:
@@ -209,9 +345,8 @@ class MessageConverter(
             return None
 
         if self.do_resolve_url:
-            if (checked := await self.check_rkey(url)) and (
-                seg := await self.url_to_image(checked)
-            ):
+            identity = self.media_identity(segment, url)
+            if seg := await self.url_to_image(url, identity):
                 return seg
             return u.Text(f"[image:{url}]")
 
@@ -236,7 +371,11 @@ class MessageConverter(
         if "napcat" in await self.get_platform() and (
             content := segment.data.get("content")
         ):
-            cached = await self.cache_forward(forward_id, content)
+            if self.forward_batch is not None:
+                # 嵌套在正在解析的合并转发中，已先于外层节点解析，随外层一并写入缓存
+                cached = self.forward_batch.is_cached(forward_id)
+            else:
+                cached = await self.cache_forward(forward_id, content)
 
         segs: list[u.Segment] = [u.Text(f"[forward:{forward_id}:cache={cached}]")]
         if cached:
@@ -260,9 +399,8 @@ class MessageConverter(
             return None
 
         if self.do_resolve_url:
-            if (fixed := await self.check_rkey(url)) and (
-                seg := await self.url_to_video(fixed)
-            ):
+            identity = self.media_identity(segment, url)
+            if seg := await self.url_to_video(url, identity):
                 return seg
             return u.Text(f"[video:{url}]")
 
@@ -13,7 +13,8 @@ from nonebot_plugin_alconna import uniseg as u
 from src.plugins.upload_cos import upload_cos
 
 from ..adapter import converts
-from ..utils import download_url, guess_url_type, webm_to_gif
+from ..transcode import webm_to_gif
+from ..utils import download_url, guess_url_type
 from .common import MessageConverter as BaseMessageConverter
 from .common import MessageSender as BaseMessageSender
 
@@ -97,16 +98,19 @@ class MessageConverter(
             return u.Text(f"[image:{file_id}]")
 
         if info.mime == "video/webm":
-            if raw := await download_url(url):
-                raw = await webm_to_gif(raw)
-                return u.Image(raw=raw, mimetype="image/gif")
-            return u.Text(f"[image:{info.mime}:{file_id}]")
+            if not (raw := await download_url(url)):
+                return u.Text(f"[image:{info.mime}:{file_id}]")
+            if gif := await webm_to_gif(raw):
+                return u.Image(raw=gif, mimetype="image/gif")
 
         try:
             url = await upload_cos(url, self.get_cos_key(file_path))
         except Exception as err:
             self.logger.opt(exception=err).debug("上传文件失败")
 
+        # 无法转为 gif 的动态贴纸按原文件发送
+        if info.mime == "video/webm":
+            return u.Video(url=url, mimetype=info.mime)
         return u.Image(url=url, mimetype=info.mime)
 
     @converts("document", "video")
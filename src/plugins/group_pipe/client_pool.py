@@ -0,0 +1,158 @@
+"""共享 HTTP 连接池 — 进程内所有媒体请求复用同一个 httpx 客户端。
+
+客户端按目标主机分配独立的连接池，各主机的连接数分别受限，空闲连接保持 keep-alive，
+已安装 h2 时启用 HTTP/2。长时间没有请求的主机连接池会被定时关闭，下次请求时重建。
+"""
+
+import contextlib
+import importlib.util
+import time
+import weakref
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import httpx
+from nonebot import get_driver, logger
+from nonebot_plugin_apscheduler import scheduler
+
+from .config import config
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(slots=True)
+class HostStats:
+    """单个主机的请求统计"""
+
+    requests: int = 0
+    """ 请求数 """
+    connections: int = 0
+    """ 新建的连接数 """
+    http2: int = 0
+    """ 使用 HTTP/2 的请求数 """
+
+    @property
+    def reuse_rate(self) -> float:
+        """复用已有连接的请求比例"""
+        if not self.requests:
+            return 0.0
+        return max(0, self.requests - self.connections) / self.requests
+
+
+class _HostPool:
+    def __init__(self, transport: httpx.AsyncHTTPTransport) -> None:
+        self.transport = transport
+        self.active = 0
+        self.last_used = time.monotonic()
+        self.streams: weakref.WeakSet[object] = weakref.WeakSet()
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """响应读取完毕或关闭时释放主机连接池的占用"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, pool: _HostPool) -> None:
+        self._stream = stream
+        self._pool = pool
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._pool.active -= 1
+            self._pool.last_used = time.monotonic()
+        await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """按主机分配连接池的传输层"""
+
+    def __init__(self) -> None:
+        self._pools: dict[tuple[str, str, int | None], _HostPool] = {}
+        self.stats: dict[str, HostStats] = {}
+
+    def _get_pool(self, url: httpx.URL) -> _HostPool:
+        key = (url.scheme, url.host, url.port)
+        if (pool := self._pools.get(key)) is None:
+            limit = config.http.max_connections_per_host
+            transport = httpx.AsyncHTTPTransport(
+                http2=config.http.http2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=limit,
+                    max_keepalive_connections=limit,
+                    keepalive_expiry=config.http.keepalive_expiry,
+                ),
+            )
+            pool = self._pools[key] = _HostPool(transport)
+        return pool
+
+    def _record(self, host: str, pool: _HostPool, response: httpx.Response) -> None:
+        stats = self.stats.setdefault(host, HostStats())
+        stats.requests += 1
+        if response.extensions.get("http_version") == b"HTTP/2":
+            stats.http2 += 1
+        stream = response.extensions.get("network_stream")
+        if stream is not None and stream not in pool.streams:
+            stats.connections += 1
+            with contextlib.suppress(TypeError):
+                pool.streams.add(stream)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        pool = self._get_pool(request.url)
+        pool.active += 1
+        pool.last_used = time.monotonic()
+        try:
+            response = await pool.transport.handle_async_request(request)
+        except BaseException:
+            pool.active -= 1
+            raise
+
+        self._record(request.url.host, pool, response)
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        response.stream = _TrackedStream(response.stream, pool)
+        return response
+
+    async def close_idle(self, idle_timeout: float) -> int:
+        """关闭空闲超过 idle_timeout 秒的主机连接池，返回关闭的数量"""
+        deadline = time.monotonic() - idle_timeout
+        idle = [
+            key
+            for key, pool in self._pools.items()
+            if pool.active <= 0 and pool.last_used < deadline
+        ]
+        for key in idle:
+            await self._pools.pop(key).transport.aclose()
+        return len(idle)
+
+    async def aclose(self) -> None:
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            await pool.transport.aclose()
+
+
+_transport = PooledTransport()
+_client = httpx.AsyncClient(transport=_transport, timeout=config.http.timeout)
+
+
+@contextlib.asynccontextmanager
+async def async_client() -> AsyncIterator[httpx.AsyncClient]:
+    """获取共享的 httpx 客户端，退出时不关闭"""
+    yield _client
+
+
+def get_client_stats() -> dict[str, HostStats]:
+    return dict(_transport.stats)
+
+
+@scheduler.scheduled_job("interval", minutes=1)
+async def _() -> None:
+    if closed := await _transport.close_idle(config.http.idle_timeout):
+        logger.debug(f"关闭 {closed} 个空闲的主机连接池")
+
+
+@get_driver().on_shutdown
+async def _() -> None:
+    await _client.aclose()
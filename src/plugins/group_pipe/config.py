@@ -0,0 +1,74 @@
+from nonebot import get_plugin_config
+from pydantic import BaseModel, Field
+
+
+class OutboundConfig(BaseModel):
+    """发送队列配置"""
+
+    rate: float = Field(default=1.0, description="每个目标群组每秒发送的消息数")
+    burst: int = Field(default=5, description="令牌桶容量，允许的突发消息数")
+    max_size: int = Field(default=200, description="队列长度上限，超出时丢弃最早的消息")
+    coalesce_threshold: int = Field(
+        default=3, description="队列积压达到该数量时合并连续的短消息"
+    )
+    coalesce_max_chars: int = Field(default=500, description="合并后消息的最大字数")
+
+
+class DatabaseConfig(BaseModel):
+    """缓存表配置"""
+
+    msg_id_ttl: int = Field(
+        default=7 * 24 * 3600, description="消息 ID 映射的保留时间（秒）"
+    )
+    msg_id_lru_size: int = Field(
+        default=4096, description="内存中保留的最近消息 ID 映射数量"
+    )
+    reap_interval: int = Field(default=30, description="清理过期数据的间隔（分钟）")
+    reap_batch_size: int = Field(default=1000, description="每批删除的过期行数")
+
+
+class TranscodeConfig(BaseModel):
+    """webm 转 gif 配置"""
+
+    workers: int = Field(default=2, description="转码进程数，即同时进行的转码数上限")
+    max_input_size: int = Field(
+        default=4 * 1024 * 1024, description="输入文件大小上限（字节）"
+    )
+    max_output_size: int = Field(
+        default=8 * 1024 * 1024, description="输出 gif 大小上限（字节）"
+    )
+    max_frames: int = Field(default=300, description="转码帧数上限")
+    timeout: float = Field(default=30, description="单个文件的转码时限（秒）")
+    cache_ttl: int = Field(default=3600, description="转码结果的缓存时间（秒）")
+
+
+class HttpConfig(BaseModel):
+    """共享 HTTP 连接池配置"""
+
+    max_connections_per_host: int = Field(default=8, description="每个主机的连接数上限")
+    keepalive_expiry: float = Field(default=60, description="空闲连接的保持时间（秒）")
+    idle_timeout: float = Field(
+        default=600, description="主机连接池无请求超过该时间（秒）后关闭"
+    )
+    http2: bool = Field(default=True, description="已安装 h2 时启用 HTTP/2")
+    timeout: float = Field(default=5, description="请求超时（秒）")
+
+
+class PluginConfig(BaseModel):
+    """群组管道配置"""
+
+    outbound: OutboundConfig = Field(default_factory=OutboundConfig)
+    database: DatabaseConfig = Field(default_factory=DatabaseConfig)
+    transcode: TranscodeConfig = Field(default_factory=TranscodeConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+
+
+class Config(BaseModel):
+    """插件主配置"""
+
+    group_pipe: PluginConfig = Field(
+        default_factory=PluginConfig, description="群组管道配置"
+    )
+
+
+config = get_plugin_config(Config).group_pipe
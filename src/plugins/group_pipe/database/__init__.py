@@ -1,5 +1,7 @@
+from . import reaper as reaper
 from .kv_cache import get_cache_value as get_cache_value
 from .kv_cache import set_cache_value as set_cache_value
+from .kv_cache import set_cache_values as set_cache_values
 from .msg_id_cache import get_reply_id as get_reply_id
 from .msg_id_cache import set_msg_dst_id as set_msg_dst_id
 from .pipe import PipeTuple as PipeTuple
@@ -8,3 +10,6 @@ from .pipe import delete_pipe as delete_pipe
 from .pipe import display_pipe as display_pipe
 from .pipe import get_linked_pipes as get_linked_pipes
 from .pipe import get_pipes as get_pipes
+from .pipe import load_routes as load_routes
+from .pipe import make_key as make_key
+from .pipe import route_pipes as route_pipes
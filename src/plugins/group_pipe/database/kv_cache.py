@@ -1,7 +1,8 @@
 import datetime
+from collections.abc import Mapping
 
 from nonebot_plugin_orm import AsyncSession, Model, get_session
-from sqlalchemy import Integer, String, select
+from sqlalchemy import Integer, String, delete, or_, select
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.utils import attach_async_context
@@ -26,6 +27,8 @@ class KVCache(Model):
 
     -1 为永不过期
     """
+    expire_at: Mapped[int | None] = mapped_column(Integer(), index=True)
+    """ 过期时间戳，None 为永不过期 """
 
 
 @attach_async_context(get_session)
@@ -41,23 +44,59 @@ async def set_cache_value(
     if cache := await session.scalar(stmt):
         await session.delete(cache)
 
+    created_at = int(datetime.datetime.now().timestamp())
     cache = KVCache(
         adapter=adapter,
         key=key,
         value=value,
-        created_at=int(datetime.datetime.now().timestamp()),
+        created_at=created_at,
         expire=expire,
+        expire_at=created_at + expire if expire >= 0 else None,
     )
     session.add(cache)
     await session.commit()
 
 
+@attach_async_context(get_session)
+async def set_cache_values(
+    session: AsyncSession,
+    adapter: str,
+    values: Mapping[str, str],
+    expire: int = SECONDS_PER_WEEK,
+) -> None:
+    """在同一事务中写入多个缓存值"""
+    if not values:
+        return
+
+    await session.execute(
+        delete(KVCache)
+        .where(KVCache.adapter == adapter)
+        .where(KVCache.key.in_(list(values)))
+    )
+
+    created_at = int(datetime.datetime.now().timestamp())
+    session.add_all(
+        KVCache(
+            adapter=adapter,
+            key=key,
+            value=value,
+            created_at=created_at,
+            expire=expire,
+            expire_at=created_at + expire if expire >= 0 else None,
+        )
+        for key, value in values.items()
+    )
+    await session.commit()
+
+
 @attach_async_context(get_session)
 async def get_cache_value(session: AsyncSession, adapter: str, key: str) -> str | None:
+    now = int(datetime.datetime.now().timestamp())
     statement = (
         select(KVCache.value)
         .where(KVCache.adapter == adapter)
         .where(KVCache.key == key)
+        .where(or_(KVCache.expire_at.is_(None), KVCache.expire_at > now))
     )
 
     return await session.scalar(statement)
@@ -1,14 +1,19 @@
 import datetime
-from typing import overload
+from collections import OrderedDict
+from typing import Literal, overload
 
 from nonebot_plugin_orm import AsyncSession, Model, get_session
-from sqlalchemy import Integer, String, select
+from sqlalchemy import Index, Integer, String, select
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.utils import attach_async_context
 
+from ..config import config
+
 
 class MsgIdCache(Model):
+    __table_args__ = (Index("ix_group_pipe_msgidcache_dst", "dst_adapter", "dst_id"),)
+
     src_adapter: Mapped[str] = mapped_column(String(), nullable=False, primary_key=True)
     """ 源消息适配器 """
     src_id: Mapped[str] = mapped_column(String(), nullable=False, primary_key=True)
@@ -17,10 +22,52 @@ class MsgIdCache(Model):
     """ 目标消息适配器 """
     dst_id: Mapped[str] = mapped_column(String(), nullable=False, primary_key=True)
     """ 目标消息 ID """
-    created_at: Mapped[int] = mapped_column(Integer(), nullable=False)
+    created_at: Mapped[int] = mapped_column(Integer(), nullable=False, index=True)
     """ 创建时间 """
 
 
+type _RecentKey = tuple[str, str, Literal["src", "dst"], str]
+
+
+class RecentMsgIds:
+    """最近消息 ID 映射的 LRU 缓存，回复解析多查询刚转发的消息
+
+    一条消息对应多条映射（如拆分发送）时，与数据库查询相同，
+    保留创建时间最早、其次 ID 最小的一条。
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[_RecentKey, tuple[str, int]] = OrderedDict()
+
+    def get(self, key: _RecentKey, deadline: int) -> str | None:
+        if (item := self._data.get(key)) is None:
+            return None
+        value, created_at = item
+        if created_at <= deadline:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: _RecentKey, value: str, created_at: int) -> None:
+        item = self._data.get(key)
+        if item is None or (created_at, value) < (item[1], item[0]):
+            self._data[key] = (value, created_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+recent_msg_ids = RecentMsgIds(config.database.msg_id_lru_size)
+
+
+def msg_id_deadline() -> int:
+    """早于该时间创建的消息 ID 映射视为过期"""
+    now = int(datetime.datetime.now().timestamp())
+    return now - config.database.msg_id_ttl
+
+
 @attach_async_context(get_session)
 async def set_msg_dst_id(
     session: AsyncSession,
@@ -29,14 +76,19 @@ async def set_msg_dst_id(
     dst_adapter: str,
     dst_id: str,
 ) -> None:
+    created_at = int(datetime.datetime.now().timestamp())
     cache = MsgIdCache(
         src_adapter=src_adapter,
         src_id=src_id,
         dst_adapter=dst_adapter,
         dst_id=dst_id,
-        created_at=int(datetime.datetime.now().timestamp()),
+        created_at=created_at,
     )
     session.add(cache)
+    await session.commit()
+
+    recent_msg_ids.put((src_adapter, dst_adapter, "src", src_id), dst_id, created_at)
+    recent_msg_ids.put((src_adapter, dst_adapter, "dst", dst_id), src_id, created_at)
 
 
 @overload
@@ -61,9 +113,19 @@ async def get_reply_id(
     src_id: str | None = None,
     dst_id: str | None = None,
 ) -> str | None:
+    deadline = msg_id_deadline()
+    key: _RecentKey = (
+        (src_adapter, dst_adapter, "src", src_id)
+        if src_id
+        else (src_adapter, dst_adapter, "dst", str(dst_id))
+    )
+    if (value := recent_msg_ids.get(key, deadline)) is not None:
+        return value
+
+    target = MsgIdCache.dst_id if src_id else MsgIdCache.src_id
     async with get_session() as session:
         statement = (
-            select(MsgIdCache.dst_id if src_id else MsgIdCache.src_id)
+            select(target, MsgIdCache.created_at)
             .where(MsgIdCache.src_adapter == src_adapter)
             .where(MsgIdCache.dst_adapter == dst_adapter)
             .where(
@@ -71,5 +133,13 @@ async def get_reply_id(
                 if src_id
                 else (MsgIdCache.dst_id == dst_id)
             )
+            .where(MsgIdCache.created_at > deadline)
+            .order_by(MsgIdCache.created_at, target)
         )
-        return await session.scalar(statement)
+        row = (await session.execute(statement)).first()
+
+    if row is None:
+        return None
+    value, created_at = row.tuple()
+    recent_msg_ids.put(key, value, created_at)
+    return value
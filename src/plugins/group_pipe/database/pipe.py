@@ -3,6 +3,8 @@ from collections.abc import Iterable
 from copy import deepcopy
 from typing import NamedTuple
 
+import anyio
+from nonebot import get_driver, logger
 from nonebot_plugin_alconna import Target
 from nonebot_plugin_orm import AsyncSession, Model, get_session
 from sqlalchemy import JSON, Integer, delete, select
@@ -11,6 +13,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 from src.utils import attach_async_context
 
 type TargetDict = dict[str, object]
+type RouteTable = dict[int, tuple[PipeTuple, ...]]
 
 
 class PipeTuple(NamedTuple):
@@ -89,8 +92,47 @@ async def get_linked_pipes(
     return listen_pipes, target_pipes
 
 
+# 监听群组 key -> 管道，仅在创建/删除管道时随数据库一同更新
+_routes: RouteTable | None = None
+_routes_lock = anyio.Lock()
+
+
+@attach_async_context(get_session)
+async def _load_routes(session: AsyncSession) -> RouteTable:
+    statement = select(Pipe.listen, Pipe.listen_t, Pipe.target_t)
+    routes: dict[int, list[PipeTuple]] = {}
+    for key, listen, target in (await session.execute(statement)).tuples():
+        pipe = PipeTuple(Target.load(deepcopy(listen)), Target.load(deepcopy(target)))
+        routes.setdefault(key, []).append(pipe)
+    return {key: tuple(pipes) for key, pipes in routes.items()}
+
+
+async def load_routes() -> RouteTable:
+    """加载管道路由表，已加载时直接返回"""
+    global _routes
+
+    async with _routes_lock:
+        if _routes is None:
+            _routes = await _load_routes()
+            logger.debug(f"已加载管道路由表: {len(_routes)} 个监听群组")
+    return _routes
+
+
+async def route_pipes(listen: Target) -> tuple[PipeTuple, ...]:
+    """从内存路由表查询监听指定群组的管道"""
+    routes = _routes if _routes is not None else await load_routes()
+    return routes.get(make_key(listen), ())
+
+
+@get_driver().on_startup
+async def _() -> None:
+    await load_routes()
+
+
 @attach_async_context(get_session)
 async def create_pipe(session: AsyncSession, listen: Target, target: Target) -> None:
+    # 在提交前加载路由表，首次加载的结果才不会包含新管道
+    routes = await load_routes()
     session.add(
         Pipe(
             listen=make_key(listen),
@@ -99,6 +141,12 @@ async def create_pipe(session: AsyncSession, listen: Target, target: Target) ->
             target_t=target.dump(),
         )
     )
+    await session.commit()
+
+    key, target_key = make_key(listen), make_key(target)
+    pipes = routes.get(key, ())
+    if all(make_key(p.target) != target_key for p in pipes):
+        routes[key] = (*pipes, PipeTuple(listen, target))
 
 
 @attach_async_context(get_session)
@@ -110,6 +158,16 @@ async def delete_pipe(session: AsyncSession, pipe: PipeTuple) -> None:
     )
 
     await session.execute(stmt)
+    await session.commit()
+
+    routes = await load_routes()
+    key, target_key = make_key(pipe.listen), make_key(pipe.target)
+    if pipes := tuple(
+        p for p in routes.get(key, ()) if make_key(p.target) != target_key
+    ):
+        routes[key] = pipes
+    else:
+        routes.pop(key, None)
 
 
 def display_pipe(listen: Target, target: Target) -> str:
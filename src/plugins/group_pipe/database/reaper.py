@@ -0,0 +1,58 @@
+"""过期数据清理 — 定时分批删除过期的缓存键值与消息 ID 映射。"""
+
+import time
+from typing import Any, cast
+
+import anyio.lowlevel
+from nonebot import logger
+from nonebot_plugin_apscheduler import scheduler
+from nonebot_plugin_orm import Model, get_session
+from sqlalchemy import CursorResult, delete, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from ..config import config
+from .kv_cache import KVCache
+from .msg_id_cache import MsgIdCache, msg_id_deadline
+
+
+async def reap_expired(
+    model: type[Model],
+    column: InstrumentedAttribute[Any],
+    deadline: int,
+    batch_size: int,
+) -> int:
+    """按 column 升序分批删除 column 小于 deadline 的行，返回删除的行数
+
+    每批删除 column 不大于第 batch_size 小值的行，同值的行会在同一批删除。
+    """
+    total = 0
+    while True:
+        async with get_session() as session:
+            cutoff = await session.scalar(
+                select(column)
+                .where(column < deadline)
+                .order_by(column)
+                .offset(batch_size - 1)
+                .limit(1)
+            )
+            condition = column < deadline if cutoff is None else column <= cutoff
+            result = await session.execute(delete(model).where(condition))
+            await session.commit()
+
+        total += cast("CursorResult[Any]", result).rowcount
+        if cutoff is None:
+            return total
+        # 让出事件循环，避免长时间占用数据库连接
+        await anyio.lowlevel.checkpoint()
+
+
+@scheduler.scheduled_job("interval", minutes=config.database.reap_interval)
+async def _() -> None:
+    now = int(time.time())
+    batch_size = config.database.reap_batch_size
+    kv = await reap_expired(KVCache, KVCache.expire_at, now, batch_size)
+    msg_id = await reap_expired(
+        MsgIdCache, MsgIdCache.created_at, msg_id_deadline(), batch_size
+    )
+    if kv or msg_id:
+        logger.info(f"清理过期数据: 缓存 {kv} 条, 消息 ID 映射 {msg_id} 条")
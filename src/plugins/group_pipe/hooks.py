@@ -5,8 +5,9 @@ from nonebot.message import event_preprocessor
 from nonebot_plugin_alconna import Target, UniMessage, get_target
 from nonebot_plugin_uninfo import get_session
 
-from .adapter import get_converter, get_sender
-from .database import display_pipe, get_pipes
+from . import outbound
+from .adapter import get_converter
+from .database import display_pipe, route_pipes
 from .utils import repr_unimsg
 
 
@@ -19,31 +20,23 @@ async def send_pipe_msg(
     msg: Message,
 ) -> None:
     display = display_pipe(listen, target)
+    # 转换前先占位，保证同一目标群组按收到消息的顺序发送
+    item = outbound.reserve(target, display, src_type=bot.type, src_id=msg_id)
 
     try:
-        dst_bot = await target.select()
-    except Exception as err:
-        logger.warning(f"管道: {display}")
-        logger.warning(f"管道选择目标 Bot 失败: {err}")
-        return
+        try:
+            dst_bot = await target.select()
+        except Exception as err:
+            logger.warning(f"管道: {display}")
+            logger.warning(f"管道选择目标 Bot 失败: {err}")
+            return
 
-    unimsg = msg_head + await get_converter(bot, dst_bot).convert(msg)
-    logger.debug(f"发送管道: {display}")
-    logger.debug(f"消息: {repr_unimsg(unimsg)}")
-
-    try:
-        await get_sender(dst_bot).send(
-            dst_bot=dst_bot,
-            target=target,
-            msg=unimsg,
-            src_type=bot.type,
-            src_id=msg_id,
-        )
-    except Exception as err:
-        logger.warning(f"管道: {display}")
-        logger.warning(f"发送管道消息失败: {err}")
-        logger.opt(exception=err).debug(err)
-        return
+        unimsg = msg_head + await get_converter(bot, dst_bot).convert(msg)
+        logger.debug(f"发送管道: {display}")
+        logger.debug(f"消息: {repr_unimsg(unimsg)}")
+        item.resolve(dst_bot, unimsg)
+    finally:
+        item.cancel()
 
 
 @event_preprocessor
@@ -57,17 +50,17 @@ async def handle_pipe_msg(bot: Bot, event: Event) -> None:
         logger.opt(exception=err).debug(f"获取监听目标失败: {err}")
         return
 
+    pipes = await route_pipes(listen)
+    if not pipes:
+        logger.trace("没有监听当前群组的管道")
+        return
+
     try:
         info = await get_session(bot, event)
     except Exception as err:
         logger.opt(exception=err).debug(f"获取消息信息失败: {err}")
         info = None
 
-    pipes = await get_pipes(listen=listen)
-    if not pipes:
-        logger.trace("没有监听当前群组的管道")
-        return
-
     converter = get_converter(listen.adapter)
     try:
         msg = await converter.get_message(event)
@@ -100,7 +93,7 @@ async def handle_pipe_msg(bot: Bot, event: Event) -> None:
 
     # Avoid unnessary task group
     if len(pipes) == 1:
-        await _send(pipes.pop().target)
+        await _send(pipes[0].target)
         return
 
     async with anyio.create_task_group() as tg:
@@ -15,6 +15,7 @@ from nonebot_plugin_alconna.builtins.extensions.telegram import TelegramSlashExt
 
 from src.service.cache import get_cache
 
+from ..client_pool import get_client_stats
 from ..database import (
     PipeTuple,
     create_pipe,
@@ -23,6 +24,7 @@ from ..database import (
     get_linked_pipes,
     get_pipes,
 )
+from ..outbound import get_queues
 from .depends import MsgTarget
 
 alc = Alconna(
@@ -50,10 +52,14 @@ alc = Alconna(
         alias={"r", "rm"},
         help_text="删除一个当前群组管道",
     ),
+    Subcommand("stats", help_text="查看发送队列与 HTTP 连接池统计"),
     meta=CommandMeta(
         description="群组管道",
         usage="pipe --help",
-        example="pipe list\npipe create\npipe link <链接码>\npipe remove <管道序号>",
+        example=(
+            "pipe list\npipe create\npipe link <链接码>\n"
+            "pipe remove <管道序号>\npipe stats"
+        ),
         author="wyf7685",
         fuzzy_match=True,
     ),
@@ -164,3 +170,31 @@ async def assign_remove(target: MsgTarget, idx: int) -> None:
         "当前群组的管道:\n" + show_pipes(listen_pipes, target_pipes)
     )
     await UniMessage.text(msg).finish(reply_to=True)
+
+
+@pipe_cmd.assign("stats")
+async def assign_stats() -> None:
+    queues = get_queues()
+    client_stats = get_client_stats()
+    if not queues and not client_stats:
+        await UniMessage.text("暂无发送队列").finish(reply_to=True)
+
+    lines = ["管道发送队列:"] if queues else []
+    for queue in queues:
+        t, stats = queue.target, queue.stats
+        lines.append(
+            f"<{t.adapter}: {t.id}> 积压 {len(queue.items)} (最大 {stats.max_depth})\n"
+            f"  发送 {stats.sent} 条, 送达 {stats.delivered} 条, "
+            f"合并 {stats.coalesced} 条, 丢弃 {stats.dropped} 条, "
+            f"失败 {stats.failed} 条\n"
+            f"  延迟 平均 {stats.avg_latency:.2f}s, 最大 {stats.max_latency:.2f}s"
+        )
+    if client_stats:
+        lines.append("HTTP 连接池:")
+    for host, host_stats in client_stats.items():
+        lines.append(
+            f"{host}: 请求 {host_stats.requests} 次, "
+            f"新建连接 {host_stats.connections} 个, "
+            f"复用率 {host_stats.reuse_rate:.0%}, HTTP/2 {host_stats.http2} 次"
+        )
+    await UniMessage.text("\n".join(lines)).finish(reply_to=True)
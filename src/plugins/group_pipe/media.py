@@ -0,0 +1,65 @@
+"""媒体上传去重 — 以源文件标识缓存 COS 链接，同一文件的并发转发只上传一次。
+
+源文件标识由适配器提供（如 QQ 图片的文件摘要），缓存有效期比 COS 文件与
+预签名链接的有效期短 EXPIRE_MARGIN 秒，保证取到的链接在发送后仍可访问。
+无法确定源文件标识时不缓存，每次单独上传。
+"""
+
+import hashlib
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from src.service.cache import get_cache
+from src.utils import SingleFlight
+
+# COS 文件与预签名链接的有效期
+MEDIA_TTL = 3600
+# 缓存提前失效的时长
+EXPIRE_MARGIN = 10 * 60
+
+
+@dataclass(frozen=True, slots=True)
+class HostedMedia:
+    """已上传的媒体文件"""
+
+    url: str
+    name: str
+    mime: str | None = None
+    uploaded: bool = True
+    """ 为 False 时 url 为上传失败后回退的原始链接，不写入缓存 """
+
+
+# 源文件标识摘要 -> HostedMedia
+_media_cache = get_cache("group_pipe:media", HostedMedia)
+_inflight = SingleFlight[str, HostedMedia | None]()
+
+
+async def _resolve(
+    digest: str,
+    upload: Callable[[str], Awaitable[HostedMedia | None]],
+) -> HostedMedia | None:
+    if (media := await _media_cache.get(digest)) is not None:
+        return media
+
+    media = await upload(digest)
+    if media is not None and media.uploaded:
+        await _media_cache.set(digest, media, ttl=MEDIA_TTL - EXPIRE_MARGIN)
+    return media
+
+
+async def host_media(
+    identity: str | None,
+    upload: Callable[[str], Awaitable[HostedMedia | None]],
+) -> HostedMedia | None:
+    """获取源文件对应的 COS 链接，未命中缓存时调用 upload 下载并上传
+
+    Args:
+        identity: 源文件标识，相同文件应得到相同标识；为 None 时不缓存
+        upload: 上传函数，参数为标识的摘要（可用作 COS 文件名），
+            应以 MEDIA_TTL 为有效期上传；无法处理时返回 None
+    """
+    if identity is None:
+        return await upload(uuid.uuid4().hex)
+    digest = hashlib.sha256(identity.encode()).hexdigest()[:32]
+    return await _inflight.run(digest, lambda: _resolve(digest, upload))
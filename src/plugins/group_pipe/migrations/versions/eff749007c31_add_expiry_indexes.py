@@ -0,0 +1,61 @@
+"""add expiry indexes
+
+迁移 ID: eff749007c31
+父迁移: c79483f13a77
+创建时间: 2026-10-19 10:12:47.318205
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "eff749007c31"
+down_revision: str | Sequence[str] | None = "c79483f13a77"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade(name: str = "") -> None:
+    if name:
+        return
+    with op.batch_alter_table("group_pipe_kvcache", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("expire_at", sa.Integer(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_group_pipe_kvcache_expire_at"), ["expire_at"], unique=False
+        )
+
+    kvcache = sa.table(
+        "group_pipe_kvcache",
+        sa.column("created_at", sa.Integer()),
+        sa.column("expire", sa.Integer()),
+        sa.column("expire_at", sa.Integer()),
+    )
+    op.execute(
+        kvcache.update()
+        .where(kvcache.c.expire >= 0)
+        .values(expire_at=kvcache.c.created_at + kvcache.c.expire)
+    )
+
+    with op.batch_alter_table("group_pipe_msgidcache", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_group_pipe_msgidcache_created_at"),
+            ["created_at"],
+            unique=False,
+        )
+        batch_op.create_index(
+            "ix_group_pipe_msgidcache_dst", ["dst_adapter", "dst_id"], unique=False
+        )
+
+
+def downgrade(name: str = "") -> None:
+    if name:
+        return
+    with op.batch_alter_table("group_pipe_msgidcache", schema=None) as batch_op:
+        batch_op.drop_index("ix_group_pipe_msgidcache_dst")
+        batch_op.drop_index(batch_op.f("ix_group_pipe_msgidcache_created_at"))
+
+    with op.batch_alter_table("group_pipe_kvcache", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_group_pipe_kvcache_expire_at"))
+        batch_op.drop_column("expire_at")
@@ -0,0 +1,221 @@
+"""管道发送队列 — 按目标群组顺序发送，令牌桶限速，积压时合并连续的短消息。
+
+消息在开始转换前即在目标队列中占位，转换完成后由队列的后台任务按占位顺序发送，
+转换失败的占位直接跳过。队列积压达到 coalesce_threshold 时，
+将队首之后已转换完成的纯文本短消息合并为一条发送，合并消息只记录首条的消息 ID 映射。
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import anyio
+from nonebot import get_driver, logger
+from nonebot.adapters import Bot
+from nonebot_plugin_alconna import Target, Text, UniMessage
+
+from .adapter import get_sender
+from .config import config
+from .database import make_key
+
+
+class TokenBucket:
+    """令牌桶，每秒补充 rate 个令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        self._refill()
+        while self.tokens < 1:
+            await anyio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+@dataclass(slots=True, eq=False)
+class OutboundItem:
+    """队列中的消息占位"""
+
+    display: str
+    src_type: str | None
+    src_id: str | None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    dst_bot: Bot | None = None
+    message: UniMessage | None = None
+    ready: anyio.Event = field(default_factory=anyio.Event)
+
+    def resolve(self, dst_bot: Bot, message: UniMessage) -> None:
+        """转换完成，等待发送"""
+        self.dst_bot = dst_bot
+        self.message = message
+        self.ready.set()
+
+    def cancel(self) -> None:
+        """放弃发送，已转换完成时无影响"""
+        self.ready.set()
+
+
+@dataclass(slots=True)
+class QueueStats:
+    """单个发送队列的统计"""
+
+    sent: int = 0
+    """ 实际发送的消息数 """
+    delivered: int = 0
+    """ 已送达的原始消息数 """
+    coalesced: int = 0
+    """ 被合并进其他消息的原始消息数 """
+    dropped: int = 0
+    """ 因队列已满丢弃的消息数 """
+    failed: int = 0
+    """ 发送失败的原始消息数 """
+    max_depth: int = 0
+    """ 历史最大队列长度 """
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        """入队到送达的平均耗时（秒）"""
+        return self.total_latency / self.delivered if self.delivered else 0.0
+
+
+def _text_length(message: UniMessage) -> int | None:
+    """纯文本消息的字数，包含其他消息段时返回 None"""
+    if not all(isinstance(seg, Text) for seg in message):
+        return None
+    return len(message.extract_plain_text())
+
+
+class OutboundQueue:
+    """单个目标群组的发送队列"""
+
+    def __init__(self, target: Target) -> None:
+        self.target = target
+        self.items: deque[OutboundItem] = deque()
+        self.bucket = TokenBucket(config.outbound.rate, config.outbound.burst)
+        self.stats = QueueStats()
+        self.running = False
+
+    def reserve(
+        self,
+        display: str,
+        src_type: str | None,
+        src_id: str | None,
+    ) -> OutboundItem:
+        item = OutboundItem(display, src_type, src_id)
+        self.items.append(item)
+        if len(self.items) > config.outbound.max_size:
+            dropped = self.items.popleft()
+            self.stats.dropped += 1
+            logger.warning(f"管道发送队列已满，丢弃消息: {dropped.display}")
+        self.stats.max_depth = max(self.stats.max_depth, len(self.items))
+
+        if not self.running:
+            self.running = True
+            get_driver().task_group.start_soon(self._run)
+        return item
+
+    async def _run(self) -> None:
+        try:
+            while self.items:
+                head = self.items[0]
+                await head.ready.wait()
+                # 等待期间可能已被丢弃
+                if not self.items or self.items[0] is not head:
+                    continue
+                self.items.popleft()
+                if head.message is None:
+                    continue
+
+                batch = self._coalesce(head)
+                await self.bucket.acquire()
+                await self._send(batch)
+        finally:
+            self.running = False
+
+    def _coalesce(self, head: OutboundItem) -> list[OutboundItem]:
+        """积压时取出队首之后可与 head 合并的连续短消息"""
+        batch = [head]
+        if len(self.items) + 1 < config.outbound.coalesce_threshold:
+            return batch
+        assert head.message is not None
+        if (length := _text_length(head.message)) is None:
+            return batch
+
+        while self.items and (item := self.items[0]).ready.is_set():
+            if item.message is None:
+                self.items.popleft()
+                continue
+            if item.dst_bot is not head.dst_bot:
+                break
+            size = _text_length(item.message)
+            if size is None or length + size > config.outbound.coalesce_max_chars:
+                break
+            self.items.popleft()
+            batch.append(item)
+            length += size
+        return batch
+
+    async def _send(self, batch: list[OutboundItem]) -> None:
+        head = batch[0]
+        assert head.dst_bot is not None
+        assert head.message is not None
+        message = head.message
+        for item in batch[1:]:
+            assert item.message is not None
+            message = message + "\n" + item.message
+
+        try:
+            await get_sender(head.dst_bot).send(
+                dst_bot=head.dst_bot,
+                target=self.target,
+                msg=message,
+                src_type=head.src_type,
+                src_id=head.src_id,
+            )
+        except Exception as err:
+            self.stats.failed += len(batch)
+            logger.warning(f"管道: {head.display}")
+            logger.warning(f"发送管道消息失败: {err}")
+            logger.opt(exception=err).debug(err)
+            return
+
+        now = time.monotonic()
+        self.stats.sent += 1
+        self.stats.delivered += len(batch)
+        self.stats.coalesced += len(batch) - 1
+        for item in batch:
+            latency = now - item.enqueued_at
+            self.stats.total_latency += latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+
+
+_queues: dict[tuple[str, int], OutboundQueue] = {}
+
+
+def reserve(
+    target: Target,
+    display: str,
+    src_type: str | None = None,
+    src_id: str | None = None,
+) -> OutboundItem:
+    """在目标群组的发送队列中为一条消息占位"""
+    key = (target.adapter or "", make_key(target))
+    if (queue := _queues.get(key)) is None:
+        queue = _queues[key] = OutboundQueue(target)
+    return queue.reserve(display, src_type, src_id)
+
+
+def get_queues() -> list[OutboundQueue]:
+    return list(_queues.values())
@@ -0,0 +1,129 @@
+"""webm 转 gif — 在进程池中逐帧转码，按输入摘要缓存结果。
+
+转码在独立进程中执行，不占用事件循环与线程池，同时进行的转码数不超过进程数。
+输入大小、帧数、输出大小或耗时超出限制时放弃转码，由调用方回退为发送原文件；
+放弃的结果同样写入缓存，同一文件不会反复尝试。
+
+每个转码进程是独立的单进程执行器，以 forkserver 启动，只导入不依赖 NoneBot 的
+src.workers.transcode。转码无响应或进程异常退出时只结束该进程，不影响其他转码。
+"""
+
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import anyio
+from nonebot import get_driver, logger
+
+from src.service.cache import get_cache
+from src.utils import SingleFlight
+from src.workers.transcode import TranscodeError, convert_webm
+
+from .config import config
+
+# 输入摘要 -> gif，空值表示放弃转码
+_gif_cache = get_cache("group_pipe:webm_gif", bytes)
+_inflight = SingleFlight[str, bytes | None]()
+_limiter = anyio.CapacityLimiter(config.transcode.workers)
+# 空闲的转码进程，数量不超过 config.transcode.workers
+_idle: list[ProcessPoolExecutor] = []
+_executors: set[ProcessPoolExecutor] = set()
+
+
+def _new_executor() -> ProcessPoolExecutor:
+    executor = ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context("forkserver")
+    )
+    _executors.add(executor)
+    return executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor, *, kill: bool = False) -> None:
+    _executors.discard(executor)
+    if kill:
+        # shutdown 不会中断正在执行的任务，卡死的子进程需要直接结束
+        for process in list(executor._processes.values()):  # noqa: SLF001
+            process.kill()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@get_driver().on_shutdown
+def _() -> None:
+    _idle.clear()
+    for executor in list(_executors):
+        _discard_executor(executor)
+
+
+async def _run(raw: bytes) -> bytes | None:
+    """在空闲的转码进程中转码，进程无响应或异常退出时丢弃该进程并返回 None
+
+    只有正常结束转码的进程才会放回空闲列表。
+    """
+    limits = config.transcode
+    call = functools.partial(
+        convert_webm,
+        raw,
+        max_frames=limits.max_frames,
+        max_output_size=limits.max_output_size,
+        timeout=limits.timeout,
+    )
+    async with _limiter:
+        executor = _idle.pop() if _idle else _new_executor()
+        try:
+            # 子进程自行检查时限，这里只防止解码卡死
+            with anyio.fail_after(limits.timeout * 2):
+                loop = asyncio.get_running_loop()
+                gif = await loop.run_in_executor(executor, call)
+        except TimeoutError:
+            logger.warning("webm 转 gif 无响应，结束转码进程")
+            _discard_executor(executor, kill=True)
+            return None
+        except BrokenProcessPool as err:
+            logger.opt(exception=err).warning("转码进程异常退出")
+            _discard_executor(executor)
+            return None
+        except Exception:
+            # 转码在子进程中失败，子进程本身已空闲
+            _idle.append(executor)
+            raise
+        except BaseException:
+            # 调用方被取消时子进程可能仍在转码，后续转码不能排在其后
+            _discard_executor(executor, kill=True)
+            raise
+        _idle.append(executor)
+        return gif
+
+
+async def _transcode(digest: str, raw: bytes) -> bytes | None:
+    if (cached := await _gif_cache.get(digest)) is not None:
+        return cached or None
+
+    try:
+        gif = await _run(raw)
+    except TranscodeError as err:
+        logger.info(f"放弃 webm 转 gif: {err}")
+        gif = b""
+    except Exception as err:
+        logger.opt(exception=err).warning(f"webm 转 gif 失败: {err}")
+        gif = b""
+
+    if gif is None:
+        return None
+    await _gif_cache.set(digest, gif, ttl=config.transcode.cache_ttl)
+    return gif or None
+
+
+async def webm_to_gif(raw: bytes) -> bytes | None:
+    """将 webm 转为 gif，超出限制或转码失败时返回 None
+
+    相同内容的并发请求只转码一次。
+    """
+    if len(raw) > config.transcode.max_input_size:
+        logger.info(f"webm 大小 {len(raw)} 超过限制，跳过转码")
+        return None
+
+    digest = hashlib.sha256(raw).hexdigest()[:32]
+    return await _inflight.run(digest, lambda: _transcode(digest, raw))
@@ -1,72 +1,16 @@
-import contextlib
 import copy
-import io
-from collections.abc import AsyncIterator
-from contextvars import ContextVar
-from types import TracebackType
-from typing import NamedTuple, Self
+from typing import NamedTuple
 
 import httpx
 import yarl
-from nonebot.utils import run_sync
 from nonebot_plugin_alconna.uniseg import Segment, UniMessage
 from nonebot_plugin_alconna.uniseg.segment import Media
 from nonebot_plugin_alconna.uniseg.utils import fleep
 
+from src.service.cache import get_cache
 from src.utils import attach_async_context
 
-
-class _ContextClientHolder:
-    def __init__(self) -> None:
-        self.client: httpx.AsyncClient | None = None
-
-    async def get(self) -> httpx.AsyncClient:
-        if self.client is None:
-            self.client = httpx.AsyncClient()
-            await self.client.__aenter__()
-        return self.client
-
-    async def __aenter__(self) -> Self:
-        return self
-
-    async def __aexit__(
-        self,
-        exc_type: type[BaseException] | None = None,
-        exc_value: BaseException | None = None,
-        traceback: TracebackType | None = None,
-    ) -> None:
-        if self.client is not None:
-            await self.client.__aexit__(exc_type, exc_value, traceback)
-            self.client = None
-
-
-_ctx_client = ContextVar[_ContextClientHolder | None](
-    "group_pipe:context_client", default=None
-)
-
-
-@contextlib.asynccontextmanager
-async def async_client() -> AsyncIterator[httpx.AsyncClient]:
-    if holder := _ctx_client.get():
-        yield await holder.get()
-        return
-
-    async with httpx.AsyncClient() as client:
-        yield client
-
-
-@contextlib.asynccontextmanager
-async def enter_client_ctx() -> AsyncIterator[None]:
-    if _ctx_client.get() is not None:
-        yield
-        return
-
-    async with _ContextClientHolder() as holder:
-        with _ctx_client.set(holder):
-            yield
-
-
-with_client_ctx = attach_async_context(enter_client_ctx, as_param=False)
+from .client_pool import async_client
 
 
 def fix_url(url: str) -> str:
@@ -88,38 +32,70 @@ async def download_url(client: httpx.AsyncClient, url: str) -> bytes:
         return resp.read()
 
 
-@attach_async_context(async_client)
-async def check_url_ok(client: httpx.AsyncClient, url: str) -> bool:
-    url = fix_url(url)
-    try:
-        async with client.stream("GET", url) as resp:
-            resp.raise_for_status()
-    except httpx.ConnectError, httpx.HTTPError:
-        return False
-    else:
-        return True
-
-
 class _FileType(NamedTuple):
     mime: str
     extension: str
     size: int
 
 
+class _UrlProbe(NamedTuple):
+    ok: bool
+    file_type: _FileType | None
+
+
+# 探测时读取的文件头字节数
+PROBE_BYTES = 256
+# 探测结果的缓存时长
+PROBE_TTL = 60
+_probe_cache = get_cache("group_pipe:url_probe", _UrlProbe, mode="pickle")
+
+
+def _content_size(resp: httpx.Response) -> int | None:
+    if resp.status_code == 206:
+        total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    size = resp.headers.get("Content-Length")
+    return int(size) if size and size.isdigit() else None
+
+
+def _detect_type(head: bytes, size: int | None) -> _FileType | None:
+    if size is None:
+        return None
+    info = fleep.get(head)
+    if not info.mimes or not info.extensions:
+        return None
+    return _FileType(info.mimes[0], info.extensions[0], size)
+
+
 @attach_async_context(async_client)
-async def guess_url_type(client: httpx.AsyncClient, url: str) -> _FileType | None:
-    url = fix_url(url)
-    async with client.stream("GET", url) as resp:
-        size = resp.headers.get("Content-Length")
-        if not size:
-            return None
+async def probe_url(client: httpx.AsyncClient, url: str) -> _UrlProbe:
+    """以只请求文件头的 Range GET 检查链接是否可用并识别文件类型，结果短时缓存"""
+    if (cached := await _probe_cache.get(url)) is not None:
+        return cached
+
+    headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+    try:
+        async with client.stream("GET", fix_url(url), headers=headers) as resp:
+            resp.raise_for_status()
+            head = b""
+            async for chunk in resp.aiter_bytes():
+                head += chunk
+                if len(head) >= PROBE_BYTES:
+                    break
+            result = _UrlProbe(True, _detect_type(head, _content_size(resp)))
+    except httpx.ConnectError, httpx.HTTPError:
+        result = _UrlProbe(False, None)
 
-        head = await anext(resp.aiter_bytes(256))
-        info = fleep.get(head)
-        if not info.mimes or not info.extensions:
-            return None
+    await _probe_cache.set(url, result, ttl=PROBE_TTL)
+    return result
 
-        return _FileType(info.mimes[0], info.extensions[0], int(size))
+
+async def check_url_ok(url: str) -> bool:
+    return (await probe_url(url)).ok
+
+
+async def guess_url_type(url: str) -> _FileType | None:
+    return (await probe_url(url)).file_type
 
 
 @attach_async_context(async_client)
@@ -131,27 +107,6 @@ async def solve_url_302(client: httpx.AsyncClient, url: str) -> str:
     return url
 
 
-@run_sync
-def webm_to_gif(raw: bytes) -> bytes:
-    import imageio
-
-    reader = imageio.get_reader(io.BytesIO(raw), format="webm")  # pyright: ignore[reportArgumentType]  # ty:ignore[invalid-argument-type]
-    fps = reader.get_meta_data().get("fps", 10)
-    duration = reader.get_meta_data().get("duration", 0)
-    with io.BytesIO() as output:
-        writer = imageio.get_writer(
-            output,
-            format="gif",  # ty:ignore[invalid-argument-type]
-            fps=fps,
-            duration=duration,
-            loop=0,
-        )
-        for frame in reader.iter_data():
-            writer.append_data(frame)
-        writer.close()
-        return output.getvalue()
-
-
 def _repr_uniseg(seg: Segment) -> str:
     if isinstance(seg, Media) and seg.raw is not None:
         (seg := copy.copy(seg)).raw = b"..."
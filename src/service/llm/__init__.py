@@ -1,7 +1,7 @@
 """OpenAI 兼容的 LLM 服务。"""
 
 from .client import LLMClient
-from .config import service_config
+from .config import get_service_config
 from .exceptions import (
     CircuitBreakerOpenError,
     LLMClientNotInitializedError,
@@ -49,6 +49,6 @@ def get_llm_client() -> LLMClient:
     """
     global _client
     if _client is None:
-        _client = LLMClient(service_config)
+        _client = LLMClient(get_service_config())
 
     return _client
@@ -0,0 +1,59 @@
+"""批量调用工具 — 按 token 预算打包条目，并以有限并发执行各批次。"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计文本的 token 数：非 ASCII 字符各计 1，ASCII 字符每 4 个计 1。"""
+    ascii_count = sum(char.isascii() for char in text)
+    return len(text) - ascii_count + (ascii_count + 3) // 4
+
+
+def pack_batches[T](
+    items: Iterable[T],
+    cost: Callable[[T], int],
+    budget: int,
+    max_items: int | None = None,
+) -> list[list[T]]:
+    """按顺序将条目贪心装入批次，每批的总开销不超过 budget。
+
+    单个条目超出预算时独占一批。
+
+    Args:
+        items: 待打包的条目
+        cost: 计算单个条目开销（token 数）的函数
+        budget: 每批的开销上限
+        max_items: 每批的条目数上限
+    """
+    batches: list[list[T]] = []
+    current: list[T] = []
+    used = 0
+    for item in items:
+        item_cost = cost(item)
+        if current and (
+            used + item_cost > budget
+            or (max_items is not None and len(current) >= max_items)
+        ):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += item_cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def gather_limited[T, R](
+    func: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    concurrency: int,
+) -> list[R]:
+    """并发执行 func，同时运行的调用不超过 concurrency 个，结果与 items 顺序一致。"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
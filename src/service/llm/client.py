@@ -1,7 +1,7 @@
 import asyncio
 import contextlib
 import json
-from collections.abc import Callable, Generator
+from collections.abc import Callable, Generator, Sequence
 from contextvars import ContextVar
 from typing import Any
 
@@ -12,12 +12,14 @@ from pydantic import TypeAdapter
 
 from src.highlight import Highlight
 
+from .batch import gather_limited, pack_batches
 from .config import LLMConfig
 from .exceptions import (
     CircuitBreakerOpenError,
     LLMJSONParseError,
     LLMResponseError,
     LLMRetriesExhaustedError,
+    LLMServiceError,
 )
 from .resilience import CircuitBreaker, GlobalRateLimiter
 from .schema import Message, TokenUsage, dump_messages
@@ -140,6 +142,57 @@ class LLMClient:
         parsed = self._parse_json(raw_content)
         return type_adapter.validate_python(parsed)
 
+    async def chat_completion_json_batch[I, T](
+        self,
+        items: Sequence[I],
+        *,
+        render: Callable[[Sequence[I]], Sequence[Message]],
+        response_model: type[T],
+        cost: Callable[[I], int],
+        token_budget: int,
+        max_items: int | None = None,
+        concurrency: int = 2,
+        model: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> list[tuple[Sequence[I], T | None]]:
+        """将多个条目按 token 预算打包为结构化请求，并以有限并发执行。
+
+        Args:
+            items: 待处理的条目
+            render: 将一批条目渲染为消息序列的函数
+            response_model: 每批期望的响应模型
+            cost: 估计单个条目在提示词中所占 token 数的函数
+            token_budget: 每批条目的 token 预算
+            max_items: 每批的条目数上限
+            concurrency: 同时进行的批次数上限
+            model: 可选的模型覆盖
+            temperature: 温度参数
+            max_tokens: 每批最大生成 token 数
+
+        Returns:
+            list[tuple[Sequence[I], T | None]]: 各批条目及其结果，失败的批次结果为 None
+        """
+
+        async def run(batch: Sequence[I]) -> tuple[Sequence[I], T | None]:
+            try:
+                result = await self.chat_completion_json(
+                    *render(batch),
+                    response_model=response_model,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            except (LLMServiceError, ValueError) as e:
+                logger.opt(colors=True).warning(
+                    f"LLM 批量请求失败 (<y>{len(batch)}</> 项): {escape_tag(repr(e))}"
+                )
+                return batch, None
+            return batch, result
+
+        batches = pack_batches(items, cost, token_budget, max_items)
+        return await gather_limited(run, batches, concurrency)
+
     async def _raw_completion(
         self,
         messages: list[dict[str, str]],
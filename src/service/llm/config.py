@@ -1,3 +1,5 @@
+import functools
+
 from nonebot import get_plugin_config
 from pydantic import BaseModel, Field
 
@@ -18,4 +20,7 @@ class Config(BaseModel):
     llm: LLMConfig = Field(description="LLM 服务配置")
 
 
-service_config = get_plugin_config(Config).llm
+@functools.cache
+def get_service_config() -> LLMConfig:
+    """读取 llm 配置项，导入本模块时不要求已配置"""
+    return get_plugin_config(Config).llm
@@ -0,0 +1,98 @@
+import re
+
+from nonebot.plugin import PluginMetadata
+
+__plugin_meta__ = PluginMetadata(
+    name="Text",
+    description="提供聊天文本清理与 emoji 提取工具",
+    usage="clean_text(text) / extract_emojis(text) / strip_control_chars(text)",
+    type="library",
+)
+
+EMOJI_RANGES: tuple[tuple[int, int], ...] = (
+    (0x1F600, 0x1F64F),
+    (0x1F300, 0x1F5FF),
+    (0x1F680, 0x1F6FF),
+    (0x1F1E0, 0x1F1FF),
+    (0x2702, 0x27B0),
+    (0x1F900, 0x1F9FF),
+    (0x1FA00, 0x1FA6F),
+    (0x1FA70, 0x1FAFF),
+    (0x2600, 0x26FF),
+    (0x2300, 0x23FF),
+)
+
+_EMOJI_CHARS = frozenset(
+    chr(code) for start, end in EMOJI_RANGES for code in range(start, end + 1)
+)
+_EMOJI_PATTERN = re.compile(
+    "[" + "".join(f"{chr(start)}-{chr(end)}" for start, end in EMOJI_RANGES) + "]"
+)
+
+# 回复标记 [回复 xxx: yyy]
+_REPLY_PATTERN = re.compile(r"\[回复\s+[^\]]*\]")
+# @某人（包括群昵称中的空格、括号等）：
+# 匹配到"空格+中文/字母"（实际消息内容的开始）为止，只有 @ 没有后续内容时直到末尾
+_MENTION_PATTERN = re.compile(r"@[^\n]*?(?=\s+[\u4e00-\u9fffa-zA-Z])|@[^\n]*$")
+# 方括号内容（如[图片][表情]等），嵌套时需重复应用
+_BRACKET_PATTERN = re.compile(r"\[[^\[\]]*\]")
+# 链接：先去除 http(s) 链接，再去除 www. 开头的链接
+_HTTP_PATTERN = re.compile(r"https?://\S+")
+_WWW_PATTERN = re.compile(r"www\.\S+")
+
+# 换行替换为空格，其余 C0/C1 控制字符删除
+_CONTROL_CHARS_TABLE = str.maketrans(
+    dict.fromkeys(map(chr, (*range(0x20), *range(0x7F, 0xA0)))) | {"\n": " ", "\r": " "}
+)
+
+
+def is_emoji(char: str) -> bool:
+    """判断单个字符是否为 emoji"""
+    return char in _EMOJI_CHARS
+
+
+def extract_emojis(text: str) -> list[str]:
+    """提取文本中的全部 emoji 字符"""
+    return _EMOJI_PATTERN.findall(text)
+
+
+def strip_control_chars(text: str) -> str:
+    """将换行替换为空格并删除其余控制字符"""
+    # 控制字符均不可打印，普通消息可直接跳过逐字符查表
+    if text.isprintable():
+        return text
+    return text.translate(_CONTROL_CHARS_TABLE)
+
+
+def clean_text(text: str) -> str:
+    """清理文本，去除回复、@、方括号内容、链接并合并空白
+
+    各步骤均按触发字符预先判断，绝大多数普通消息只需一次空白合并。
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        清理后的文本
+    """
+    if not text:
+        return ""
+
+    if "[回复" in text:
+        text = _REPLY_PATTERN.sub("", text)
+
+    if "@" in text:
+        text = _MENTION_PATTERN.sub("", text)
+
+    while "[" in text and "]" in text:
+        text, count = _BRACKET_PATTERN.subn("", text)
+        if not count:
+            break
+
+    if "http" in text:
+        text = _HTTP_PATTERN.sub("", text)
+    if "www." in text:
+        text = _WWW_PATTERN.sub("", text)
+
+    # 等价于 re.sub(r"\s+", " ", text).strip()
+    return " ".join(text.split())
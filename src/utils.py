@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 import functools
 import inspect
@@ -188,6 +189,27 @@ def with_semaphore[**P, R](initial_value: int) -> Decorator[P, R]:
     return decorator
 
 
+class SingleFlight[K, V]:
+    """合并相同键的并发调用，同一时刻每个键只执行一次，其余调用者等待同一结果
+
+    执行在独立任务中进行，调用者被取消不会中断执行；执行结束后移除该键。
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[K, asyncio.Task[V]] = {}
+
+    def _discard(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def run(self, key: K, factory: Callable[[], Coro[V]]) -> V:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(factory())
+            task.add_done_callback(functools.partial(self._discard, key))
+        return await asyncio.shield(task)
+
+
 @overload
 def copy_signature[F: Callable](source: F, target: Callable[..., object], /) -> F: ...
 @overload
@@ -0,0 +1,5 @@
+"""进程池任务 — 供 forkserver / spawn 启动的子进程导入。
+
+本包内的模块不导入插件包，也不调用 get_driver、get_plugin_config 等依赖已初始化
+NoneBot 的接口；插件配置由调用方以参数形式传入。
+"""
@@ -0,0 +1 @@
+"""年度报告分析的分片任务、新词发现与近似计数"""
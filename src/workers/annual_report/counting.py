@@ -0,0 +1,94 @@
+"""
+年度报告分片计数工具函数
+
+本模块基于 https://github.com/ZiHuixi/QQgroup-annual-report-analyzer/commit/e0f0c474191c278da6be4857e99207a3127eec6e
+在 MIT 协议下修改和使用
+
+原项目版权：Copyright (c) 2025 ZiHuixi
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Mapping
+
+
+def merge_nested_counters[K, V](
+    target: defaultdict[K, Counter[V]],
+    source: Mapping[K, Counter[V]],
+) -> None:
+    """将嵌套计数器 source 累加到 target
+
+    Args:
+        target: 目标计数器
+        source: 待合并的计数器
+    """
+    for key, counter in source.items():
+        target[key].update(counter)
+
+
+def calculate_entropy(neighbor_freq: dict[str, int]) -> float:
+    """计算邻接字符的熵值
+
+    Args:
+        neighbor_freq: 邻接字符的频率字典
+
+    Returns:
+        熵值（0 表示无变化）
+    """
+    total = sum(neighbor_freq.values())
+    if total == 0:
+        return 0.0
+    entropy = 0.0
+    for freq in neighbor_freq.values():
+        p = freq / total
+        if p > 0:
+            entropy -= p * math.log2(p)
+    return entropy
+
+
+def count_single_chars(
+    texts: Iterable[str],
+) -> tuple[Counter[str], Counter[str], Counter[str]]:
+    """统计单字的总次数、单字消息次数与边界出现次数
+
+    结果可直接相加合并，用于分片并行统计。
+
+    Args:
+        texts: 清理后的文本
+
+    Returns:
+        (总次数, 单字消息次数, 边界出现次数)
+    """
+    total_count: Counter[str] = Counter()
+    solo_count: Counter[str] = Counter()
+    boundary_count: Counter[str] = Counter()
+    punctuation = set('，。！？、；：""（）,.!?;:\'"()[]【】《》<>…—～·')
+
+    for text in texts:
+        # 统计每个字的总出现次数
+        for char in text:
+            if re.match(r"^[\u4e00-\u9fffa-zA-Z]$", char):
+                total_count[char] += 1
+
+        # 统计单字消息
+        clean_chars = [c for c in text if re.match(r"^[\u4e00-\u9fffa-zA-Z]$", c)]
+        if len(clean_chars) == 1:
+            solo_count[clean_chars[0]] += 1
+
+        # 统计在边界位置的出现
+        for i, char in enumerate(text):
+            if not re.match(r"^[\u4e00-\u9fffa-zA-Z]$", char):
+                continue
+            left_ok = (
+                (i == 0) or (text[i - 1] in punctuation) or (text[i - 1].isspace())
+            )
+            right_ok = (
+                (i == len(text) - 1)
+                or (text[i + 1] in punctuation)
+                or (text[i + 1].isspace())
+            )
+            if left_ok and right_ok:
+                boundary_count[char] += 1
+
+    return total_count, solo_count, boundary_count
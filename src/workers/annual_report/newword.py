@@ -0,0 +1,199 @@
+"""新词发现引擎 — 按长度逐层统计 n-gram，只为可能达到频率阈值的候选计数。
+
+n-gram 的出现次数不超过其任一 (n-1) 长度前缀/后缀的出现次数，
+因此第 n 层只需统计前缀与后缀在第 n-1 层均达到阈值的 n-gram；
+候选词的左右邻字在下一层扫描时顺带统计。
+
+与逐个枚举全部 n-gram 并为每个 n-gram 维护两个邻字计数器的做法相比，
+常驻内存只与二元组种类数和高频 n-gram 数量相关，打分结果完全一致。
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Self
+
+from .counting import calculate_entropy, merge_nested_counters
+
+MIN_N = 2
+MAX_N = 5
+BOS = "<BOS>"
+EOS = "<EOS>"
+
+_SENTENCE_SEP = re.compile('[，。！？、；：""（）\\s\\n\\r,.!?()\\[\\]]')
+_SYMBOLS = re.compile(r"^[\d\s\W]+$")
+_ALPHA = re.compile(r"^[a-zA-Z]+$")
+
+
+def iter_sentences(texts: Iterable[str]) -> Iterator[str]:
+    """按标点与空白切分句子，跳过长度不足 2 的片段。"""
+    for text in texts:
+        for part in _SENTENCE_SEP.split(text):
+            if len(sentence := part.strip()) >= MIN_N:
+                yield sentence
+
+
+def is_countable(ngram: str) -> bool:
+    """跳过纯数字/符号/纯英文"""
+    return not (_SYMBOLS.match(ngram) or _ALPHA.match(ngram))
+
+
+@dataclass(slots=True)
+class LevelCounts:
+    """单层扫描结果
+
+    grams: 本层 n-gram 的出现次数（含不参与打分的纯符号 n-gram，用于剪枝）
+    left / right: 上一层候选词的左右邻字频率
+    """
+
+    grams: Counter[str] = field(default_factory=Counter)
+    left: defaultdict[str, Counter[str]] = field(
+        default_factory=lambda: defaultdict(Counter)
+    )
+    right: defaultdict[str, Counter[str]] = field(
+        default_factory=lambda: defaultdict(Counter)
+    )
+    total_chars: int = 0
+
+    def merge(self, other: Self) -> None:
+        self.grams.update(other.grams)
+        merge_nested_counters(self.left, other.left)
+        merge_nested_counters(self.right, other.right)
+        self.total_chars += other.total_chars
+
+
+def count_level(
+    texts: Iterable[str],
+    n: int,
+    frequent: frozenset[str],
+    candidates: frozenset[str],
+) -> LevelCounts:
+    """扫描一层。
+
+    Args:
+        texts: 清理后的文本
+        n: 本层 n-gram 长度，取 MAX_N + 1 时只统计邻字
+        frequent: 上一层达到频率阈值的 n-gram
+        candidates: frequent 中参与打分的部分，需要统计邻字
+    """
+    counts = LevelCounts()
+    grams = counts.grams
+
+    if n == MIN_N:
+        for sentence in iter_sentences(texts):
+            counts.total_chars += len(sentence)
+            grams.update(sentence[i : i + n] for i in range(len(sentence) - 1))
+        return counts
+
+    k = n - 1
+    for sentence in iter_sentences(texts):
+        length = len(sentence)
+        for i in range(length - k + 1):
+            prefix = sentence[i : i + k]
+            if prefix not in frequent:
+                continue
+            if prefix in candidates:
+                counts.left[prefix][sentence[i - 1] if i > 0 else BOS] += 1
+                counts.right[prefix][sentence[i + k] if i + k < length else EOS] += 1
+            if n <= MAX_N and i + n <= length and sentence[i + 1 : i + n] in frequent:
+                grams[sentence[i : i + n]] += 1
+    return counts
+
+
+@dataclass(frozen=True, slots=True)
+class WordScore:
+    """候选新词的统计量"""
+
+    word: str
+    freq: int
+    left_entropy: float
+    right_entropy: float
+    pmi: float
+
+
+type LevelCounter = Callable[[int, frozenset[str], frozenset[str]], LevelCounts]
+
+
+class NewWordDiscovery:
+    """基于频率、邻接熵与 PMI 的新词发现。"""
+
+    def __init__(
+        self,
+        *,
+        min_freq: int,
+        entropy_threshold: float,
+        pmi_threshold: float,
+    ) -> None:
+        self.min_freq = min_freq
+        self.entropy_threshold = entropy_threshold
+        self.pmi_threshold = pmi_threshold
+
+    def score(self, count: LevelCounter) -> dict[str, WordScore]:
+        """逐层扫描并为全部候选词打分。
+
+        Args:
+            count: 执行单层扫描的函数，参数同 count_level（不含 texts），
+                可在进程池中分片执行后归并
+        """
+        # 各长度下达到阈值且参与打分的 n-gram 频率，供 PMI 查询
+        freqs: dict[str, int] = {}
+        scores: dict[str, WordScore] = {}
+        frequent: frozenset[str] = frozenset()
+        candidates: frozenset[str] = frozenset()
+        total_chars = 0
+
+        for n in range(MIN_N, MAX_N + 2):
+            level = count(n, frequent, candidates)
+            if n == MIN_N:
+                total_chars = level.total_chars
+
+            for word in candidates:
+                scores[word] = self._score(
+                    word, freqs, level.left[word], level.right[word], total_chars
+                )
+
+            frequent = frozenset(
+                gram for gram, c in level.grams.items() if c >= self.min_freq
+            )
+            candidates = frozenset(filter(is_countable, frequent))
+            freqs.update((gram, level.grams[gram]) for gram in candidates)
+
+        return scores
+
+    def discover(self, count: LevelCounter) -> set[str]:
+        """返回满足全部阈值的新词。"""
+        return {
+            s.word
+            for s in self.score(count).values()
+            if min(s.left_entropy, s.right_entropy) >= self.entropy_threshold
+            and s.pmi >= self.pmi_threshold
+        }
+
+    @staticmethod
+    def _score(
+        word: str,
+        freqs: dict[str, int],
+        left: Counter[str],
+        right: Counter[str],
+        total_chars: int,
+    ) -> WordScore:
+        freq = freqs[word]
+
+        # PMI（内部凝聚度），单字及纯符号片段不计入
+        min_pmi = float("inf")
+        for i in range(1, len(word)):
+            left_freq = freqs.get(word[:i], 0)
+            right_freq = freqs.get(word[i:], 0)
+            if left_freq > 0 and right_freq > 0:
+                pmi = math.log2((freq * total_chars) / (left_freq * right_freq + 1e-10))
+                min_pmi = min(min_pmi, pmi)
+
+        return WordScore(
+            word=word,
+            freq=freq,
+            left_entropy=calculate_entropy(left),
+            right_entropy=calculate_entropy(right),
+            pmi=0 if min_pmi == float("inf") else min_pmi,
+        )
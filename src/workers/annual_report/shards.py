@@ -0,0 +1,339 @@
+"""年度报告分片任务 — 在进程池子进程中执行的 CPU 密集阶段与可归并的分片结果。
+
+进程池以 forkserver 启动，子进程只导入本模块，不导入插件包，也不依赖已初始化的 NoneBot；
+jieba 词典由 init_worker 从主进程写入的词典缓存加载（见插件的 tokenizer 模块），
+保存在独立的分词器中，不修改 jieba 全局的默认分词器。
+"""
+
+import itertools
+import marshal
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
+
+import jieba
+
+from src.service.text import extract_emojis, is_emoji
+
+from .counting import count_single_chars, merge_nested_counters
+from .newword import LevelCounts, count_level
+from .sketch import HeavyHitters, SketchSpec
+
+type Uin = str | int
+
+_WORD_SYMBOLS = re.compile(r"^[\d\W]+$")
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """按月划分的连续消息分片
+
+    index 为分片在本次分析中的序号，用于在子进程中查找该分片的分词结果。
+    """
+
+    index: int
+    key: str
+    messages: list[tuple[Uin, str]]
+
+    @property
+    def texts(self) -> list[str]:
+        return [text for _, text in self.messages]
+
+
+# ── jieba 词典 ───────────────────────────────────────────
+
+# 当前进程分析使用的基础词典，各会话复制后使用；不使用也不修改 jieba.dt
+_dictionary: jieba.Tokenizer | None = None
+
+
+def load_dictionary(cache_file: Path) -> jieba.Tokenizer:
+    """从词典缓存创建分词器"""
+    tokenizer = jieba.Tokenizer()
+    # 与 jieba 自身的词典缓存相同，仅读取插件写入的缓存文件
+    data = marshal.loads(cache_file.read_bytes())  # noqa: S302
+    tokenizer.FREQ, tokenizer.total = data
+    tokenizer.initialized = True
+    return tokenizer
+
+
+def build_dictionary(whitelist: Sequence[str]) -> jieba.Tokenizer:
+    """从 jieba 默认词典与白名单词创建分词器"""
+    tokenizer = jieba.Tokenizer()
+    tokenizer.initialize()
+    for word in whitelist:
+        tokenizer.add_word(word)
+    return tokenizer
+
+
+def use_dictionary(tokenizer: jieba.Tokenizer) -> None:
+    """设置当前进程分析使用的基础词典"""
+    global _dictionary
+    _dictionary = tokenizer
+
+
+def init_worker(cache_file: Path, whitelist: Sequence[str], max_sessions: int) -> None:
+    """进程池初始化函数：加载与主进程相同的 jieba 词典
+
+    缓存由主进程在创建进程池前写入，读取失败时按白名单重新构建。
+    max_sessions 为共用该进程的分析数，见 _get_session。
+    """
+    global _max_sessions
+    _max_sessions = max(1, max_sessions)
+    try:
+        tokenizer = load_dictionary(cache_file)
+    except Exception:
+        tokenizer = build_dictionary(whitelist)
+    use_dictionary(tokenizer)
+
+
+# ── 分析会话 ─────────────────────────────────────────────
+
+# 子进程最多保留的会话数，由 init_worker 按共用该进程的分析数设置，超出时淘汰
+# 最久未使用的会话；主进程不淘汰，会话由分析结束时的 drop_session 释放
+_max_sessions: int | None = None
+
+
+@dataclass(slots=True)
+class _Session:
+    """单次分析在当前进程中的状态
+
+    分析期间新增的用户词只加入会话自己的分词器，不修改基础词典，
+    每个会话因此持有一份基础词典的副本；
+    用户词按添加顺序传入，每次只补齐尚未应用的部分。
+    tokens 为分词阶段缓存的逐条消息分词结果，按分片序号保存，
+    只留在执行分词的进程中，供同一进程的词频统计读取。
+    """
+
+    tokenizer: jieba.Tokenizer
+    applied: int = 0
+    tokens: dict[int, list[list[str]]] = field(default_factory=dict)
+
+
+_sessions: OrderedDict[str, _Session] = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _new_tokenizer() -> jieba.Tokenizer:
+    if (base := _dictionary) is None:
+        raise RuntimeError("jieba 词典尚未加载")
+    tokenizer = jieba.Tokenizer()
+    tokenizer.FREQ = dict(base.FREQ)
+    tokenizer.total = base.total
+    tokenizer.initialized = True
+    return tokenizer
+
+
+def _get_session(session: str, user_words: Sequence[tuple[str, int]]) -> _Session:
+    """获取会话状态并同步用户词
+
+    会话被淘汰后重新创建并应用全部用户词，分词结果不受影响。
+    """
+    with _sessions_lock:
+        if (state := _sessions.get(session)) is None:
+            state = _sessions[session] = _Session(_new_tokenizer())
+            while _max_sessions is not None and len(_sessions) > _max_sessions:
+                _sessions.popitem(last=False)
+        else:
+            _sessions.move_to_end(session)
+    for word, freq in user_words[state.applied :]:
+        state.tokenizer.add_word(word, freq=freq)
+    state.applied = len(user_words)
+    return state
+
+
+def drop_session(session: str) -> None:
+    """释放当前进程中的会话状态"""
+    with _sessions_lock:
+        _sessions.pop(session, None)
+
+
+# ── 分片结果 ─────────────────────────────────────────────
+
+
+@dataclass(slots=True)
+class BigramCounts:
+    """相邻词对频率
+
+    启用近似计数时 pairs 只包含 sketch 跟踪的高频词对，计数为估计值。
+    """
+
+    pairs: Counter[tuple[str, str]] = field(default_factory=Counter)
+    right: Counter[str] = field(default_factory=Counter)
+    sketch: HeavyHitters[tuple[str, str]] | None = None
+
+    def add(self, pair: tuple[str, str]) -> None:
+        if self.sketch is None:
+            self.pairs[pair] += 1
+        else:
+            self.sketch.add(pair)
+        self.right[pair[0]] += 1
+
+    def merge(self, other: Self) -> None:
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+            self.pairs = Counter(self.sketch.counts)
+        else:
+            self.pairs.update(other.pairs)
+        self.right.update(other.right)
+
+
+@dataclass(slots=True)
+class TokenCounts:
+    """分词结果：词频、贡献者与样例
+
+    启用近似计数时只为 sketch 跟踪的高频词记录贡献者与样例，
+    词被淘汰时一并丢弃，freq 为估计值。
+    """
+
+    sample_limit: int
+    freq: Counter[str] = field(default_factory=Counter)
+    contributors: defaultdict[str, Counter[Uin]] = field(
+        default_factory=lambda: defaultdict(Counter)
+    )
+    samples: defaultdict[str, list[str]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    sketch: HeavyHitters[str] | None = None
+
+    def add(self, word: str) -> bool:
+        """计数加一，返回是否需要记录该词的贡献者与样例"""
+        if self.sketch is None:
+            self.freq[word] += 1
+            return True
+        if (evicted := self.sketch.add(word)) is not None:
+            self.contributors.pop(evicted, None)
+            self.samples.pop(evicted, None)
+        return word in self.sketch
+
+    def merge(self, other: Self) -> None:
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+            self.freq = Counter(self.sketch.counts)
+        else:
+            self.freq.update(other.freq)
+        merge_nested_counters(self.contributors, other.contributors)
+        for word, samples in other.samples.items():
+            target = self.samples[word]
+            if (room := self.sample_limit - len(target)) > 0:
+                target.extend(samples[:room])
+        if self.sketch is not None:
+            for table in (self.contributors, self.samples):
+                for word in table.keys() - self.freq.keys():
+                    del table[word]
+
+
+@dataclass(slots=True)
+class SingleCharCounts:
+    """单字出现次数"""
+
+    total: Counter[str] = field(default_factory=Counter)
+    solo: Counter[str] = field(default_factory=Counter)
+    boundary: Counter[str] = field(default_factory=Counter)
+
+    def merge(self, other: Self) -> None:
+        self.total.update(other.total)
+        self.solo.update(other.solo)
+        self.boundary.update(other.boundary)
+
+
+# ── 分片任务（须为模块级函数以便跨进程序列化） ───────────
+
+
+def count_level_stats(
+    shard: Shard,
+    *,
+    n: int,
+    frequent: frozenset[str],
+    candidates: frozenset[str],
+) -> LevelCounts:
+    return count_level(shard.texts, n, frequent, candidates)
+
+
+def count_single_char_stats(shard: Shard) -> SingleCharCounts:
+    return SingleCharCounts(*count_single_chars(shard.texts))
+
+
+def _cut(tokenizer: jieba.Tokenizer, text: str) -> list[str]:
+    return [w for token in tokenizer.cut(text) if (w := token.strip())]
+
+
+def segment(
+    shard: Shard,
+    *,
+    session: str,
+    user_words: Sequence[tuple[str, int]],
+    sketch: SketchSpec | None = None,
+) -> BigramCounts:
+    """对分片内每条消息分词一次并统计相邻词对，分词结果缓存在当前进程。"""
+    state = _get_session(session, user_words)
+    tokens: list[list[str]] = []
+    bigrams = BigramCounts(sketch=sketch.create() if sketch else None)
+    for text in shard.texts:
+        words = _cut(state.tokenizer, text)
+        tokens.append(words)
+        for w1, w2 in itertools.pairwise(words):
+            if _WORD_SYMBOLS.match(w1) or _WORD_SYMBOLS.match(w2):
+                continue
+            bigrams.add((w1, w2))
+    state.tokens[shard.index] = tokens
+    if bigrams.sketch is not None:
+        bigrams.pairs = Counter(bigrams.sketch.counts)
+    return bigrams
+
+
+def _apply_merges(words: list[str], merges: dict[tuple[str, str], str]) -> list[str]:
+    """从左到右贪心合并缓存分词结果中的相邻词对。"""
+    if not merges or len(words) < 2:
+        return words
+    merged: list[str] = []
+    i = 0
+    while i < len(words):
+        if i + 1 < len(words) and (word := merges.get((words[i], words[i + 1]))):
+            merged.append(word)
+            i += 2
+        else:
+            merged.append(words[i])
+            i += 1
+    return merged
+
+
+def count_tokens(
+    shard: Shard,
+    *,
+    session: str,
+    user_words: Sequence[tuple[str, int]],
+    merges: dict[tuple[str, str], str],
+    sample_limit: int,
+    sketch: SketchSpec | None = None,
+) -> TokenCounts:
+    """在缓存的分词结果上应用词组合并并统计词频。
+
+    当前进程没有该分片的缓存（会话已被淘汰）时重新分词，结果相同。
+    """
+    state = _get_session(session, user_words)
+    cached = state.tokens.pop(shard.index, None)
+    if cached is None:
+        cached = [_cut(state.tokenizer, text) for text in shard.texts]
+
+    counts = TokenCounts(sample_limit, sketch=sketch.create() if sketch else None)
+    for (uin, text), words in zip(shard.messages, cached, strict=True):
+        tokens = [w for w in _apply_merges(words, merges) if not is_emoji(w)]
+        tokens.extend(extract_emojis(text))
+        for word in tokens:
+            # 跳过纯数字/符号
+            if _WORD_SYMBOLS.match(word) and not is_emoji(word):
+                continue
+
+            if not counts.add(word):
+                continue
+            counts.contributors[word][uin] += 1
+            samples = counts.samples[word]
+            if len(samples) < sample_limit:
+                samples.append(text)
+    if counts.sketch is not None:
+        counts.freq = Counter(counts.sketch.counts)
+    return counts
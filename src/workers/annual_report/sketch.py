@@ -0,0 +1,144 @@
+"""近似计数 — Count-Min Sketch 配合固定容量的高频项表，以可控误差换取内存上限。
+
+Count-Min Sketch 用 depth 行、每行 width 个计数器估计任意项的频率，
+估计值只会偏高：以 1 - e^-depth 的概率，偏差不超过 e / width 乘以总计数。
+高频项表只保留估计值最高的 capacity 项，用最小堆维护淘汰顺序，
+常驻内存与词表大小无关。
+
+行内下标由项内容的 BLAKE2b 摘要派生，不使用按进程随机化的 hash()，
+因此任意进程产生的结果均可合并。
+"""
+
+import hashlib
+import heapq
+import math
+import operator
+from array import array
+from collections.abc import Hashable, Iterator
+from dataclasses import dataclass
+from typing import Self
+
+
+def stable_hash(item: Hashable) -> int:
+    """与进程无关的 64 位哈希，支持字符串与字符串元组"""
+    key = "\x1f".join(item) if isinstance(item, tuple) else str(item)
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class CountMinSketch:
+    """Count-Min Sketch"""
+
+    __slots__ = ("depth", "rows", "total", "width")
+
+    def __init__(self, width: int, depth: int) -> None:
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, item: Hashable) -> Iterator[int]:
+        # 双重哈希: h1 + i * h2
+        h = stable_hash(item)
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        return ((h1 + i * h2) % self.width for i in range(self.depth))
+
+    def add(self, item: Hashable, count: int = 1) -> int:
+        """增加计数并返回新的估计值"""
+        self.total += count
+        values: list[int] = []
+        for row, index in zip(self.rows, self._indexes(item), strict=True):
+            row[index] += count
+            values.append(row[index])
+        return min(values)
+
+    def estimate(self, item: Hashable) -> int:
+        return min(
+            row[index]
+            for row, index in zip(self.rows, self._indexes(item), strict=True)
+        )
+
+    def merge(self, other: Self) -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min Sketch 尺寸不一致，无法合并")
+        self.rows = [
+            array("q", map(operator.add, row, other_row, strict=True))
+            for row, other_row in zip(self.rows, other.rows, strict=True)
+        ]
+        self.total += other.total
+
+
+class HeavyHitters[T: Hashable]:
+    """估计频率最高的 capacity 项
+
+    counts 中的值为 Count-Min Sketch 估计值，不低于真实频率。
+    """
+
+    __slots__ = ("_heap", "capacity", "counts", "sketch")
+
+    def __init__(self, capacity: int, width: int, depth: int) -> None:
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.counts: dict[T, int] = {}
+        # 每个被跟踪的项恰有一个堆条目，条目中的计数可能落后于 counts
+        self._heap: list[tuple[int, T]] = []
+
+    def __contains__(self, item: object) -> bool:
+        return item in self.counts
+
+    def _settle(self) -> None:
+        """刷新过期的堆顶条目，使堆顶为当前最小计数"""
+        heap, counts = self._heap, self.counts
+        while heap[0][0] != (current := counts[heap[0][1]]):
+            heapq.heapreplace(heap, (current, heap[0][1]))
+
+    def add(self, item: T) -> T | None:
+        """计数加一，返回因此被淘汰的项"""
+        estimate = self.sketch.add(item)
+        if item in self.counts:
+            self.counts[item] = estimate
+            return None
+
+        if len(self.counts) < self.capacity:
+            self.counts[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+            return None
+
+        self._settle()
+        if estimate <= self._heap[0][0]:
+            return None
+        _, evicted = heapq.heapreplace(self._heap, (estimate, item))
+        del self.counts[evicted]
+        self.counts[item] = estimate
+        return evicted
+
+    def merge(self, other: Self) -> None:
+        """合并计数后用合并后的估计值重新选出前 capacity 项"""
+        self.sketch.merge(other.sketch)
+        candidates = self.counts.keys() | other.counts.keys()
+        ranked = heapq.nlargest(
+            self.capacity,
+            ((self.sketch.estimate(item), item) for item in candidates),
+            key=lambda pair: pair[0],
+        )
+        self.counts = {item: count for count, item in ranked}
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+
+@dataclass(frozen=True, slots=True)
+class SketchSpec:
+    """高频项表尺寸，在各分片中创建同尺寸的实例以便合并"""
+
+    capacity: int
+    width: int
+    depth: int
+
+    @classmethod
+    def from_error(cls, capacity: int, epsilon: float, delta: float) -> Self:
+        """按相对误差 epsilon 与失败概率 delta 确定 Count-Min Sketch 尺寸"""
+        return cls(
+            capacity, math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta))
+        )
+
+    def create[T: Hashable](self) -> HeavyHitters[T]:
+        return HeavyHitters(self.capacity, self.width, self.depth)
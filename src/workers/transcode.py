@@ -0,0 +1,48 @@
+"""webm 转 gif 转码任务，在 group_pipe 的转码进程中执行。"""
+
+import io
+import time
+
+
+class TranscodeError(Exception):
+    """转码超出限制"""
+
+
+def convert_webm(
+    raw: bytes,
+    *,
+    max_frames: int,
+    max_output_size: int,
+    timeout: float,
+) -> bytes:
+    """逐帧读取并写入，不一次性解码全部帧"""
+    import imageio
+
+    deadline = time.monotonic() + timeout
+    with (
+        imageio.get_reader(io.BytesIO(raw), format="webm") as reader,  # pyright: ignore[reportArgumentType]  # ty:ignore[invalid-argument-type]
+        io.BytesIO() as output,
+    ):
+        meta = reader.get_meta_data()
+        writer = imageio.get_writer(
+            output,
+            format="gif",  # ty:ignore[invalid-argument-type]
+            fps=meta.get("fps", 10),
+            duration=meta.get("duration", 0),
+            loop=0,
+        )
+        try:
+            for index, frame in enumerate(reader.iter_data()):
+                if index >= max_frames:
+                    raise TranscodeError(f"帧数超过 {max_frames}")
+                if time.monotonic() > deadline:
+                    raise TranscodeError(f"转码超过 {timeout} 秒")
+                writer.append_data(frame)
+        finally:
+            writer.close()
+
+        gif = output.getvalue()
+
+    if len(gif) > max_output_size:
+        raise TranscodeError(f"输出大小 {len(gif)} 超过 {max_output_size}")
+    return gif